@@ -0,0 +1,447 @@
+"""Headless benchmark for the processing pipeline and the format decoders.
+
+Runs the sample images plus generated synthetic images of several sizes and
+formats through decoding and the edge detection pipeline, and reports per-stage
+latency percentiles, throughput, peak RSS and allocation figures. Results can be
+written as JSON and compared against an earlier run. ``--engines`` also times
+each Canny engine and checks that its edges match the OpenCV engine exactly, and
+``--count-engines`` does the same for the object counting engines and the
+``findContours`` count.
+
+Example:
+    python benchmark.py --sizes 640x480 1920x1080 -o current.json --baseline baseline.json
+    python benchmark.py --sizes 1920x1080 --engines opencv opencv_sobel numpy
+    python benchmark.py --sizes 1920x1080 --count-engines contours components
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+import cv2
+import numpy as np
+from PIL import Image
+from src.config.processing_config import (
+    DEFAULT_MIN_THRESHOLD,
+    DEFAULT_MAX_THRESHOLD,
+    DILATION_KERNEL_SIZE,
+    EDGE_ENGINES,
+    COUNT_ENGINES
+)
+from src.services.batch_processing_service import BatchProcessingService
+from src.services.edge_detection_service import EdgeDetectionService
+from src.services.file_management_service import FileManagementService
+from src.services.image_conversion_service import ImageConversionService
+from src.services.image_processing_service import ImageProcessingService
+from src.services.object_counting_service import ObjectCountingService
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+SYNTHETIC_FORMATS = ('png', 'jpg', 'bmp', 'gif', 'pcx')
+DEFAULT_SIZES = ('640x480', '1920x1080', '4000x3000')
+PERCENTILES = (50, 90, 99)
+PARITY_THRESHOLDS = ((0, 0), (20, 60), (50, 150), (100, 200), (200, 255))  # Checked besides --min/--max
+
+def parse_arguments(argv=None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the image processing pipeline.")
+    parser.add_argument("--images", default="images",
+                        help="Folder of sample images to include (default: images)")
+    parser.add_argument("--sizes", nargs="*", default=list(DEFAULT_SIZES), metavar="WxH",
+                        help="Sizes of the synthetic images (default: %(default)s)")
+    parser.add_argument("--formats", nargs="*", default=list(SYNTHETIC_FORMATS),
+                        choices=SYNTHETIC_FORMATS, help="Formats of the synthetic images")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per image (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per image (default: 1)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Also measure batch throughput with this many worker processes")
+    parser.add_argument("--engines", nargs="*", default=[], choices=EDGE_ENGINES,
+                        help="Time these Canny engines and check their parity with OpenCV")
+    parser.add_argument("--count-engines", nargs="*", default=[], choices=COUNT_ENGINES,
+                        help="Time these counting engines and check their counts against findContours")
+    parser.add_argument("--min", dest="min_threshold", type=int, default=DEFAULT_MIN_THRESHOLD)
+    parser.add_argument("--max", dest="max_threshold", type=int, default=DEFAULT_MAX_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic images")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative slowdown reported as a regression (default: 0.1)")
+
+    args = parser.parse_args(argv)
+    try:
+        args.sizes = [tuple(int(value) for value in size.lower().split('x')) for size in args.sizes]
+    except ValueError:
+        parser.error("Sizes must be given as WIDTHxHEIGHT, e.g. 1920x1080.")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1.")
+    if args.min_threshold >= args.max_threshold:
+        parser.error("Min value must be lower than max value.")
+    return args
+
+def generate_synthetic_images(directory: str, sizes, formats, seed: int = 0) -> list:
+    """Write synthetic test images with countable blobs on a noisy background.
+
+    PNG images get an alpha channel with a transparent border so that the
+    flattening path of the decoder is exercised; GIF images are palettized.
+
+    Args:
+        directory: Folder to write the images into
+        sizes: Iterable of (width, height) tuples
+        formats: Iterable of file extensions from ``SYNTHETIC_FORMATS``
+        seed: Seed for the random generator
+
+    Returns:
+        List of paths of the written images
+    """
+    rng = np.random.default_rng(seed)
+    paths = []
+    for width, height in sizes:
+        background = rng.integers(90, 140, size=(height, width, 3), dtype=np.uint8)
+        image = cv2.GaussianBlur(background, (0, 0), 3)
+        for _ in range(max(8, width * height // 40000)):
+            center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            axes = (int(rng.integers(4, max(5, width // 20))), int(rng.integers(4, max(5, height // 20))))
+            color = tuple(int(channel) for channel in rng.integers(0, 256, size=3))
+            cv2.ellipse(image, center, axes, float(rng.integers(0, 180)), 0, 360, color, -1)
+        rgb_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+        for image_format in formats:
+            path = os.path.join(directory, f"synthetic_{width}x{height}.{image_format}")
+            if image_format == 'png':
+                alpha = np.full((height, width), 255, dtype=np.uint8)
+                border = max(1, min(width, height) // 20)
+                alpha[:border, :] = alpha[-border:, :] = alpha[:, :border] = alpha[:, -border:] = 0
+                rgba_image = rgb_image.copy()
+                rgba_image.putalpha(Image.fromarray(alpha))
+                rgba_image.save(path)
+            elif image_format == 'gif':
+                rgb_image.quantize(colors=256).save(path)
+            elif image_format == 'jpg':
+                rgb_image.save(path, quality=90)
+            else:
+                rgb_image.save(path)
+            paths.append(path)
+    return paths
+
+def peak_rss_bytes():
+    """Get the peak resident set size of this process, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def summarize_latencies(samples) -> dict:
+    """Summarize latency samples in seconds as mean and percentiles in milliseconds."""
+    samples_ms = np.asarray(samples, dtype=np.float64) * 1000
+    summary = {'mean_ms': float(samples_ms.mean())}
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}_ms"] = float(np.percentile(samples_ms, percentile))
+    return summary
+
+def benchmark_image(path: str, min_threshold: int, max_threshold: int, repeat: int, warmup: int) -> dict:
+    """Benchmark decoding and processing of a single image.
+
+    Args:
+        path: Path to the image file
+        min_threshold: Lower hysteresis threshold for Canny
+        max_threshold: Upper hysteresis threshold for Canny
+        repeat: Number of timed runs
+        warmup: Number of untimed runs before timing
+
+    Returns:
+        Per-image benchmark record
+    """
+    samples = defaultdict(list)
+    processor = ImageProcessingService(
+        metrics_callback=lambda event: samples[event.stage].append(event.seconds)
+    )
+    counter = ImageProcessingService(reuse_buffers=True)
+
+    for run in range(warmup + repeat):
+        if run == warmup:
+            samples.clear()
+        image_data = ImageConversionService.decode_image(path, metrics_callback=processor.metrics_callback)
+
+        start = time.perf_counter()
+        processor.process_image(image_data, min_threshold, max_threshold, path=path)
+        samples['process_image'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        counter.process_image_count_only(image_data, min_threshold, max_threshold, path=path)
+        samples['count_only'].append(time.perf_counter() - start)
+
+    stages = {name: summarize_latencies(values) for name, values in samples.items()}
+
+    # Allocations are measured in a separate run, as tracing slows everything down
+    tracemalloc.start()
+    try:
+        image_data = ImageConversionService.decode_image(path)
+        processor.process_image(image_data, min_threshold, max_threshold, path=path)
+        snapshot = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    height, width = image_data.shape[:2]
+    return {
+        'path': path,
+        'format': os.path.splitext(path)[1].lstrip('.').lower(),
+        'width': width,
+        'height': height,
+        'file_bytes': os.path.getsize(path),
+        'object_count': processor.current_objects,
+        'stages': stages,
+        'traced_peak_bytes': traced_peak,
+        'allocated_blocks': sum(statistic.count for statistic in snapshot.statistics('filename')),
+    }
+
+def benchmark_engines(path: str, min_threshold: int, max_threshold: int, engines, repeat: int, warmup: int) -> dict:
+    """Time the Canny engines on an image and check their edges against the OpenCV engine.
+
+    ``opencv_sobel`` is timed both with and without derivatives computed
+    beforehand, the latter being the cost of a threshold change once they are cached.
+
+    Args:
+        path: Path to the image file
+        min_threshold: Lower hysteresis threshold for Canny
+        max_threshold: Upper hysteresis threshold for Canny
+        engines: Names of the engines to benchmark
+        repeat: Number of timed runs
+        warmup: Number of untimed runs before timing
+
+    Returns:
+        Mapping of engine names to latency summaries with a ``parity`` flag
+    """
+    processor = ImageProcessingService()
+    processor.process_image(ImageConversionService.decode_image(path), min_threshold, max_threshold, path=path)
+    blurred = processor.blurred_image
+    gradients = EdgeDetectionService.sobel_gradients(blurred)
+    threshold_pairs = ((min_threshold, max_threshold),) + PARITY_THRESHOLDS
+
+    variants = [(engine, engine, None) for engine in engines]
+    if 'opencv_sobel' in engines:
+        variants.append(('opencv_sobel_cached', 'opencv_sobel', gradients))
+
+    records = {}
+    for name, engine, engine_gradients in variants:
+        samples = []
+        for run in range(warmup + repeat):
+            start = time.perf_counter()
+            EdgeDetectionService.detect(blurred, min_threshold, max_threshold, engine, gradients=engine_gradients)
+            if run >= warmup:
+                samples.append(time.perf_counter() - start)
+        record = summarize_latencies(samples)
+        record['parity'] = all(
+            np.array_equal(
+                EdgeDetectionService.detect(blurred, low, high, engine, gradients=engine_gradients),
+                EdgeDetectionService.detect(blurred, low, high, 'opencv')
+            )
+            for low, high in threshold_pairs
+        )
+        records[name] = record
+    return records
+
+def benchmark_count_engines(path: str, min_threshold: int, max_threshold: int, engines, repeat: int,
+                            warmup: int) -> dict:
+    """Time the counting engines on an image and check their counts against ``findContours``.
+
+    Args:
+        path: Path to the image file
+        min_threshold: Lower hysteresis threshold for Canny
+        max_threshold: Upper hysteresis threshold for Canny
+        engines: Names of the counting engines to benchmark
+        repeat: Number of timed runs
+        warmup: Number of untimed runs before timing
+
+    Returns:
+        Mapping of engine names to latency summaries with a ``parity`` flag
+    """
+    processor = ImageProcessingService()
+    processor.process_image(ImageConversionService.decode_image(path), min_threshold, max_threshold, path=path)
+    blurred = processor.blurred_image
+    masks = [
+        cv2.blur(EdgeDetectionService.detect(blurred, low, high), DILATION_KERNEL_SIZE)
+        for low, high in ((min_threshold, max_threshold),) + PARITY_THRESHOLDS
+    ]
+    counters = {
+        'contours': lambda mask: len(ObjectCountingService.find_contours(mask)),
+        'components': lambda mask: ObjectCountingService.component_stats(mask).count,
+    }
+    expected = [len(cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]) for mask in masks]
+
+    records = {}
+    for engine in engines:
+        samples = []
+        for run in range(warmup + repeat):
+            start = time.perf_counter()
+            counters[engine](masks[0])
+            if run >= warmup:
+                samples.append(time.perf_counter() - start)
+        record = summarize_latencies(samples)
+        record['parity'] = [counters[engine](mask) for mask in masks] == expected
+        records[engine] = record
+    return records
+
+def benchmark_batch(paths, min_threshold: int, max_threshold: int, workers: int) -> dict:
+    """Measure end-to-end throughput of the batch processing service."""
+    batch_processor = BatchProcessingService(workers=workers)
+    try:
+        # Warm the pool so process start-up is not counted
+        batch_processor.process_files(paths[:workers], min_threshold, max_threshold)
+        start = time.perf_counter()
+        results = batch_processor.process_files(paths, min_threshold, max_threshold)
+        elapsed = time.perf_counter() - start
+    finally:
+        batch_processor.shutdown()
+    return {
+        'workers': workers,
+        'images': len(results),
+        'errors': sum(1 for result in results if not result.succeeded),
+        'seconds': elapsed,
+        'images_per_second': len(results) / elapsed if elapsed else None,
+    }
+
+def compare_with_baseline(current: dict, baseline: dict, tolerance: float) -> list:
+    """Compare median stage latencies of two runs.
+
+    Args:
+        current: Results of this run
+        baseline: Results of an earlier run
+        tolerance: Relative slowdown above which a stage counts as a regression
+
+    Returns:
+        List of (image, stage, baseline ms, current ms, ratio, regressed) tuples
+        for images and stages present in both runs
+    """
+    baseline_images = {os.path.basename(record['path']): record for record in baseline.get('images', [])}
+    comparisons = []
+    for record in current['images']:
+        name = os.path.basename(record['path'])
+        baseline_record = baseline_images.get(name)
+        if baseline_record is None:
+            continue
+        for stage, summary in record['stages'].items():
+            baseline_summary = baseline_record['stages'].get(stage)
+            if not baseline_summary or not baseline_summary['p50_ms']:
+                continue
+            ratio = summary['p50_ms'] / baseline_summary['p50_ms']
+            comparisons.append(
+                (name, stage, baseline_summary['p50_ms'], summary['p50_ms'], ratio, ratio > 1 + tolerance)
+            )
+    return comparisons
+
+def print_report(results: dict, comparisons=None, stream=sys.stdout):
+    """Print a human-readable summary of the benchmark results."""
+    print(f"{'image':<32} {'stage':<18} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}", file=stream)
+    for record in results['images']:
+        name = os.path.basename(record['path'])
+        for stage, summary in record['stages'].items():
+            print(
+                f"{name:<32} {stage:<18} {summary['p50_ms']:>9.2f} "
+                f"{summary['p90_ms']:>9.2f} {summary['p99_ms']:>9.2f}",
+                file=stream
+            )
+    totals = results['totals']
+    print(f"\nSingle-process throughput: {totals['images_per_second']:.2f} images/s "
+          f"({totals['count_only_images_per_second']:.2f} images/s count-only)", file=stream)
+    if results.get('batch'):
+        batch = results['batch']
+        print(f"Batch throughput ({batch['workers']} workers): {batch['images_per_second']:.2f} images/s",
+              file=stream)
+    if totals['peak_rss_bytes'] is not None:
+        print(f"Peak RSS: {totals['peak_rss_bytes'] / 2**20:.1f} MiB", file=stream)
+
+    for key, heading in (('engines', 'engine'), ('count_engines', 'count engine')):
+        if not any(record.get(key) for record in results['images']):
+            continue
+        print(f"\n{'image':<32} {heading:<20} {'p50 ms':>9} {'p90 ms':>9}  parity", file=stream)
+        for record in results['images']:
+            name = os.path.basename(record['path'])
+            for engine, summary in record.get(key, {}).items():
+                parity = 'ok' if summary['parity'] else 'MISMATCH'
+                print(f"{name:<32} {engine:<20} {summary['p50_ms']:>9.2f} {summary['p90_ms']:>9.2f}  {parity}",
+                      file=stream)
+
+    if comparisons:
+        print(f"\n{'image':<32} {'stage':<18} {'baseline':>9} {'current':>9} {'ratio':>7}", file=stream)
+        for name, stage, baseline_ms, current_ms, ratio, regressed in comparisons:
+            marker = '  REGRESSION' if regressed else ''
+            print(f"{name:<32} {stage:<18} {baseline_ms:>9.2f} {current_ms:>9.2f} {ratio:>7.2f}{marker}",
+                  file=stream)
+
+def main(argv=None) -> int:
+    """Command-line entry point."""
+    args = parse_arguments(argv)
+    with tempfile.TemporaryDirectory(prefix="canny-benchmark-") as synthetic_directory:
+        paths = []
+        if args.images and os.path.isdir(args.images):
+            paths.extend(
+                os.path.join(args.images, file_name)
+                for file_name in FileManagementService.list_image_files(args.images)
+            )
+        paths.extend(generate_synthetic_images(synthetic_directory, args.sizes, args.formats, args.seed))
+
+        records = []
+        for path in paths:
+            print(f"Benchmarking {os.path.basename(path)}", file=sys.stderr)
+            record = benchmark_image(path, args.min_threshold, args.max_threshold, args.repeat, args.warmup)
+            if args.engines:
+                record['engines'] = benchmark_engines(
+                    path, args.min_threshold, args.max_threshold, args.engines, args.repeat, args.warmup
+                )
+            if args.count_engines:
+                record['count_engines'] = benchmark_count_engines(
+                    path, args.min_threshold, args.max_threshold, args.count_engines, args.repeat, args.warmup
+                )
+            records.append(record)
+
+        def images_per_second(stage):
+            seconds = sum(record['stages'][stage]['mean_ms'] for record in records) / 1000
+            return len(records) / seconds if seconds else None
+
+        results = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'parameters': ImageProcessingService.pipeline_parameters(args.min_threshold, args.max_threshold),
+            'images': records,
+            'totals': {
+                'images': len(records),
+                'images_per_second': images_per_second('process_image'),
+                'count_only_images_per_second': images_per_second('count_only'),
+                'peak_rss_bytes': peak_rss_bytes(),
+            },
+        }
+        if args.workers:
+            results['batch'] = benchmark_batch(paths, args.min_threshold, args.max_threshold, args.workers)
+
+    comparisons = None
+    if args.baseline:
+        with open(args.baseline) as stream:
+            comparisons = compare_with_baseline(results, json.load(stream), args.tolerance)
+
+    print_report(results, comparisons)
+    if args.output:
+        with open(args.output, 'w') as stream:
+            json.dump(results, stream, indent=2)
+    parity_failed = any(
+        not summary['parity']
+        for record in results['images']
+        for key in ('engines', 'count_engines')
+        for summary in record.get(key, {}).values()
+    )
+    regressed = comparisons and any(comparison[-1] for comparison in comparisons)
+    return 1 if parity_failed or regressed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+"""Headless command-line entry point for batch object counting.
+
+Runs the same pipeline as the GUI without importing PySimpleGUI or Tk, so it can
+be used on servers and in containers.
+
+Example:
+    python cli.py images/ --min 0 --max 70 --workers 8 --format csv -o counts.csv
+"""
+
+import argparse
+import glob
+import os
+import sys
+from itertools import chain
+from typing import Iterable, Iterator
+from src.config.processing_config import (
+    DEFAULT_MIN_THRESHOLD,
+    DEFAULT_MAX_THRESHOLD,
+    AUTO_THRESHOLD_MODES,
+    DEFAULT_EDGE_ENGINE,
+    EDGE_ENGINES,
+    DEFAULT_COUNT_ENGINE,
+    COUNT_ENGINES,
+    INCREMENTAL_CHANGE_THRESHOLD
+)
+from src.services.batch_processing_service import BatchProcessingService
+from src.services.file_management_service import FileManagementService
+from src.services.frame_source_service import FrameSourceService
+from src.services.image_probe_service import ImageProbeService
+from src.services.image_processing_service import ImageProcessingService
+from src.services.incremental_processing_service import IncrementalProcessingService
+from src.models.object_table import ObjectTable
+from src.services.metrics_service import MetricsService
+from src.services.object_export_service import ObjectExportService
+from src.services.result_cache_service import ResultCacheService
+from src.services.results_export_service import ResultsExportService
+from src.services.stream_processing_service import StreamProcessingService
+from src.services.threshold_sweep_service import ThresholdSweepService
+
+def parse_threshold_values(text: str) -> list:
+    """Parse a comma-separated list or a 'start:stop:step' range of thresholds."""
+    try:
+        if ':' in text:
+            start, stop, step = (int(value) for value in text.split(':'))
+            values = list(range(start, stop + 1, step))
+        else:
+            values = [int(value) for value in text.split(',') if value.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid threshold list: {text!r}")
+    if not values or min(values) < 0:
+        raise argparse.ArgumentTypeError(f"invalid threshold list: {text!r}")
+    return values
+
+def parse_arguments(argv=None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Count objects in images using Canny edge detection."
+    )
+    parser.add_argument("source", help="Folder of images, a glob pattern such as 'scans/*.png', a video file, "
+                                       "or a numbered image sequence such as 'frames/shot_%%04d.png'")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Include images in subfolders")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="Only process relative paths matching this glob (repeatable)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="Skip relative paths matching this glob (repeatable)")
+    parser.add_argument("--min", dest="min_threshold", type=int, default=DEFAULT_MIN_THRESHOLD,
+                        help=f"Minimum hysteresis threshold (default: {DEFAULT_MIN_THRESHOLD})")
+    parser.add_argument("--max", dest="max_threshold", type=int, default=DEFAULT_MAX_THRESHOLD,
+                        help=f"Maximum hysteresis threshold (default: {DEFAULT_MAX_THRESHOLD})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: one per CPU core)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Images handed to a worker per dispatch")
+    parser.add_argument("--tile-size", type=int, default=None,
+                        help="Process images in tiles of this many pixels to bound memory on very large images")
+    parser.add_argument("--max-dimension", type=int, default=None,
+                        help="Count at a working resolution whose longest side is at most this many pixels")
+    parser.add_argument("--scale", type=float, default=None,
+                        help="Count at this fraction of the full resolution, e.g. 0.25")
+    parser.add_argument("--auto-threshold", choices=AUTO_THRESHOLD_MODES, default=None,
+                        help="Choose each image's thresholds from its histogram instead of --min/--max")
+    parser.add_argument("--edge-engine", choices=EDGE_ENGINES, default=DEFAULT_EDGE_ENGINE,
+                        help=f"Canny implementation for whole images; all give identical edges "
+                             f"(default: {DEFAULT_EDGE_ENGINE})")
+    parser.add_argument("--count-engine", choices=COUNT_ENGINES, default=DEFAULT_COUNT_ENGINE,
+                        help=f"Object counting for whole images; both give identical counts, 'components' "
+                             f"also supports area filters (default: {DEFAULT_COUNT_ENGINE})")
+    parser.add_argument("--min-area", type=int, default=None,
+                        help="With --count-engine components, only count objects of at least this many pixels")
+    parser.add_argument("--max-area", type=int, default=None,
+                        help="With --count-engine components, only count objects of at most this many pixels")
+    parser.add_argument("--target-fps", type=float, default=None,
+                        help="For video and sequences, skip frames that fall behind this frame rate")
+    parser.add_argument("--incremental", action="store_true",
+                        help="For video and sequences, reprocess only the parts of each frame that changed")
+    parser.add_argument("--change-threshold", type=int, default=None,
+                        help=f"With --incremental, ignore pixel changes up to this intensity "
+                             f"(default: {INCREMENTAL_CHANGE_THRESHOLD}, which keeps counts exact)")
+    parser.add_argument("--sweep-min", type=parse_threshold_values, metavar="VALUES",
+                        help="Sweep these minimum thresholds, as '0,10,20' or 'start:stop:step'")
+    parser.add_argument("--sweep-max", type=parse_threshold_values, metavar="VALUES",
+                        help="Sweep these maximum thresholds, as '50,70,100' or 'start:stop:step'")
+    parser.add_argument("--format", dest="output_format", choices=ResultsExportService.SUPPORTED_FORMATS,
+                        default="json",
+                        help="Output format (default: json); video and sequence counts are always CSV")
+    parser.add_argument("-o", "--output", help="Output file (default: standard output)")
+    parser.add_argument("--objects", metavar="FILE",
+                        help="Also write one row per object (image id, object index, area, perimeter, bounding "
+                             "box, centroid) to this .csv, .npz or .parquet file; image ids follow the order of "
+                             "the output. Implies --count-engine components and bypasses the result cache")
+    parser.add_argument("--validate", action="store_true",
+                        help="Read every image's header first, report unreadable or truncated files on "
+                             "standard error and leave them out of the batch")
+    parser.add_argument("--largest-first", action="store_true",
+                        help="Process images in order of decreasing size, as read from their headers, to "
+                             "balance the workers; the output follows that order")
+    parser.add_argument("--progress", action="store_true", help="Report progress on standard error")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Process every image without reading or writing the result cache")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Invalidate all cached results before running")
+    parser.add_argument("--cache-stats", action="store_true",
+                        help="Report result cache hits and misses on standard error")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Report a per-stage timing and byte summary on standard error")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the first image with cProfile and tracemalloc instead of running a batch")
+
+    args = parser.parse_args(argv)
+    if args.min_threshold < 0 or args.max_threshold < 0:
+        parser.error("Threshold values cannot be negative.")
+    if args.min_threshold >= args.max_threshold:
+        parser.error("Min value must be lower than max value.")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.tile_size is not None and args.tile_size < 16:
+        parser.error("--tile-size must be at least 16.")
+    if args.max_dimension is not None and args.max_dimension < 1:
+        parser.error("--max-dimension must be at least 1.")
+    if args.scale is not None and not 0 < args.scale <= 1:
+        parser.error("--scale must be greater than 0 and at most 1.")
+    if args.auto_threshold is not None and args.sweep_min is not None:
+        parser.error("--auto-threshold cannot be combined with a sweep.")
+    if args.target_fps is not None and args.target_fps <= 0:
+        parser.error("--target-fps must be positive.")
+    if args.change_threshold is not None and not args.incremental:
+        parser.error("--change-threshold requires --incremental.")
+    if args.change_threshold is not None and not 0 <= args.change_threshold <= 255:
+        parser.error("--change-threshold must be between 0 and 255.")
+    if args.objects:
+        if ObjectExportService.format_for_path(args.objects) not in ObjectExportService.SUPPORTED_FORMATS:
+            parser.error("--objects must name a .csv, .npz or .parquet file.")
+        if args.tile_size or args.sweep_min is not None or args.incremental:
+            parser.error("--objects cannot be combined with --tile-size, a sweep or --incremental.")
+        args.count_engine = 'components'
+    area_filtered = args.min_area is not None or args.max_area is not None
+    if area_filtered and args.count_engine != 'components':
+        parser.error("--min-area and --max-area require --count-engine components.")
+    if (args.min_area is not None and args.min_area < 0) or (args.max_area is not None and args.max_area < 0):
+        parser.error("Area limits cannot be negative.")
+    if args.min_area is not None and args.max_area is not None and args.min_area > args.max_area:
+        parser.error("--min-area cannot exceed --max-area.")
+    if area_filtered and (args.tile_size or args.sweep_min is not None):
+        parser.error("--min-area and --max-area cannot be combined with --tile-size or a sweep.")
+    if args.incremental and (args.auto_threshold or args.max_dimension or args.scale or area_filtered):
+        parser.error("--incremental cannot be combined with --auto-threshold, --max-dimension, --scale "
+                     "or area filters.")
+    if args.incremental and (args.edge_engine != DEFAULT_EDGE_ENGINE or args.count_engine != DEFAULT_COUNT_ENGINE):
+        parser.error("--incremental runs its own Canny and contour stages and cannot be combined with "
+                     "--edge-engine or --count-engine.")
+    if (args.sweep_min is None) != (args.sweep_max is None):
+        parser.error("--sweep-min and --sweep-max must be given together.")
+    if args.sweep_min is not None:
+        args.threshold_pairs = ThresholdSweepService.threshold_grid(args.sweep_min, args.sweep_max)
+        if not args.threshold_pairs:
+            parser.error("The sweep has no pair with min below max.")
+    return args
+
+def iter_image_paths(source: str, recursive: bool = False, include=None, exclude=None) -> Iterator[str]:
+    """Stream the supported image paths of a folder or glob pattern as they are listed.
+    
+    Paths come in directory order, so the first images can be dispatched before
+    a large folder has been listed in full.
+    """
+    if os.path.isdir(source):
+        for file_name in FileManagementService.iter_image_files(source, recursive, include, exclude):
+            yield os.path.join(source, file_name)
+        return
+    for path in glob.iglob(source):
+        if os.path.isfile(path) and path.lower().endswith(FileManagementService.SUPPORTED_FORMATS):
+            yield path
+
+def probe_images(file_paths: Iterable[str], args) -> list:
+    """Read the image headers to drop invalid files and order the rest by size, as requested."""
+    headers = ImageProbeService.probe_files(file_paths)
+    probed = len(headers)
+    if args.validate:
+        for header in headers:
+            if not header.valid:
+                print(f"{header.path}: {header.error}", file=sys.stderr)
+            elif header.warning:
+                print(f"{header.path}: warning: {header.warning}", file=sys.stderr)
+        headers = [header for header in headers if header.valid]
+        workers = args.workers or os.cpu_count() or 1
+        peak_bytes = ImageProbeService.peak_decoded_bytes(headers, workers)
+        print(
+            f"{len(headers)} of {probed} images valid, up to {peak_bytes / 2**20:.1f} MiB "
+            f"of decoded images in memory at once with {workers} worker{'s' if workers != 1 else ''}",
+            file=sys.stderr
+        )
+    if args.largest_first:
+        headers = ImageProbeService.largest_first(headers)
+    return [header.path for header in headers]
+
+def profile_image(file_path: str, args) -> int:
+    """Profile the pipeline on a single image and report on standard error."""
+    metrics = MetricsService()
+    processor = ImageProcessingService(
+        metrics_callback=metrics.record, edge_engine=args.edge_engine, count_engine=args.count_engine
+    )
+    pipeline_options = {
+        'max_dimension': args.max_dimension, 'scale': args.scale, 'auto_threshold': args.auto_threshold
+    }
+    if args.tile_size:
+        report = MetricsService.profile(
+            processor.process_image_tiled, file_path, args.min_threshold, args.max_threshold,
+            tile_size=args.tile_size, **pipeline_options
+        )
+    else:
+        report = MetricsService.profile(
+            processor.process_image, file_path, args.min_threshold, args.max_threshold,
+            min_area=args.min_area, max_area=args.max_area, **pipeline_options
+        )
+    print(f"{file_path}: {processor.current_objects} objects in {report.seconds:.3f} s", file=sys.stderr)
+    print(metrics.format_summary(), file=sys.stderr)
+    print(report.stats, file=sys.stderr)
+    print(f"Peak traced memory: {report.traced_peak_bytes / 2**20:.1f} MiB", file=sys.stderr)
+    for allocation in report.top_allocations:
+        print(allocation, file=sys.stderr)
+    return 0
+
+def sweep_thresholds(file_paths: Iterable[str], args) -> int:
+    """Count objects for every threshold pair of the sweep grid and write the count matrix."""
+    batch_kwargs = {'workers': args.workers, 'max_dimension': args.max_dimension, 'scale': args.scale}
+    if args.chunk_size is not None:
+        batch_kwargs['chunk_size'] = args.chunk_size
+    batch_processor = BatchProcessingService(**batch_kwargs)
+    try:
+        sweep = batch_processor.sweep_files(file_paths, args.threshold_pairs)
+    finally:
+        batch_processor.shutdown()
+
+    metadata = {}
+    if args.max_dimension is not None or args.scale is not None:
+        metadata.update(max_dimension=args.max_dimension, scale=args.scale)
+    if args.output:
+        with open(args.output, 'w', newline='') as stream:
+            ResultsExportService.write_sweep(sweep, stream, args.output_format, **metadata)
+    else:
+        ResultsExportService.write_sweep(sweep, sys.stdout, args.output_format, **metadata)
+    return 0
+
+def count_frames(args) -> int:
+    """Count objects in every frame of a video or image sequence and stream the counts as CSV."""
+    processor = ImageProcessingService(
+        reuse_buffers=True, edge_engine=args.edge_engine, count_engine=args.count_engine
+    )
+    incremental = None
+    if args.incremental:
+        incremental = IncrementalProcessingService(
+            change_threshold=INCREMENTAL_CHANGE_THRESHOLD if args.change_threshold is None else args.change_threshold
+        )
+    stream_processor = StreamProcessingService(processor, target_fps=args.target_fps, incremental=incremental)
+    pipeline_options = {
+        'max_dimension': args.max_dimension, 'scale': args.scale, 'auto_threshold': args.auto_threshold,
+        'min_area': args.min_area, 'max_area': args.max_area
+    }
+    counted = skipped = failed = 0
+
+    def report_progress(results):
+        nonlocal counted, skipped, failed
+        for result in results:
+            if result.skipped:
+                skipped += 1
+            elif result.error:
+                failed += 1
+            else:
+                counted += 1
+            if args.progress:
+                status = result.error or ("skipped" if result.skipped else f"{result.object_count} objects")
+                print(f"[frame {result.index}] {status}", file=sys.stderr)
+            yield result
+
+    try:
+        results = report_progress(
+            stream_processor.iter_counts(args.source, args.min_threshold, args.max_threshold, **pipeline_options)
+        )
+        if args.output:
+            with open(args.output, 'w', newline='') as stream:
+                ResultsExportService.write_frame_counts(results, stream, flush=True)
+        else:
+            ResultsExportService.write_frame_counts(results, sys.stdout, flush=True)
+    except (IOError, ValueError) as e:
+        print(f"Could not read {args.source}: {e}", file=sys.stderr)
+        return 2
+    print(f"{counted} frames counted, {skipped} skipped, {failed} failed", file=sys.stderr)
+    return 0
+
+def main(argv=None) -> int:
+    """Command-line entry point."""
+    args = parse_arguments(argv)
+    if FrameSourceService.is_stream_source(args.source):
+        if args.objects or args.validate or args.largest_first:
+            print("--objects, --validate and --largest-first are not supported for video and image sequences",
+                  file=sys.stderr)
+            return 2
+        return count_frames(args)
+    file_paths = iter_image_paths(args.source, args.recursive, args.include, args.exclude)
+    first_path = next(file_paths, None)
+    if first_path is None:
+        print(f"No supported images found in: {args.source}", file=sys.stderr)
+        return 2
+    file_paths = chain([first_path], file_paths)
+    if args.validate or args.largest_first:
+        file_paths = probe_images(file_paths, args)
+        if not file_paths:
+            print(f"No valid images found in: {args.source}", file=sys.stderr)
+            return 2
+
+    if args.profile:
+        return profile_image(next(iter(file_paths)), args)
+    if args.sweep_min is not None:
+        return sweep_thresholds(file_paths, args)
+
+    object_exporter = None
+    if args.objects:
+        try:
+            object_exporter = ObjectExportService(args.objects)
+        except (ImportError, ValueError, OSError) as e:
+            print(f"Could not write {args.objects}: {e}", file=sys.stderr)
+            return 2
+
+    # Cached results only hold counts, so per-object rows need every image processed
+    result_cache = None if args.no_cache or object_exporter else ResultCacheService()
+    if result_cache and args.clear_cache:
+        removed = result_cache.invalidate()
+        print(f"Cleared {removed} cached results", file=sys.stderr)
+
+    metrics = MetricsService() if args.metrics else None
+    batch_kwargs = {
+        'workers': args.workers,
+        'result_cache': result_cache,
+        'tile_size': args.tile_size,
+        'collect_metrics': metrics is not None,
+        'max_dimension': args.max_dimension,
+        'scale': args.scale,
+        'auto_threshold': args.auto_threshold,
+        'edge_engine': args.edge_engine,
+        'count_engine': args.count_engine,
+        'min_area': args.min_area,
+        'max_area': args.max_area,
+        'measure_perimeters': object_exporter is not None,
+    }
+    if args.chunk_size is not None:
+        batch_kwargs['chunk_size'] = args.chunk_size
+    batch_processor = BatchProcessingService(**batch_kwargs)
+
+    def report_progress(results):
+        for completed, result in enumerate(results, start=1):
+            if metrics:
+                for event in result.stage_events:
+                    metrics.record(event)
+            if args.progress:
+                status = result.error or f"{result.object_count} objects"
+                print(f"[{completed}] {result.path}: {status}", file=sys.stderr)
+            if object_exporter and result.object_stats is not None:
+                object_exporter.write(ObjectTable.from_stats(completed - 1, result.object_stats, result.scale))
+                # Results may be collected for the output, the rows are on their way to disk
+                result.object_stats = None
+            yield result
+
+    include_thresholds = args.auto_threshold is not None
+    if include_thresholds:
+        metadata = {'auto_threshold': args.auto_threshold}
+    else:
+        metadata = {'min_threshold': args.min_threshold, 'max_threshold': args.max_threshold}
+    include_scale = args.max_dimension is not None or args.scale is not None
+    if include_scale:
+        metadata.update(max_dimension=args.max_dimension, scale=args.scale)
+    if args.min_area is not None or args.max_area is not None:
+        metadata.update(min_area=args.min_area, max_area=args.max_area)
+    try:
+        results = report_progress(
+            batch_processor.iter_results(file_paths, args.min_threshold, args.max_threshold)
+        )
+        if args.output:
+            with open(args.output, 'w', newline='') as stream:
+                ResultsExportService.write_results(
+                    results, stream, args.output_format, include_scale, include_thresholds, **metadata
+                )
+        else:
+            ResultsExportService.write_results(
+                results, sys.stdout, args.output_format, include_scale, include_thresholds, **metadata
+            )
+    finally:
+        batch_processor.shutdown()
+        if object_exporter:
+            object_exporter.close()
+            print(f"Wrote {object_exporter.rows_written} object rows to {args.objects}", file=sys.stderr)
+        if metrics:
+            print(metrics.format_summary(), file=sys.stderr)
+        if result_cache:
+            if args.cache_stats:
+                stats = result_cache.stats()
+                print(
+                    f"Result cache: {stats['hits']} hits, {stats['misses']} misses "
+                    f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries",
+                    file=sys.stderr
+                )
+            result_cache.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,5 @@ ASSETS_DIRECTORY = os.path.join(CURRENT_DIRECTORY, 'assets')
 IMAGES_DIRECTORY = os.path.join(CURRENT_DIRECTORY, 'images')
 TEMP_DIRECTORY = os.path.join(CURRENT_DIRECTORY, 'temp')
 
-# Temporary Files
-TEMP_IMAGE_FILE = os.path.join(TEMP_DIRECTORY, 'tmp.png')
-TRANSFORM_IMAGE_FILE = os.path.join(TEMP_DIRECTORY, 'transformation.png')
\ No newline at end of file
+# Persistent Caches
+RESULT_CACHE_FILE = os.path.join(TEMP_DIRECTORY, 'results.sqlite3')
\ No newline at end of file
@@ -6,8 +6,7 @@ from .base_config import (
     ASSETS_DIRECTORY,
     IMAGES_DIRECTORY,
     TEMP_DIRECTORY,
-    TEMP_IMAGE_FILE,
-    TRANSFORM_IMAGE_FILE
+    RESULT_CACHE_FILE
 )
 from ..ui.ui_config import (
     UI_THEME,
@@ -22,8 +21,7 @@ __all__ = [
     'ASSETS_DIRECTORY',
     'IMAGES_DIRECTORY',
     'TEMP_DIRECTORY',
-    'TEMP_IMAGE_FILE',
-    'TRANSFORM_IMAGE_FILE',
+    'RESULT_CACHE_FILE',
     'UI_THEME',
     'UI_FONT',
     'WINDOW_SIZE',
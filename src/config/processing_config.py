@@ -5,4 +5,50 @@ GAUSSIAN_KERNEL_SIZE = (5, 5)
 GAUSSIAN_SIGMA = 0
 DILATION_KERNEL_SIZE = (3, 3)
 DEFAULT_MIN_THRESHOLD = 0
-DEFAULT_MAX_THRESHOLD = 70
\ No newline at end of file
+DEFAULT_MAX_THRESHOLD = 70
+
+# Edge Detection Engines
+EDGE_ENGINES = ('opencv', 'opencv_sobel', 'numpy')
+DEFAULT_EDGE_ENGINE = 'opencv'
+STAGE_CACHE_EDGE_ENGINE = 'opencv_sobel'  # Used with a stage cache, which keeps its Sobel derivatives
+
+# Object Counting Engines
+COUNT_ENGINES = ('contours', 'components')
+DEFAULT_COUNT_ENGINE = 'contours'
+
+# Object Export Parameters
+OBJECT_EXPORT_BATCH_ROWS = 65536  # Object rows buffered before they are written out together
+
+# Automatic Threshold Parameters
+AUTO_THRESHOLD_MODES = ('otsu', 'median')
+OTSU_LOW_RATIO = 0.5  # Min threshold as a fraction of the Otsu threshold used as max
+MEDIAN_THRESHOLD_SIGMA = 0.33  # Thresholds at (1 - sigma) and (1 + sigma) times the median intensity
+
+# Batch Processing Parameters
+BATCH_WORKERS = None  # None uses one worker per CPU core
+BATCH_CHUNK_SIZE = 4  # Images handed to a worker per dispatch
+
+# Stage Cache Parameters
+STAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Memory budget for cached intermediate stages
+
+# Live Preview Parameters
+PREVIEW_DEBOUNCE_SECONDS = 0.15  # Quiet period after the last slider event before recomputing
+
+# Background Job Parameters
+JOB_WORKERS = 2  # Threads running UI jobs, so an image can be viewed while a folder loads
+JOB_QUEUE_SIZE = 8  # Jobs waiting for a worker before submitting blocks
+
+# Frame Streaming Parameters
+FRAME_QUEUE_SIZE = 8  # Decoded frames buffered ahead of processing for video and sequences
+
+# Tiled Processing Parameters
+TILE_SIZE = 2048  # Edge length of the tiles processed at once in tiled mode
+
+# Incremental Processing Parameters
+INCREMENTAL_TILE_SIZE = 64  # Granularity at which changed parts of consecutive frames are reprocessed
+INCREMENTAL_CHANGE_THRESHOLD = 0  # Intensity change ignored between frames; 0 keeps counts exact
+INCREMENTAL_FULL_FRACTION = 0.25  # Fraction of changed tiles above which a frame is processed in full
+
+# Header Probing Parameters
+PROBE_HEADER_BYTES = 512  # Leading bytes read to identify a file and its dimensions
+PROBE_TRAILER_BYTES = 1024  # Trailing bytes searched for the end marker of JPEG and GIF files
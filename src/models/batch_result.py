@@ -0,0 +1,23 @@
+"""Domain model for representing the outcome of processing one image in a batch."""
+
+from dataclasses import dataclass, field
+from typing import Optional
+from .object_stats import ObjectStats
+
+@dataclass
+class BatchResult:
+    """Represents the object count produced for a single image of a batch run."""
+
+    path: str  # Path to the processed image file
+    object_count: int = 0  # Number of objects detected
+    error: Optional[str] = None  # Error message if the image could not be processed
+    scale: Optional[float] = None  # Working resolution used, None if the image failed
+    min_threshold: Optional[int] = None  # Canny thresholds applied, None if the image failed
+    max_threshold: Optional[int] = None
+    stage_events: list = field(default_factory=list)  # StageEvents, when metrics were collected
+    object_stats: Optional[ObjectStats] = None  # Per-object measurements, from the components count engine
+
+    @property
+    def succeeded(self) -> bool:
+        """Check if the image was processed without errors."""
+        return self.error is None
@@ -0,0 +1,35 @@
+"""Domain models for representing frames of a video or image sequence and their counts."""
+
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+@dataclass
+class Frame:
+    """Represents one frame read from a frame source."""
+
+    index: int  # Position of the frame in the source, starting at 0
+    data: Optional[np.ndarray] = None  # BGR image data, None if the frame was skipped or failed
+    timestamp: Optional[float] = None  # Seconds from the start of a video, None for image sequences
+    path: Optional[str] = None  # Image file of a sequence frame
+    error: Optional[str] = None  # Error message if the frame could not be decoded
+
+    @property
+    def skipped(self) -> bool:
+        """Check if the frame was dropped to keep up with the target rate."""
+        return self.data is None and self.error is None
+
+@dataclass
+class FrameResult:
+    """Represents the object count produced for one frame of a stream."""
+
+    index: int  # Position of the frame in the source
+    timestamp: Optional[float] = None  # Seconds from the start of a video, None for image sequences
+    object_count: int = 0  # Number of objects detected
+    skipped: bool = False  # Whether the frame was dropped to keep up with the target rate
+    error: Optional[str] = None  # Error message if the frame could not be decoded or processed
+
+    @property
+    def succeeded(self) -> bool:
+        """Check if the frame was counted."""
+        return self.error is None and not self.skipped
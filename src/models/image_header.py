@@ -0,0 +1,37 @@
+"""Domain model for representing the header of an image file."""
+
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class ImageHeader:
+    """Represents the format and geometry of an image read from its file header.
+
+    Palette images report the channels of their palette entries and the bit
+    depth of their indices, so an 8-bit PCX or GIF reads as 3 channels of 8 bits.
+    """
+
+    path: str  # Path to the image file
+    format: Optional[str] = None  # 'png', 'jpeg', 'gif', 'bmp' or 'pcx' from the file signature
+    width: int = 0  # Image width in pixels
+    height: int = 0  # Image height in pixels
+    channels: int = 0  # Color channels stored in the file, 1 for grayscale
+    bit_depth: int = 0  # Bits per channel sample, or per palette index
+    file_size: int = 0  # Size of the file in bytes
+    error: Optional[str] = None  # Why the file cannot be decoded, None if the header is valid
+    warning: Optional[str] = None  # Doubt about a file that is still kept as valid, e.g. a missing JPEG end marker
+
+    @property
+    def valid(self) -> bool:
+        """Check if the header was read and the file looks complete."""
+        return self.error is None
+
+    @property
+    def pixels(self) -> int:
+        """Get the number of pixels in the image."""
+        return self.width * self.height
+
+    @property
+    def decoded_bytes(self) -> int:
+        """Get the size of the BGR array the image decodes into."""
+        return self.pixels * 3
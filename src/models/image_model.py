@@ -3,6 +3,7 @@
 from dataclasses import dataclass
 from typing import Optional
 import numpy as np
+from .object_stats import ObjectStats
 
 @dataclass
 class ImageModel:
@@ -21,6 +22,9 @@ class ImageModel:
     dilated_edges: Optional[np.ndarray] = None  # Dilated edges
     contours: Optional[list] = None  # Detected contours
     object_count: int = 0  # Number of objects detected
+    object_stats: Optional[ObjectStats] = None  # Per-object measurements, from the components count engine
+    scale: float = 1.0  # Resolution of the processed stages relative to width and height
+    thresholds: Optional[tuple[int, int]] = None  # (min, max) Canny thresholds applied
     
     @property
     def size(self) -> tuple[int, int]:
@@ -20,6 +20,10 @@ class ImageTransformation:
     gaussian_kernel_size: tuple[int, int]
     gaussian_sigma: float
     dilation_kernel_size: tuple[int, int]
+    scale: float = 1.0  # Working resolution relative to the original image
+    threshold_mode: Optional[str] = None  # Automatic threshold mode, None to use the given thresholds
+    min_area: Optional[int] = None  # Smallest object area counted at full resolution, None for no limit
+    max_area: Optional[int] = None  # Largest object area counted at full resolution, None for no limit
     
     # Results at each step
     result: Optional[ImageModel] = None
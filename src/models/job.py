@@ -0,0 +1,24 @@
+"""Domain model for representing a unit of background work."""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+@dataclass
+class Job:
+    """Represents a background job and its cancellation state."""
+
+    job_id: int  # Increasing identifier, unique per job service
+    kind: str  # Jobs of the same kind supersede each other, e.g. 'folder' or 'image'
+    function: Callable  # Work to run, called with the job followed by args and kwargs
+    args: tuple = ()  # Positional arguments passed after the job
+    kwargs: dict = field(default_factory=dict)  # Keyword arguments passed to the function
+    _cancelled: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def cancel(self):
+        """Ask the job to stop at its next cancellation check."""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        """Check whether the job was cancelled or superseded."""
+        return self._cancelled.is_set()
@@ -0,0 +1,30 @@
+"""Domain model for representing per-object measurements of an image."""
+
+from dataclasses import dataclass
+import numpy as np
+
+@dataclass
+class ObjectStats:
+    """Represents the area, perimeter, bounding box and centroid of each detected object.
+    
+    Objects are the outermost connected shapes of the dilated edges with their
+    holes filled, so row ``i`` of every array describes the same object and the
+    number of rows equals the object count. Perimeters need the contours traced
+    as well and are only measured on request (``with_perimeters`` of
+    ``ObjectCountingService.component_stats``); otherwise they are zero.
+    """
+
+    areas: np.ndarray  # (N,) int32 pixel areas including enclosed holes
+    perimeters: np.ndarray  # (N,) float32 lengths of the external contours, zero unless measured
+    bboxes: np.ndarray  # (N, 4) int32 bounding boxes as x, y, width, height
+    centroids: np.ndarray  # (N, 2) float64 centroids as x, y
+
+    @property
+    def count(self) -> int:
+        """Get the number of objects."""
+        return len(self.areas)
+
+    @property
+    def nbytes(self) -> int:
+        """Get the memory held by the arrays in bytes."""
+        return self.areas.nbytes + self.perimeters.nbytes + self.bboxes.nbytes + self.centroids.nbytes
@@ -0,0 +1,90 @@
+"""Domain model for representing per-object measurements as a columnar table."""
+
+from dataclasses import dataclass, fields
+from typing import Sequence
+import numpy as np
+from .object_stats import ObjectStats
+
+@dataclass
+class ObjectTable:
+    """Represents one row per detected object, stored as one array per column.
+    
+    Measurements are in pixels of the full-resolution image, so tables of
+    images counted at different working resolutions can be combined.
+    """
+
+    image_id: np.ndarray  # (N,) int32 position of the object's image in the run's results
+    object_index: np.ndarray  # (N,) int32 position of the object within its image
+    area: np.ndarray  # (N,) int32 pixel area including enclosed holes
+    perimeter: np.ndarray  # (N,) float32 length of the external contour
+    bbox_x: np.ndarray  # (N,) int32 left column of the bounding box
+    bbox_y: np.ndarray  # (N,) int32 top row of the bounding box
+    bbox_width: np.ndarray  # (N,) int32
+    bbox_height: np.ndarray  # (N,) int32
+    centroid_x: np.ndarray  # (N,) float32
+    centroid_y: np.ndarray  # (N,) float32
+
+    @classmethod
+    def columns(cls) -> tuple:
+        """Get the column names in table order."""
+        return tuple(column.name for column in fields(cls))
+
+    @classmethod
+    def from_stats(cls, image_id: int, stats: ObjectStats, scale: float = 1.0) -> 'ObjectTable':
+        """Build the rows of one image from its object stats.
+        
+        Args:
+            image_id: Identifier stored in the ``image_id`` column
+            stats: Measurements of the image's objects
+            scale: Working resolution the stats were measured at, relative to the full image
+            
+        Returns:
+            Table with one row per object
+        """
+        count = stats.count
+        bboxes = stats.bboxes if scale == 1 else np.rint(stats.bboxes / scale)
+        return cls(
+            image_id=np.full(count, image_id, dtype=np.int32),
+            object_index=np.arange(count, dtype=np.int32),
+            area=(stats.areas if scale == 1 else np.rint(stats.areas / scale ** 2)).astype(np.int32),
+            perimeter=(stats.perimeters / scale).astype(np.float32),
+            bbox_x=bboxes[:, 0].astype(np.int32),
+            bbox_y=bboxes[:, 1].astype(np.int32),
+            bbox_width=bboxes[:, 2].astype(np.int32),
+            bbox_height=bboxes[:, 3].astype(np.int32),
+            centroid_x=(stats.centroids[:, 0] / scale).astype(np.float32),
+            centroid_y=(stats.centroids[:, 1] / scale).astype(np.float32)
+        )
+
+    @classmethod
+    def empty(cls) -> 'ObjectTable':
+        """Get a table without rows, carrying the column types."""
+        return cls.from_stats(0, ObjectStats(
+            areas=np.empty(0, dtype=np.int32),
+            perimeters=np.empty(0, dtype=np.float32),
+            bboxes=np.empty((0, 4), dtype=np.int32),
+            centroids=np.empty((0, 2), dtype=np.float64)
+        ))
+
+    @classmethod
+    def concatenate(cls, tables: Sequence['ObjectTable']) -> 'ObjectTable':
+        """Join tables row-wise, keeping the column types.
+        
+        Args:
+            tables: Tables to join, at least one
+            
+        Returns:
+            Table holding the rows of every table in order
+        """
+        return cls(**{
+            column: np.concatenate([getattr(table, column) for table in tables]) for column in cls.columns()
+        })
+
+    def __len__(self) -> int:
+        """Get the number of rows."""
+        return len(self.image_id)
+
+    @property
+    def nbytes(self) -> int:
+        """Get the memory held by the columns in bytes."""
+        return sum(getattr(self, column).nbytes for column in self.columns())
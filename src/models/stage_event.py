@@ -0,0 +1,31 @@
+"""Domain models for representing pipeline instrumentation data."""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+@dataclass
+class StageEvent:
+    """Represents the measurements of one pipeline stage applied to one image."""
+
+    stage: str  # Name of the stage, e.g. 'decode' or 'edges'
+    path: str  # Path to the image file, empty for in-memory images
+    seconds: float  # Wall-clock duration of the stage
+    width: int = 0  # Image width in pixels
+    height: int = 0  # Image height in pixels
+    input_bytes: int = 0  # Size of the data the stage read
+    output_bytes: int = 0  # Size of the data the stage produced
+
+    @property
+    def megapixels(self) -> float:
+        """Get the image size in megapixels."""
+        return self.width * self.height / 1e6
+
+@dataclass
+class ProfileReport:
+    """Represents a cProfile and tracemalloc capture of a single call."""
+
+    result: Any  # Return value of the profiled call
+    seconds: float  # Wall-clock duration of the call
+    stats: str  # Formatted cProfile statistics
+    traced_peak_bytes: int = 0  # Peak memory traced by tracemalloc during the call
+    top_allocations: list = field(default_factory=list)  # Largest allocation sites as text lines
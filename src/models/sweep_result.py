@@ -0,0 +1,37 @@
+"""Domain model for representing the outcome of a threshold sweep over many images."""
+
+from dataclasses import dataclass, field
+from typing import Optional
+import numpy as np
+
+@dataclass
+class SweepResult:
+    """Represents object counts for every threshold pair of a sweep and every image."""
+
+    threshold_pairs: list  # (min, max) threshold pairs, one per column of counts
+    paths: list  # Image paths, one per row of counts
+    counts: np.ndarray  # Object counts with shape (images, pairs), -1 for failed images
+    errors: dict = field(default_factory=dict)  # Error messages by path for failed images
+
+    @property
+    def totals(self) -> np.ndarray:
+        """Get the folder object count for each threshold pair, skipping failed images."""
+        return np.where(self.counts < 0, 0, self.counts).sum(axis=0)
+
+    def grid(self, counts: Optional[np.ndarray] = None) -> tuple:
+        """Arrange counts of the threshold pairs as a min x max matrix.
+
+        Args:
+            counts: Counts aligned with ``threshold_pairs``, the folder totals by default
+
+        Returns:
+            (min values, max values, matrix) where entries for pairs that were
+            not swept are -1
+        """
+        counts = self.totals if counts is None else counts
+        min_values = sorted({pair[0] for pair in self.threshold_pairs})
+        max_values = sorted({pair[1] for pair in self.threshold_pairs})
+        matrix = np.full((len(min_values), len(max_values)), -1, dtype=np.int64)
+        for (min_threshold, max_threshold), count in zip(self.threshold_pairs, counts):
+            matrix[min_values.index(min_threshold), max_values.index(max_threshold)] = count
+        return min_values, max_values, matrix
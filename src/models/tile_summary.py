@@ -0,0 +1,44 @@
+"""Domain models for the per-tile summaries used by tiled processing."""
+
+from dataclasses import dataclass
+import numpy as np
+
+@dataclass
+class EdgeCandidateTile:
+    """Represents the Canny edge candidates of one tile before hysteresis.
+    
+    Candidates are pixels that survive non-maximum suppression with a gradient
+    above the low threshold; they are labelled as 8-connected components so that
+    hysteresis can be resolved across tile borders.
+    """
+
+    y: int  # Top row of the tile in the full image
+    x: int  # Left column of the tile in the full image
+    height: int
+    width: int
+    label_count: int  # Number of candidate components, excluding label 0
+    strong: np.ndarray  # Per label, whether the component contains a pixel above the high threshold
+    top: np.ndarray  # Labels of the first rows, as deep as the dilation radius
+    bottom: np.ndarray  # Labels of the last rows
+    left: np.ndarray  # Labels of the first columns
+    right: np.ndarray  # Labels of the last columns
+
+@dataclass
+class TileSummary:
+    """Represents what the object count needs to know about one tile of a binary edge mask.
+    
+    Border strips hold local component labels: positive values are 8-connected
+    foreground components, negative values are 4-connected background components.
+    """
+
+    y: int  # Top row of the tile in the full image
+    x: int  # Left column of the tile in the full image
+    height: int
+    width: int
+    foreground_count: int  # Number of foreground components in the tile
+    background_count: int  # Number of background components in the tile
+    top: np.ndarray  # Labels along the first row
+    bottom: np.ndarray  # Labels along the last row
+    left: np.ndarray  # Labels along the first column
+    right: np.ndarray  # Labels along the last column
+    adjacency: np.ndarray  # (N, 2) pairs of touching (foreground, background) labels
@@ -0,0 +1,324 @@
+"""Service for running the edge detection pipeline over many images in parallel."""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+from ..config.processing_config import BATCH_WORKERS, BATCH_CHUNK_SIZE, DEFAULT_EDGE_ENGINE, DEFAULT_COUNT_ENGINE
+from ..models.batch_result import BatchResult
+from ..models.sweep_result import SweepResult
+from .image_conversion_service import ImageConversionService
+from .image_processing_service import ImageProcessingService
+from .result_cache_service import ResultCacheService
+
+# Pipeline instance owned by each worker process
+_worker_processor = None
+
+def _init_worker():
+    """Create the per-process image processing pipeline."""
+    global _worker_processor
+    _worker_processor = ImageProcessingService(reuse_buffers=True)
+
+def _process_file(task: tuple) -> BatchResult:
+    """Decode and process a single image inside a worker.
+    
+    Args:
+        task: Tuple of (file path, min threshold, max threshold, processing options)
+        
+    Returns:
+        The batch result for the image
+    """
+    file_path, min_threshold, max_threshold, options = task
+    if _worker_processor is None:
+        _init_worker()
+    stage_events = []
+    metrics_callback = stage_events.append if options.get('collect_metrics') else None
+    _worker_processor.metrics_callback = metrics_callback
+    _worker_processor.edge_engine = options.get('edge_engine') or DEFAULT_EDGE_ENGINE
+    _worker_processor.count_engine = options.get('count_engine') or DEFAULT_COUNT_ENGINE
+    _worker_processor.measure_perimeters = bool(options.get('measure_perimeters'))
+    try:
+        pipeline_options = {
+            'max_dimension': options.get('max_dimension'),
+            'scale': options.get('scale'),
+            'auto_threshold': options.get('auto_threshold'),
+        }
+        if options.get('tile_size'):
+            _worker_processor.process_image_tiled(
+                file_path, min_threshold, max_threshold, tile_size=options['tile_size'], **pipeline_options
+            )
+        else:
+            image_data = ImageConversionService.decode_image(file_path, metrics_callback=metrics_callback)
+            _worker_processor.process_image_count_only(
+                image_data, min_threshold, max_threshold, path=file_path,
+                min_area=options.get('min_area'), max_area=options.get('max_area'), **pipeline_options
+            )
+        result = _worker_processor.result
+        min_applied, max_applied = result.thresholds or (None, None)
+        return BatchResult(
+            path=file_path,
+            object_count=_worker_processor.current_objects,
+            scale=result.scale,
+            min_threshold=min_applied,
+            max_threshold=max_applied,
+            stage_events=stage_events,
+            object_stats=result.object_stats
+        )
+    except Exception as e:
+        return BatchResult(path=file_path, error=f"{e.__class__.__name__}: {e}", stage_events=stage_events)
+
+def _process_chunk(tasks: List[tuple]) -> List[BatchResult]:
+    """Process a chunk of images inside a worker."""
+    return [_process_file(task) for task in tasks]
+
+def _sweep_file(task: tuple) -> tuple:
+    """Sweep the thresholds of a single image inside a worker.
+    
+    Args:
+        task: Tuple of (file path, threshold pairs, processing options)
+        
+    Returns:
+        Tuple of (file path, counts or None, error message or None)
+    """
+    file_path, threshold_pairs, options = task
+    if _worker_processor is None:
+        _init_worker()
+    _worker_processor.metrics_callback = None
+    try:
+        image_data = ImageConversionService.decode_image(file_path)
+        counts = _worker_processor.sweep_thresholds(
+            image_data, threshold_pairs, path=file_path,
+            max_dimension=options.get('max_dimension'), scale=options.get('scale')
+        )
+        return file_path, counts, None
+    except Exception as e:
+        return file_path, None, f"{e.__class__.__name__}: {e}"
+
+def _sweep_chunk(tasks: List[tuple]) -> List[tuple]:
+    """Sweep the thresholds of a chunk of images inside a worker."""
+    return [_sweep_file(task) for task in tasks]
+
+class BatchProcessingService:
+    """Service for counting objects across many images using a process pool."""
+
+    def __init__(self, workers: Optional[int] = BATCH_WORKERS, chunk_size: int = BATCH_CHUNK_SIZE,
+                 result_cache: Optional[ResultCacheService] = None, tile_size: Optional[int] = None,
+                 collect_metrics: bool = False, max_dimension: Optional[int] = None,
+                 scale: Optional[float] = None, auto_threshold: Optional[str] = None,
+                 edge_engine: str = DEFAULT_EDGE_ENGINE, count_engine: str = DEFAULT_COUNT_ENGINE,
+                 min_area: Optional[int] = None, max_area: Optional[int] = None,
+                 measure_perimeters: bool = False):
+        """Initialize the batch processing service.
+        
+        Args:
+            workers: Number of worker processes, None for one per CPU core
+            chunk_size: Number of images handed to a worker per dispatch
+            result_cache: Optional persistent cache answering unchanged files without processing
+            tile_size: Process images in tiles of this size to bound memory, None for whole images
+            collect_metrics: Attach the stage events of each processed image to its result;
+                results answered from the result cache carry none
+            max_dimension: Count at a working resolution whose longest side is at most this many pixels
+            scale: Count at this fraction of the full resolution
+            auto_threshold: Choose each image's thresholds from its histogram with one of
+                ``AUTO_THRESHOLD_MODES``; the thresholds passed to a batch are then ignored
+                and each result reports the ones applied
+            edge_engine: Canny engine used for whole images, see ``EdgeDetectionService``;
+                tiled processing and sweeps always use OpenCV
+            count_engine: Counting engine used for whole images, see ``ObjectCountingService``;
+                tiled processing and sweeps always count contours. With ``'components'``
+                each processed result carries its ``object_stats``; results answered
+                from the result cache carry none
+            min_area: Only count objects of at least this many pixels; requires the
+                components count engine and whole-image processing
+            max_area: Only count objects of at most this many pixels, likewise
+            measure_perimeters: Fill in the perimeters of each result's ``object_stats``,
+                which costs a contour trace per image on top of the components engine
+                
+        Raises:
+            ValueError: If area filters are combined with tiled processing
+        """
+        if tile_size and (min_area is not None or max_area is not None):
+            raise ValueError("Area filters require whole-image processing and cannot be combined with tile_size")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.result_cache = result_cache
+        self.options = {
+            'tile_size': tile_size,
+            'collect_metrics': collect_metrics,
+            'max_dimension': max_dimension,
+            'scale': scale,
+            'auto_threshold': auto_threshold,
+            'edge_engine': edge_engine,
+            'count_engine': count_engine,
+            'min_area': min_area,
+            'max_area': max_area,
+            'measure_perimeters': measure_perimeters,
+        }
+        self._executor = None
+
+    def process_files(self, file_paths: Iterable[str], min_threshold: int, max_threshold: int) -> List[BatchResult]:
+        """Process a set of images and collect their results.
+        
+        Args:
+            file_paths: Paths of the images to process
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+            
+        Returns:
+            One result per image, in the same order as ``file_paths``
+        """
+        return list(self.iter_results(file_paths, min_threshold, max_threshold))
+
+    def iter_results(self, file_paths: Iterable[str], min_threshold: int, max_threshold: int) -> Iterator[BatchResult]:
+        """Process a set of images, yielding results as they become available.
+        
+        Args:
+            file_paths: Paths of the images to process
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+            
+        Yields:
+            One result per image, in the same order as ``file_paths``; paths may
+            come from a generator and are only consumed as workers free up
+        """
+        # Snapshot the options so that changing them between batches cannot affect a running one
+        options = dict(self.options)
+        tasks = ((file_path, min_threshold, max_threshold, options) for file_path in file_paths)
+        parameters = ImageProcessingService.pipeline_parameters(
+            min_threshold, max_threshold, options['max_dimension'], options['scale'], options['auto_threshold'],
+            options['min_area'], options['max_area']
+        )
+        chunks = self._iter_chunks(tasks, parameters)
+        if self.workers == 1:
+            for chunk, identities, cached in chunks:
+                yield from cached if chunk is None else self._store(_process_chunk(chunk), identities, parameters)
+            return
+
+        # Keep a bounded number of chunks in flight so that lazily produced paths
+        # are consumed as the workers catch up instead of all at once
+        executor = self._get_executor()
+        in_flight = deque()
+        max_in_flight = self.workers * 2
+        try:
+            while True:
+                while len(in_flight) < max_in_flight:
+                    chunk, identities, cached = next(chunks, (None, None, None))
+                    if chunk is not None:
+                        in_flight.append((executor.submit(_process_chunk, chunk), identities))
+                    elif cached is not None:
+                        in_flight.append(cached)
+                    else:
+                        break
+                if not in_flight:
+                    return
+                pending = in_flight.popleft()
+                if isinstance(pending, list):
+                    yield from pending
+                else:
+                    future, identities = pending
+                    yield from self._store(future.result(), identities, parameters)
+        finally:
+            # Drop queued work if the caller stops consuming early
+            for pending in in_flight:
+                if not isinstance(pending, list):
+                    pending[0].cancel()
+
+    def _iter_chunks(self, tasks: Iterator[tuple], parameters: dict) -> Iterator[tuple]:
+        """Group tasks into worker chunks, answering cached files directly.
+        
+        Yields:
+            (chunk, identities, None) for tasks that need processing, with the file
+            identities read when the cache was consulted, or (None, None, results)
+            for cache hits, in input order
+        """
+        chunk = []
+        identities = []
+        for task in tasks:
+            identity = ResultCacheService.file_identity(task[0]) if self.result_cache else None
+            cached = self.result_cache.get(task[0], parameters, identity) if self.result_cache else None
+            if cached is None:
+                chunk.append(task)
+                identities.append(identity)
+                if len(chunk) >= self.chunk_size:
+                    yield chunk, identities, None
+                    chunk = []
+                    identities = []
+                continue
+            if chunk:
+                yield chunk, identities, None
+                chunk = []
+                identities = []
+            yield None, None, [cached]
+        if chunk:
+            yield chunk, identities, None
+
+    def _store(self, results: List[BatchResult], identities: List[Optional[tuple]],
+               parameters: dict) -> List[BatchResult]:
+        """Record the successful results of a chunk in the result cache in one transaction."""
+        if self.result_cache:
+            self.result_cache.put_many(
+                [
+                    (identity, result)
+                    for result, identity in zip(results, identities)
+                    if result.succeeded and identity is not None
+                ],
+                parameters
+            )
+        return results
+
+    def sweep_files(self, file_paths: Iterable[str], threshold_pairs: Sequence[tuple]) -> SweepResult:
+        """Count objects in a set of images for every threshold pair.
+        
+        Each image is preprocessed once for all pairs (see
+        ``ImageProcessingService.sweep_thresholds``). Results are not cached.
+        
+        Args:
+            file_paths: Paths of the images to sweep
+            threshold_pairs: (min, max) threshold pairs
+            
+        Returns:
+            The per-image count matrix, with folder totals per pair
+        """
+        file_paths = list(file_paths)
+        threshold_pairs = [tuple(pair) for pair in threshold_pairs]
+        tasks = [(file_path, threshold_pairs, self.options) for file_path in file_paths]
+        chunks = [tasks[start:start + self.chunk_size] for start in range(0, len(tasks), self.chunk_size)]
+        if self.workers == 1:
+            outcomes = [outcome for chunk in chunks for outcome in _sweep_chunk(chunk)]
+        else:
+            executor = self._get_executor()
+            outcomes = [outcome for results in executor.map(_sweep_chunk, chunks) for outcome in results]
+
+        counts = np.full((len(file_paths), len(threshold_pairs)), -1, dtype=np.int64)
+        errors = {}
+        for row, (file_path, image_counts, error) in enumerate(outcomes):
+            if error is None:
+                counts[row] = image_counts
+            else:
+                errors[file_path] = error
+        return SweepResult(threshold_pairs=threshold_pairs, paths=file_paths, counts=counts, errors=errors)
+
+    @staticmethod
+    def total_objects(results: Iterable[BatchResult]) -> int:
+        """Sum the object counts of a set of results.
+        
+        Args:
+            results: Batch results to sum
+            
+        Returns:
+            Total number of objects detected
+        """
+        return sum(result.object_count for result in results)
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use and keep it alive between batches."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._executor
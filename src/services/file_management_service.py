@@ -1,18 +1,24 @@
 """Service for handling file management operations."""
 
 import os
-from typing import List
+from fnmatch import fnmatch
+from typing import Iterator, List, Optional, Sequence
 
 class FileManagementService:
     """Service for handling file management operations."""
 
     # Supported Image Formats
     SUPPORTED_FORMATS = ('.gif', '.jpg', '.png', '.pcx', '.bmp')
+    # Video Formats, read frame by frame through cv2.VideoCapture
+    VIDEO_FORMATS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.wmv')
 
     @staticmethod
     def list_image_files(folder_path: str) -> List[str]:
         """List all supported image files in a folder.
         
+        Files are matched by extension only; ``ImageProbeService.probe_folder``
+        also reads their headers to find unreadable or truncated files.
+        
         Args:
             folder_path: Path to the folder to search
             
@@ -20,14 +26,52 @@ class FileManagementService:
             List of filenames that match supported formats
         """
         try:
-            return [
-                f for f in os.listdir(folder_path)
-                if os.path.isfile(os.path.join(folder_path, f))
-                and f.lower().endswith(FileManagementService.SUPPORTED_FORMATS)
-            ]
+            return list(FileManagementService.iter_image_files(folder_path))
         except Exception:
             return []
 
+    @staticmethod
+    def iter_image_files(folder_path: str, recursive: bool = False,
+                         include: Optional[Sequence[str]] = None,
+                         exclude: Optional[Sequence[str]] = None) -> Iterator[str]:
+        """Stream supported image files in a folder without listing it up front.
+        
+        Uses ``os.scandir`` so file types come from the directory entries and no
+        per-file stat is needed on most filesystems.
+        
+        Args:
+            folder_path: Path to the folder to search
+            recursive: Whether to descend into subfolders
+            include: Glob patterns a file's relative path must match (any of them)
+            exclude: Glob patterns that reject a file's relative path
+            
+        Yields:
+            Paths relative to ``folder_path`` using '/' separators, in directory order
+        """
+        pending = ['']
+        while pending:
+            relative_dir = pending.pop()
+            with os.scandir(os.path.join(folder_path, relative_dir)) as entries:
+                for entry in entries:
+                    relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending.append(relative_path)
+                    elif (entry.is_file()
+                          and entry.name.lower().endswith(FileManagementService.SUPPORTED_FORMATS)
+                          and FileManagementService._matches_patterns(relative_path, include, exclude)):
+                        yield relative_path
+
+    @staticmethod
+    def _matches_patterns(relative_path: str, include: Optional[Sequence[str]],
+                          exclude: Optional[Sequence[str]]) -> bool:
+        """Check a relative path against include and exclude glob patterns."""
+        if include and not any(fnmatch(relative_path, pattern) for pattern in include):
+            return False
+        if exclude and any(fnmatch(relative_path, pattern) for pattern in exclude):
+            return False
+        return True
+
     @staticmethod
     def cleanup_files(file_paths: List[str]):
         """Remove specified files if they exist.
@@ -0,0 +1,204 @@
+"""Service for reading video files and numbered image sequences frame by frame."""
+
+import os
+import queue
+import re
+import threading
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+import cv2
+from ..config.processing_config import FRAME_QUEUE_SIZE
+from ..models.frame import Frame
+from .file_management_service import FileManagementService
+from .image_conversion_service import ImageConversionService
+
+# printf-style frame number placeholder of a sequence pattern, e.g. %04d
+_SEQUENCE_PLACEHOLDER = re.compile(r'%(0?\d*)d')
+
+class FrameSourceService:
+    """Decodes frames on a background thread into a bounded prefetch queue.
+    
+    A source is either a video file readable by ``cv2.VideoCapture`` or a
+    numbered image sequence given as a printf-style pattern such as
+    ``'frames/shot_%04d.png'``, whose frames are ordered by number. Decoding
+    overlaps with whatever the consumer does with the previous frames, and
+    the bounded queue keeps at most ``queue_size`` decoded frames in memory.
+    
+    With a ``target_fps``, frame ``i`` is due ``i / target_fps`` seconds after
+    reading starts. Frames more than one period late are skipped while the
+    consumer still has other frames waiting: a video frame is then grabbed
+    without being decoded, and a frame that went stale in the queue is
+    dropped. A consumer that is waiting always gets the next frame, so
+    counting continues at whatever rate it can sustain. Skipped frames are
+    still yielded, without data, so that consumers can account for them.
+    """
+
+    def __init__(self, source: str, queue_size: int = FRAME_QUEUE_SIZE, target_fps: Optional[float] = None):
+        """Initialize the frame source.
+        
+        Args:
+            source: Video file path or printf-style image sequence pattern
+            queue_size: Maximum number of decoded frames waiting to be consumed
+            target_fps: Frame rate to keep up with by skipping late frames, None to read every frame
+            
+        Raises:
+            ValueError: If the source is neither a video file nor a sequence pattern,
+                or the target rate is not positive
+        """
+        if not self.is_stream_source(source):
+            raise ValueError(f"Not a video file or image sequence pattern: {source}")
+        if target_fps is not None and target_fps <= 0:
+            raise ValueError("Target frame rate must be positive")
+        self.source = source
+        self.queue_size = max(1, queue_size)
+        self.target_fps = target_fps
+
+    @staticmethod
+    def is_video_file(source: str) -> bool:
+        """Check whether a path names a supported video file."""
+        return source.lower().endswith(FileManagementService.VIDEO_FORMATS)
+
+    @staticmethod
+    def is_sequence_pattern(source: str) -> bool:
+        """Check whether a path is a printf-style image sequence pattern."""
+        return (
+            len(_SEQUENCE_PLACEHOLDER.findall(os.path.basename(source))) == 1
+            and source.lower().endswith(FileManagementService.SUPPORTED_FORMATS)
+        )
+
+    @staticmethod
+    def is_stream_source(source: str) -> bool:
+        """Check whether a source is read as a stream of frames."""
+        return FrameSourceService.is_video_file(source) or FrameSourceService.is_sequence_pattern(source)
+
+    @staticmethod
+    def sequence_paths(pattern: str) -> List[str]:
+        """List the existing files of an image sequence in frame-number order.
+        
+        Args:
+            pattern: Path with one printf-style placeholder in the file name, e.g. 'shot_%04d.png'
+            
+        Returns:
+            Paths of the matching files, ordered by frame number
+        """
+        folder, file_pattern = os.path.split(pattern)
+        placeholder = _SEQUENCE_PLACEHOLDER.search(file_pattern)
+        width = placeholder.group(1)
+        # Zero-padded placeholders match exactly that many digits
+        digits = rf'\d{{{int(width)}}}' if len(width) > 1 and width.startswith('0') else r'\d+'
+        name_regex = re.compile(
+            re.escape(file_pattern[:placeholder.start()]) + f'({digits})'
+            + re.escape(file_pattern[placeholder.end():]) + '$'
+        )
+        numbered = []
+        with os.scandir(folder or '.') as entries:
+            for entry in entries:
+                match = name_regex.match(entry.name)
+                if match and entry.is_file():
+                    numbered.append((int(match.group(1)), os.path.join(folder, entry.name)))
+        return [path for _, path in sorted(numbered)]
+
+    def frames(self, is_cancelled: Optional[Callable[[], bool]] = None) -> Iterator[Frame]:
+        """Read the frames of the source in order.
+        
+        Stopping iteration early, or closing the generator, stops the decoder thread.
+        
+        Args:
+            is_cancelled: Optional callable polled between frames; reading stops once it returns True
+            
+        Yields:
+            Frames in source order; skipped frames and frames that failed to
+            decode have no data
+            
+        Raises:
+            IOError: If a video file cannot be opened
+        """
+        frames = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        start = time.monotonic()
+        decoder = threading.Thread(
+            target=self._decode, args=(frames, stop, start), name="frame-decoder", daemon=True
+        )
+        decoder.start()
+        try:
+            while True:
+                if is_cancelled is not None and is_cancelled():
+                    return
+                item = frames.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                if item.data is not None and not frames.empty() and self._is_late(item.index, start):
+                    item.data = None
+                yield item
+        finally:
+            stop.set()
+            # Unblock the decoder if it is waiting for room in the queue
+            while decoder.is_alive():
+                try:
+                    frames.get_nowait()
+                except queue.Empty:
+                    decoder.join(timeout=0.05)
+
+    def _is_late(self, index: int, start: float) -> bool:
+        """Check whether a frame is more than one period behind the target rate."""
+        return self.target_fps is not None and time.monotonic() - start > (index + 1) / self.target_fps
+
+    def _decode(self, frames: queue.Queue, stop: threading.Event, start: float):
+        """Decode frames into the queue until the source ends or reading stops."""
+        try:
+            readers = self._video_readers() if self.is_video_file(self.source) else self._sequence_readers()
+            for index, (timestamp, path, read) in enumerate(readers):
+                if stop.is_set():
+                    return
+                frame = Frame(index=index, timestamp=timestamp, path=path)
+                if frames.empty() or not self._is_late(index, start):
+                    try:
+                        frame.data = read()
+                    except Exception as e:
+                        frame.error = f"{e.__class__.__name__}: {e}"
+                if not self._put(frames, frame, stop):
+                    return
+        except Exception as e:
+            self._put(frames, e, stop)
+        finally:
+            self._put(frames, None, stop)
+
+    @staticmethod
+    def _put(frames: queue.Queue, item, stop: threading.Event) -> bool:
+        """Wait for room in the queue unless reading stops; returns whether the item was queued."""
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _video_readers(self) -> Iterator[Tuple[Optional[float], None, Callable]]:
+        """Grab video frames, deferring their decoding to the returned reader."""
+        capture = cv2.VideoCapture(self.source)
+        try:
+            if not capture.isOpened():
+                raise IOError(f"Could not open video: {self.source}")
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            index = 0
+            while capture.grab():
+                yield (index / fps if fps > 0 else None), None, lambda: self._retrieve(capture)
+                index += 1
+        finally:
+            capture.release()
+
+    @staticmethod
+    def _retrieve(capture: cv2.VideoCapture):
+        """Decode the most recently grabbed video frame."""
+        retrieved, data = capture.retrieve()
+        if not retrieved:
+            raise IOError("Could not decode video frame")
+        return data
+
+    def _sequence_readers(self) -> Iterator[Tuple[None, str, Callable]]:
+        """List the sequence files, decoding each only when its reader is called."""
+        for path in self.sequence_paths(self.source):
+            yield None, path, lambda path=path: ImageConversionService.decode_image(path)
@@ -1,70 +1,136 @@
 """Service for handling image format conversions."""
 
 import os
+import time
+from typing import Callable, Optional
+import cv2
+import numpy as np
 from PIL import Image, UnidentifiedImageError
+from ..models.stage_event import StageEvent
 from .pcx_service import PCXService
 
 class ImageConversionService:
     """Service for handling image format conversion operations."""
 
     @staticmethod
-    def convert_to_png(image_path: str, output_path: str):
+    def convert_to_png(image_path: str, output_path: str,
+                       metrics_callback: Optional[Callable[[StageEvent], None]] = None):
         """Convert any supported image format to PNG.
         
         Args:
             image_path: Path to the source image file
             output_path: Path where the PNG should be saved
+            metrics_callback: Optional callable receiving a 'convert_to_png' stage event
         
         Raises:
             FileNotFoundError: If the image file doesn't exist
             UnidentifiedImageError: If the image format is not supported
             IOError: If there's an error reading or writing the image
         """
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found: {image_path}")
+        try:
+            start = time.perf_counter()
+            rgb_image = ImageConversionService._load_rgb_image(image_path)
+            rgb_image.save(output_path, 'PNG')
+            if metrics_callback is not None:
+                metrics_callback(StageEvent(
+                    stage='convert_to_png',
+                    path=image_path,
+                    seconds=time.perf_counter() - start,
+                    width=rgb_image.width,
+                    height=rgb_image.height,
+                    input_bytes=os.path.getsize(image_path),
+                    output_bytes=os.path.getsize(output_path)
+                ))
+        except Exception as e:
+            raise
 
-        file_name = os.path.basename(image_path)
+    @staticmethod
+    def decode_image(image_path: str,
+                     metrics_callback: Optional[Callable[[StageEvent], None]] = None) -> np.ndarray:
+        """Decode any supported image format directly into a BGR array.
+
+        Produces the same pixels as ``convert_to_png`` followed by ``cv2.imread``,
+        without encoding and re-reading an intermediate PNG file.
         
+        Args:
+            image_path: Path to the source image file
+            metrics_callback: Optional callable receiving a 'decode' stage event
+            
+        Returns:
+            Image data as a BGR numpy array
+        
+        Raises:
+            FileNotFoundError: If the image file doesn't exist
+            UnidentifiedImageError: If the image format is not supported
+            IOError: If there's an error reading the image
+        """
         try:
-            if file_name.lower().endswith('.png'):
-                ImageConversionService._convert_png(image_path, output_path)
-            elif not file_name.lower().endswith('.pcx'):
-                ImageConversionService._convert_standard_image(image_path, output_path)
+            start = time.perf_counter()
+            if image_path.lower().endswith('.pcx') and os.path.exists(image_path):
+                # The PCX decoder already yields a freshly allocated array; swap channels in place
+                rgb_pixels = PCXService.decode_pcx(image_path)
+                image_data = cv2.cvtColor(rgb_pixels, cv2.COLOR_RGB2BGR, dst=rgb_pixels)
             else:
-                ImageConversionService._convert_pcx(image_path, output_path)
+                rgb_image = ImageConversionService._load_rgb_image(image_path)
+                image_data = cv2.cvtColor(np.asarray(rgb_image), cv2.COLOR_RGB2BGR)
+
+            if metrics_callback is not None:
+                metrics_callback(StageEvent(
+                    stage='decode',
+                    path=image_path,
+                    seconds=time.perf_counter() - start,
+                    width=image_data.shape[1],
+                    height=image_data.shape[0],
+                    input_bytes=os.path.getsize(image_path),
+                    output_bytes=image_data.nbytes
+                ))
+            return image_data
         except Exception as e:
             raise
 
     @staticmethod
-    def _convert_png(image_path: str, output_path: str):
-        """Handle transparent PNG conversion."""
+    def _load_rgb_image(image_path: str) -> Image.Image:
+        """Load any supported image format as an RGB PIL image."""
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+
+        file_name = os.path.basename(image_path)
+
+        if file_name.lower().endswith('.png'):
+            return ImageConversionService._load_png(image_path)
+        elif not file_name.lower().endswith('.pcx'):
+            return ImageConversionService._load_standard_image(image_path)
+        else:
+            return ImageConversionService._load_pcx(image_path)
+
+    @staticmethod
+    def _load_png(image_path: str) -> Image.Image:
+        """Handle transparent PNGs by flattening them onto a white background."""
         try:
             png = Image.open(image_path).convert('RGBA')
             png.load()
             background = Image.new("RGB", png.size, (255, 255, 255))
             background.paste(png, mask=png.split()[3])
-            background.save(output_path, 'PNG')
+            return background
         except Exception as e:
             raise
 
     @staticmethod
-    def _convert_standard_image(image_path: str, output_path: str):
-        """Convert standard image formats to RGB PNG."""
+    def _load_standard_image(image_path: str) -> Image.Image:
+        """Load standard image formats as RGB."""
         try:
             image = Image.open(image_path)
-            rgb_image = image.convert("RGB")
-            rgb_image.save(output_path)
+            return image.convert("RGB")
         except UnidentifiedImageError:
             raise
         except Exception as e:
             raise
 
     @staticmethod
-    def _convert_pcx(image_path: str, output_path: str):
-        """Convert PCX format to PNG."""
+    def _load_pcx(image_path: str) -> Image.Image:
+        """Load PCX format through the custom PCX decoder."""
         try:
-            image_data = PCXService.convert_pcx(image_path)
-            image_data.save(output_path)
+            return PCXService.convert_pcx(image_path)
         except Exception as e:
             raise
 
@@ -83,6 +149,47 @@ class ImageConversionService:
         except Exception as e:
             raise
 
+    @staticmethod
+    def render_thumbnail(image_data: np.ndarray, max_width: int, max_height: int) -> bytes:
+        """Render image data as a PNG thumbnail centered on a transparent canvas.
+
+        Works like ``resize_image`` on in-memory arrays: the image is shrunk with
+        area interpolation to fit within the canvas, keeping its aspect ratio, and
+        is never enlarged.
+
+        Args:
+            image_data: Grayscale, BGR or BGRA image data
+            max_width: Width of the canvas in pixels
+            max_height: Height of the canvas in pixels
+
+        Returns:
+            PNG-encoded bytes of the canvas
+        """
+        try:
+            height, width = image_data.shape[:2]
+            scale = min(1.0, max_width / width, max_height / height)
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            if size != (width, height):
+                image_data = cv2.resize(image_data, size, interpolation=cv2.INTER_AREA)
+
+            canvas = np.zeros((max_height, max_width, 4), dtype=np.uint8)
+            offset_x = (max_width - size[0]) // 2
+            offset_y = (max_height - size[1]) // 2
+            region = canvas[offset_y:offset_y + size[1], offset_x:offset_x + size[0]]
+            if image_data.ndim == 2:
+                cv2.cvtColor(image_data, cv2.COLOR_GRAY2BGRA, dst=region)
+            elif image_data.shape[2] == 3:
+                cv2.cvtColor(image_data, cv2.COLOR_BGR2BGRA, dst=region)
+            else:
+                region[...] = image_data
+
+            success, encoded = cv2.imencode('.png', canvas, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+            if not success:
+                raise IOError("Could not encode the thumbnail")
+            return encoded.tobytes()
+        except Exception as e:
+            raise
+
     @staticmethod
     def resize_image(image_path: str, output_path: str, max_width: int, max_height: int):
         """
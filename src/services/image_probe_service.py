@@ -0,0 +1,320 @@
+"""Service for reading image formats and dimensions from file headers."""
+
+import os
+import struct
+from typing import Iterable, List, Optional, Sequence
+from ..config.processing_config import PROBE_HEADER_BYTES, PROBE_TRAILER_BYTES
+from ..models.image_header import ImageHeader
+from .file_management_service import FileManagementService
+from .pcx_service import PCXService, PCXFormatError
+
+class ImageProbeError(Exception):
+    """Exception raised for image files whose header cannot be read."""
+    pass
+
+class ImageProbeService:
+    """Reads the format, dimensions, channels and bit depth of images without decoding them.
+
+    Only the first ``PROBE_HEADER_BYTES`` of a file are read, plus the segment
+    headers of a JPEG up to its frame header, the chunk headers of a PNG and the
+    last ``PROBE_TRAILER_BYTES`` of JPEG and GIF files to check that the file
+    was not cut short. This makes it cheap to validate a
+    folder before a batch, estimate decoded memory and order work by image size.
+    """
+
+    PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+    PNG_END_CHUNK = b'IEND'
+    JPEG_SIGNATURE = b'\xff\xd8'
+    JPEG_END = b'\xff\xd9'
+    GIF_SIGNATURES = (b'GIF87a', b'GIF89a')
+    GIF_TRAILER = 0x3B
+    BMP_SIGNATURE = b'BM'
+    PCX_PALETTE_MARKER = b'\x0c'
+
+    # Channels by PNG color type, palette images counting the RGB channels of their entries
+    _PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+    # Frame header markers of baseline, progressive, lossless and arithmetic JPEGs
+    _JPEG_FRAME_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+    # Markers without a length field
+    _JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD8)) | {0x01}
+    _JPEG_START_OF_SCAN = 0xDA
+    # BMP compressions whose pixel data size follows from the header
+    _BMP_UNCOMPRESSED = (0, 3, 6)
+
+    @staticmethod
+    def probe(file_path: str) -> ImageHeader:
+        """Read the header of an image file.
+
+        Args:
+            file_path: Path to the image file
+
+        Returns:
+            The image header; files that are missing, unrecognized, unsupported or
+            truncated are reported through its ``error`` rather than raised
+        """
+        header = ImageHeader(path=file_path)
+        try:
+            with open(file_path, 'rb') as f:
+                header.file_size = os.fstat(f.fileno()).st_size
+                head = f.read(PROBE_HEADER_BYTES)
+                ImageProbeService._read_header(f, head, header)
+                if file_path.lower().endswith('.pcx') and header.format != 'pcx':
+                    raise ImageProbeError("Not a PCX file")
+                ImageProbeService._check_complete(f, head, header)
+        except struct.error:
+            header.error = f"File too small to contain a {header.format.upper()} header"
+        except (ImageProbeError, PCXFormatError, OSError) as e:
+            header.error = str(e)
+        return header
+
+    @staticmethod
+    def probe_files(file_paths: Iterable[str]) -> List[ImageHeader]:
+        """Read the headers of a set of image files.
+
+        Args:
+            file_paths: Paths of the images to probe
+
+        Returns:
+            One header per image, in the same order as ``file_paths``
+        """
+        return [ImageProbeService.probe(file_path) for file_path in file_paths]
+
+    @staticmethod
+    def probe_folder(folder_path: str, recursive: bool = False,
+                     include: Optional[Sequence[str]] = None,
+                     exclude: Optional[Sequence[str]] = None) -> List[ImageHeader]:
+        """Read the headers of the supported image files in a folder.
+
+        Args:
+            folder_path: Path to the folder to search
+            recursive: Whether to descend into subfolders
+            include: Glob patterns a file's relative path must match (any of them)
+            exclude: Glob patterns that reject a file's relative path
+
+        Returns:
+            One header per file listed by ``FileManagementService.iter_image_files``,
+            sorted by path
+        """
+        return ImageProbeService.probe_files(sorted(
+            os.path.join(folder_path, file_name)
+            for file_name in FileManagementService.iter_image_files(folder_path, recursive, include, exclude)
+        ))
+
+    @staticmethod
+    def largest_first(headers: Iterable[ImageHeader]) -> List[ImageHeader]:
+        """Order headers by decreasing pixel count.
+
+        Dispatching large images first keeps a worker pool from ending a batch
+        with a single large image still running while the other workers idle.
+
+        Args:
+            headers: Image headers to order
+
+        Returns:
+            The headers sorted by decreasing pixel count, ties and invalid files
+            keeping their relative order at the end
+        """
+        return sorted(headers, key=lambda header: -header.pixels if header.valid else 1)
+
+    @staticmethod
+    def peak_decoded_bytes(headers: Iterable[ImageHeader], workers: int = 1) -> int:
+        """Estimate the decoded image memory held at once by a pool of workers.
+
+        Args:
+            headers: Headers of the images to process
+            workers: Number of images decoded at the same time
+
+        Returns:
+            The combined decoded size of the ``workers`` largest valid images
+        """
+        sizes = sorted((header.decoded_bytes for header in headers if header.valid), reverse=True)
+        return sum(sizes[:max(1, workers)])
+
+    @staticmethod
+    def _read_header(f, head: bytes, header: ImageHeader):
+        """Identify the format from its signature and fill in the image geometry."""
+        if head.startswith(ImageProbeService.PNG_SIGNATURE):
+            ImageProbeService._read_png(head, header)
+        elif head.startswith(ImageProbeService.JPEG_SIGNATURE):
+            ImageProbeService._read_jpeg(f, header)
+        elif head[:6] in ImageProbeService.GIF_SIGNATURES:
+            ImageProbeService._read_gif(head, header)
+        elif head.startswith(ImageProbeService.BMP_SIGNATURE):
+            ImageProbeService._read_bmp(head, header)
+        elif head[:1] == bytes([PCXService.MANUFACTURER]):
+            ImageProbeService._read_pcx(head, header)
+        else:
+            raise ImageProbeError("Unrecognized image format")
+        if header.width <= 0 or header.height <= 0:
+            raise ImageProbeError(f"Invalid {header.format.upper()} dimensions: {header.width}x{header.height}")
+
+    @staticmethod
+    def _read_png(head: bytes, header: ImageHeader):
+        """Read the IHDR chunk, which the PNG specification places first."""
+        header.format = 'png'
+        if head[12:16] != b'IHDR':
+            raise ImageProbeError("PNG file does not start with an IHDR chunk")
+        header.width, header.height, bit_depth, color_type = struct.unpack('>IIBB', head[16:26])
+        if color_type not in ImageProbeService._PNG_CHANNELS:
+            raise ImageProbeError(f"Unsupported PNG color type: {color_type}")
+        header.channels = ImageProbeService._PNG_CHANNELS[color_type]
+        header.bit_depth = bit_depth
+
+    @staticmethod
+    def _read_jpeg(f, header: ImageHeader):
+        """Walk the marker segments up to the frame header.
+
+        Metadata segments such as EXIF thumbnails may run to 64 KiB each, so
+        they are skipped by seeking instead of being read.
+        """
+        header.format = 'jpeg'
+        position = len(ImageProbeService.JPEG_SIGNATURE)
+        while True:
+            f.seek(position)
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                raise ImageProbeError("JPEG file ends before its frame header")
+            code = marker[1]
+            if code == 0xFF:
+                # Fill byte before a marker
+                position += 1
+                continue
+            if code in ImageProbeService._JPEG_STANDALONE_MARKERS:
+                position += 2
+                continue
+            if code == ImageProbeService._JPEG_START_OF_SCAN:
+                raise ImageProbeError("JPEG file has no frame header")
+            segment = f.read(8)
+            if len(segment) < 2:
+                raise ImageProbeError("JPEG file ends before its frame header")
+            (length,) = struct.unpack('>H', segment[:2])
+            if code in ImageProbeService._JPEG_FRAME_MARKERS:
+                if len(segment) < 8:
+                    raise ImageProbeError("JPEG file ends inside its frame header")
+                header.bit_depth, header.height, header.width, header.channels = struct.unpack(
+                    '>BHHB', segment[2:8]
+                )
+                return
+            position += 2 + length
+
+    @staticmethod
+    def _read_gif(head: bytes, header: ImageHeader):
+        """Read the logical screen descriptor."""
+        header.format = 'gif'
+        header.width, header.height, packed = struct.unpack('<HHB', head[6:11])
+        header.channels = 3
+        # Index depth of the global color table, GIFs without one use local tables of up to 8 bits
+        header.bit_depth = (packed & 0x07) + 1 if packed & 0x80 else 8
+
+    @staticmethod
+    def _read_bmp(head: bytes, header: ImageHeader):
+        """Read the file header and the core or info header that follows it."""
+        header.format = 'bmp'
+        (dib_size,) = struct.unpack('<I', head[14:18])
+        if dib_size == 12:
+            width, height, planes, bit_count = struct.unpack('<HHHH', head[18:26])
+        elif dib_size >= 40:
+            width, height, planes, bit_count = struct.unpack('<iiHH', head[18:30])
+        else:
+            raise ImageProbeError(f"Unsupported BMP header size: {dib_size}")
+        # Negative heights mark top-down bitmaps
+        header.width, header.height = width, abs(height)
+        if bit_count in (1, 2, 4, 8):
+            header.channels, header.bit_depth = 3, bit_count
+        elif bit_count == 16:
+            header.channels, header.bit_depth = 3, 5
+        elif bit_count in (24, 32):
+            header.channels, header.bit_depth = bit_count // 8, 8
+        else:
+            raise ImageProbeError(f"Unsupported BMP bit count: {bit_count}")
+
+    @staticmethod
+    def _read_pcx(head: bytes, header: ImageHeader):
+        """Read the 128-byte header with the same checks as the PCX decoder."""
+        header.format = 'pcx'
+        fields = PCXService.parse_header(head[:PCXService.HEADER_SIZE])
+        header.width, header.height = fields['width'], fields['height']
+        bits, planes = fields['bits_per_pixel'], fields['planes']
+        if bits == 8 and planes == 1:
+            header.channels, header.bit_depth = 3, 8
+        elif bits == 8 and planes in (3, 4):
+            header.channels, header.bit_depth = planes, 8
+        elif bits == 1 and planes == 1:
+            header.channels, header.bit_depth = 1, 1
+        elif bits == 1 and 2 <= planes <= 4:
+            # The planes hold the bits of an index into the 16-color header palette
+            header.channels, header.bit_depth = 3, planes
+        else:
+            raise PCXFormatError(f"Unsupported PCX layout: {bits} bits per pixel, {planes} planes")
+
+    @staticmethod
+    def _check_complete(f, head: bytes, header: ImageHeader):
+        """Check that a file holds all of its data.
+
+        BMP and PCX files must be long enough for the layout of their header and
+        PNG chunks must run up to IEND; these failures are errors. JPEG and GIF
+        files without their end marker near the end of the file only get a
+        warning, since valid files may carry data after it.
+        """
+        if header.format == 'bmp':
+            (data_offset,) = struct.unpack('<I', head[10:14])
+            (dib_size,) = struct.unpack('<I', head[14:18])
+            compression = struct.unpack('<I', head[30:34])[0] if dib_size >= 40 else 0
+            if compression in ImageProbeService._BMP_UNCOMPRESSED:
+                bits = struct.unpack('<H', head[24:26] if dib_size == 12 else head[28:30])[0]
+                row_bytes = (header.width * bits + 31) // 32 * 4
+                expected = data_offset + row_bytes * header.height
+                if header.file_size < expected:
+                    raise ImageProbeError(f"Truncated BMP file (got {header.file_size} bytes, need {expected})")
+            return
+        if header.format == 'pcx':
+            fields = PCXService.parse_header(head[:PCXService.HEADER_SIZE])
+            has_vga_palette = fields['bits_per_pixel'] == 8 and fields['planes'] == 1
+            expected = PCXService.HEADER_SIZE + 1
+            if has_vga_palette:
+                expected += 1 + PCXService.PALETTE_SIZE
+            if header.file_size < expected:
+                raise ImageProbeError(f"Truncated PCX file (got {header.file_size} bytes, need {expected})")
+            # Run-length data has no size of its own, but a cut file loses the marker before the palette
+            if has_vga_palette:
+                f.seek(header.file_size - PCXService.PALETTE_SIZE - 1)
+                if f.read(1) != ImageProbeService.PCX_PALETTE_MARKER:
+                    raise ImageProbeError("Truncated PCX file (no palette marker)")
+            return
+
+        if header.format == 'png':
+            ImageProbeService._check_png_chunks(f, header)
+            return
+
+        f.seek(max(0, header.file_size - PROBE_TRAILER_BYTES))
+        tail = f.read(PROBE_TRAILER_BYTES)
+        # Motion photos and some writers append data after the end marker, so a
+        # missing marker near the end only casts doubt on the file
+        if header.format == 'jpeg':
+            complete = ImageProbeService.JPEG_END in tail
+        else:
+            # Some writers pad the file after the trailer
+            complete = tail.rstrip(b'\x00')[-1:] == bytes([ImageProbeService.GIF_TRAILER])
+        if not complete:
+            header.warning = f"No {header.format.upper()} end marker at the end of the file; it may be truncated"
+
+    @staticmethod
+    def _check_png_chunks(f, header: ImageHeader):
+        """Follow the chunk lengths from the signature to the IEND chunk.
+        
+        Only the 8-byte chunk headers are read, and data appended after IEND
+        is ignored.
+        """
+        position = len(ImageProbeService.PNG_SIGNATURE)
+        while True:
+            f.seek(position)
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise ImageProbeError("Truncated PNG file (no IEND chunk)")
+            length, chunk_type = struct.unpack('>I4s', chunk_header)
+            # Chunk data is followed by a 4-byte CRC
+            position += 12 + length
+            if position > header.file_size:
+                raise ImageProbeError(f"Truncated PNG file (chunk {chunk_type.decode('latin-1')!r} is cut short)")
+            if chunk_type == ImageProbeService.PNG_END_CHUNK:
+                return
@@ -1,22 +1,104 @@
 """Service for handling image processing operations."""
 
+import os
+import time
+from typing import Callable, Collection, Optional, Sequence, Union
 import cv2
 import numpy as np
 from ..config.processing_config import (
     GAUSSIAN_KERNEL_SIZE,
     GAUSSIAN_SIGMA,
-    DILATION_KERNEL_SIZE
+    DILATION_KERNEL_SIZE,
+    DEFAULT_EDGE_ENGINE,
+    EDGE_ENGINES,
+    DEFAULT_COUNT_ENGINE,
+    COUNT_ENGINES,
+    TILE_SIZE,
+    AUTO_THRESHOLD_MODES,
+    OTSU_LOW_RATIO,
+    MEDIAN_THRESHOLD_SIGMA
 )
 from ..models.image_model import ImageModel
 from ..models.image_transformation import ImageTransformation
+from ..models.object_stats import ObjectStats
+from ..models.stage_event import StageEvent
+from .edge_detection_service import EdgeDetectionService
+from .image_conversion_service import ImageConversionService
+from .object_counting_service import ObjectCountingService
+from .stage_cache_service import StageCacheService
+from .threshold_selection_service import ThresholdSelectionService
+from .threshold_sweep_service import ThresholdSweepService
+from .tiled_processing_service import TiledProcessingService
+
+class ProcessingCancelledError(Exception):
+    """Exception raised when processing is cancelled between pipeline stages."""
+    pass
 
 class ImageProcessingService:
     """Service for handling image processing operations."""
 
-    def __init__(self):
-        """Initialize the image processing service."""
+    # Intermediate stages of a result that can be retained or released
+    PIPELINE_STAGES = ('grayscale', 'blurred', 'edges', 'dilated_edges', 'contours')
+
+    # Result attributes read and written by each instrumented stage
+    STAGE_IO = {
+        'grayscale': ('data', 'grayscale'),
+        'blur': ('grayscale', 'blurred'),
+        'canny': ('blurred', 'edges'),
+        'dilate': ('edges', 'dilated_edges'),
+        'contours': ('dilated_edges', 'contours'),
+    }
+
+    def __init__(self, stage_cache: Optional[StageCacheService] = None, reuse_buffers: bool = False,
+                 metrics_callback: Optional[Callable[[StageEvent], None]] = None,
+                 edge_engine: str = DEFAULT_EDGE_ENGINE, count_engine: str = DEFAULT_COUNT_ENGINE,
+                 measure_perimeters: bool = False):
+        """Initialize the image processing service.
+        
+        Args:
+            stage_cache: Optional cache for threshold-independent stages of images
+                processed from a file path, so that re-running with new thresholds
+                only recomputes edge and contour detection
+            reuse_buffers: Write the grayscale, blurred, edge and dilated stages into
+                scratch arrays reused across images of the same shape. The stage
+                arrays of a result are then only valid until the next image is
+                processed, so this suits callers that only read the object count.
+            metrics_callback: Optional callable receiving a ``StageEvent`` for the
+                decode and each pipeline stage; can also be set later through the
+                ``metrics_callback`` attribute
+            edge_engine: Canny engine of ``EdgeDetectionService`` used by whole-image
+                processing; all engines give identical edges. ``'opencv_sobel'``
+                keeps the image derivatives in the stage cache so that threshold
+                changes skip them. Can also be set later through the
+                ``edge_engine`` attribute.
+            count_engine: Counting engine of ``ObjectCountingService`` used by
+                whole-image processing; both count the same objects.
+                ``'components'`` also sets the result's ``object_stats`` and
+                supports area filters, but leaves ``contours`` unset. Can also
+                be set later through the ``count_engine`` attribute.
+            measure_perimeters: Fill in the perimeters of ``object_stats``, which
+                traces the contours in addition to labelling the components. Can
+                also be set later through the ``measure_perimeters`` attribute.
+                
+        Raises:
+            ValueError: If the edge or count engine is not supported
+        """
+        if edge_engine not in EDGE_ENGINES:
+            raise ValueError(f"Unsupported edge engine: {edge_engine}; expected one of {', '.join(EDGE_ENGINES)}")
+        if count_engine not in COUNT_ENGINES:
+            raise ValueError(
+                f"Unsupported count engine: {count_engine}; expected one of {', '.join(COUNT_ENGINES)}"
+            )
         self._current_transformation = None
         self._total_objects = 0
+        self._stage_cache = stage_cache
+        self._source_path = None
+        self._reuse_buffers = reuse_buffers
+        self._scratch = {}
+        self.metrics_callback = metrics_callback
+        self.edge_engine = edge_engine
+        self.count_engine = count_engine
+        self.measure_perimeters = measure_perimeters
 
     @property
     def current_objects(self) -> int:
@@ -28,6 +110,11 @@ class ImageProcessingService:
         """Get total number of objects detected."""
         return self._total_objects
 
+    @property
+    def result(self) -> Optional[ImageModel]:
+        """Get the processing result of the current image."""
+        return self._current_transformation.result if self._current_transformation else None
+
     @property
     def image(self) -> np.ndarray:
         """Get the current image data."""
@@ -53,98 +140,643 @@ class ImageProcessingService:
         """Get the detected contours."""
         return self._current_transformation.result.contours if self._current_transformation else None
 
-    def process_image(self, filepath: str, min_threshold: int, max_threshold: int):
-        """Process an image through the edge detection pipeline."""
-        try:
-            # Load and create initial image model
-            image_data = cv2.imread(filepath)
-            if image_data is None:
-                raise IOError(f"Failed to load image: {filepath}")
+    @property
+    def object_stats(self) -> Optional[ObjectStats]:
+        """Get the per-object measurements, set by the components count engine."""
+        return self._current_transformation.result.object_stats if self._current_transformation else None
+
+    @staticmethod
+    def pipeline_parameters(min_threshold: int, max_threshold: int,
+                            max_dimension: Optional[int] = None, scale: Optional[float] = None,
+                            auto_threshold: Optional[str] = None, min_area: Optional[int] = None,
+                            max_area: Optional[int] = None) -> dict:
+        """Get every parameter that influences the object count of an image.
+        
+        Args:
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+            max_dimension: Working-resolution limit in effect, if any
+            scale: Working-resolution scale factor in effect, if any
+            auto_threshold: Automatic threshold mode in effect, if any
+            min_area: Smallest object area counted, if any
+            max_area: Largest object area counted, if any
+            
+        Returns:
+            Mapping of parameter names to JSON-serializable values
+        """
+        parameters = {
+            'min_threshold': min_threshold,
+            'max_threshold': max_threshold,
+            'gaussian_kernel_size': list(GAUSSIAN_KERNEL_SIZE),
+            'gaussian_sigma': GAUSSIAN_SIGMA,
+            'dilation_kernel_size': list(DILATION_KERNEL_SIZE),
+        }
+        # Full-resolution runs keep the parameter set they always had
+        if max_dimension is not None:
+            parameters['max_dimension'] = max_dimension
+        if scale is not None:
+            parameters['scale'] = scale
+        if auto_threshold == 'otsu':
+            parameters.update(auto_threshold=auto_threshold, otsu_low_ratio=OTSU_LOW_RATIO)
+        elif auto_threshold is not None:
+            parameters.update(auto_threshold=auto_threshold, median_threshold_sigma=MEDIAN_THRESHOLD_SIGMA)
+        if min_area is not None:
+            parameters['min_area'] = min_area
+        if max_area is not None:
+            parameters['max_area'] = max_area
+        return parameters
+
+    @staticmethod
+    def working_scale(width: int, height: int, max_dimension: Optional[int] = None,
+                      scale: Optional[float] = None) -> float:
+        """Get the scale at which an image is processed.
+        
+        Args:
+            width: Image width in pixels
+            height: Image height in pixels
+            max_dimension: Longest side of the working image, None for no limit
+            scale: Scale factor of the working image, None for full resolution
             
-            height, width = image_data.shape[:2]
-            original_image = ImageModel(
-                path=filepath,
-                data=image_data,
-                width=width,
-                height=height,
-                format=filepath.split('.')[-1].lower()
+        Returns:
+            The smaller of the two requested scales, never above 1
+            
+        Raises:
+            ValueError: If ``max_dimension`` is below 1 or ``scale`` is outside (0, 1]
+        """
+        effective_scale = 1.0
+        if scale is not None:
+            if not 0 < scale <= 1:
+                raise ValueError("Scale must be greater than 0 and at most 1")
+            effective_scale = scale
+        if max_dimension is not None:
+            if max_dimension < 1:
+                raise ValueError("Maximum dimension must be at least 1")
+            effective_scale = min(effective_scale, max_dimension / max(width, height))
+        return effective_scale
+
+    @staticmethod
+    def scale_kernel_size(kernel_size: tuple, scale: float) -> tuple:
+        """Scale a kernel size to a working resolution.
+        
+        Sizes stay odd and do not shrink below 3: the pyramid already smooths
+        as much as the larger kernel would, but edges still need a 3x3
+        neighbourhood to blur and dilate, or outlines fall apart into fragments.
+        """
+        if scale >= 1:
+            return tuple(kernel_size)
+        return tuple(max(min(size, 3), int(round(size * scale)) | 1) for size in kernel_size)
+
+    def process_image(self, image: Union[str, np.ndarray], min_threshold: int, max_threshold: int,
+                      path: Optional[str] = None, is_cancelled: Optional[Callable[[], bool]] = None,
+                      retain_stages: Optional[Collection[str]] = None,
+                      max_dimension: Optional[int] = None, scale: Optional[float] = None,
+                      auto_threshold: Optional[str] = None, min_area: Optional[int] = None,
+                      max_area: Optional[int] = None):
+        """Process an image through the edge detection pipeline.
+        
+        Args:
+            image: Path to the image file, or already decoded BGR image data
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+            path: Source path recorded on the image model when ``image`` is an array
+            is_cancelled: Optional callable checked between stages
+            retain_stages: Names from ``PIPELINE_STAGES`` to keep on the result,
+                None to keep every stage
+            max_dimension: Process at a working resolution whose longest side is at
+                most this many pixels; stages and contours are then in working
+                coordinates and the result reports the scale used
+            scale: Process at this fraction of the full resolution
+            auto_threshold: Derive the thresholds from the histogram of the blurred
+                image instead, with one of ``AUTO_THRESHOLD_MODES``; the values
+                chosen are reported as the result's ``thresholds``
+            min_area: Only count objects of at least this area, in pixels of the
+                full-resolution image; requires the components count engine
+            max_area: Only count objects of at most this area, in pixels of the
+                full-resolution image; requires the components count engine
+            
+        Raises:
+            ProcessingCancelledError: If ``is_cancelled`` returns True between stages
+            ValueError: If ``retain_stages`` names an unknown stage, or the working
+                resolution, threshold mode or area filter is invalid
+        """
+        try:
+            if retain_stages is not None:
+                unknown_stages = set(retain_stages).difference(self.PIPELINE_STAGES)
+                if unknown_stages:
+                    raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown_stages))}")
+
+            image_data, filepath = self._read_source(image, path)
+            self._begin_transformation(
+                image_data, filepath, min_threshold, max_threshold, max_dimension, scale, auto_threshold,
+                min_area, max_area
             )
+
+            # Process the image
+            stages = (
+                ('grayscale', self._convert_to_grayscale),
+                ('blur', self._blur_image),
+                ('canny', self._detect_edges),
+                ('dilate', self._dilate_edges),
+                ('contours', self._detect_contours),
+            )
+            for name, stage in stages:
+                if is_cancelled is not None and is_cancelled():
+                    raise ProcessingCancelledError(f"Processing cancelled: {filepath}")
+                self._run_stage(name, stage)
+
+            if retain_stages is not None:
+                self._release_stages(retain_stages)
             
-            # Create transformation model
-            self._current_transformation = ImageTransformation(
-                original_image=original_image,
-                min_threshold=min_threshold,
-                max_threshold=max_threshold,
-                gaussian_kernel_size=GAUSSIAN_KERNEL_SIZE,
-                gaussian_sigma=GAUSSIAN_SIGMA,
-                dilation_kernel_size=DILATION_KERNEL_SIZE
+        except Exception as e:
+            raise
+
+    def process_image_count_only(self, image: Union[str, np.ndarray], min_threshold: int, max_threshold: int,
+                                 path: Optional[str] = None, is_cancelled: Optional[Callable[[], bool]] = None,
+                                 max_dimension: Optional[int] = None, scale: Optional[float] = None,
+                                 auto_threshold: Optional[str] = None, min_area: Optional[int] = None,
+                                 max_area: Optional[int] = None):
+        """Count the objects in an image without retaining stages or contour lists.
+        
+        Each intermediate is released as soon as the next stage has consumed it,
+        the dilation runs in place over the edge buffer, and the contour point
+        lists are discarded as soon as they are counted, so at most two image
+        planes are alive at a time. Only ``object_count`` is set on the result,
+        plus ``object_stats`` with the components count engine.
+        
+        Args:
+            image: Path to the image file, or already decoded BGR image data
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+            path: Source path recorded on the image model when ``image`` is an array
+            is_cancelled: Optional callable checked between stages
+            max_dimension: Longest side of the working resolution, as in ``process_image``
+            scale: Working-resolution scale factor, as in ``process_image``
+            auto_threshold: Automatic threshold mode, as in ``process_image``
+            min_area: Smallest object area counted, as in ``process_image``
+            max_area: Largest object area counted, as in ``process_image``
+            
+        Raises:
+            ProcessingCancelledError: If ``is_cancelled`` returns True between stages
+            ValueError: If the working resolution, threshold mode or area filter is invalid
+        """
+        try:
+            image_data, filepath = self._read_source(image, path)
+            self._begin_transformation(
+                image_data, filepath, min_threshold, max_threshold, max_dimension, scale, auto_threshold,
+                min_area, max_area
             )
+
+            stages = (
+                ('grayscale', self._convert_to_grayscale, ()),
+                ('blur', self._blur_image, ('grayscale',)),
+                ('canny', self._detect_edges, ('blurred',)),
+                ('dilate', lambda: self._dilate_edges(in_place=True), ('edges',)),
+                ('contours', self._detect_contours, ('dilated_edges', 'contours')),
+            )
+            for name, stage, consumed_stages in stages:
+                if is_cancelled is not None and is_cancelled():
+                    raise ProcessingCancelledError(f"Processing cancelled: {filepath}")
+                self._run_stage(name, stage)
+                for consumed_stage in consumed_stages:
+                    setattr(self._current_transformation.result, consumed_stage, None)
+        except Exception as e:
+            raise
+
+    def sweep_thresholds(self, image: Union[str, np.ndarray], threshold_pairs: Sequence[tuple],
+                         path: Optional[str] = None, is_cancelled: Optional[Callable[[], bool]] = None,
+                         max_dimension: Optional[int] = None, scale: Optional[float] = None) -> np.ndarray:
+        """Count the objects in an image for many threshold pairs at once.
+        
+        Grayscale conversion, blur and the Sobel derivatives run once, and each
+        distinct lower threshold runs Canny once; counts equal those of
+        ``process_image`` for each pair. The result afterwards holds the count of
+        the first pair.
+        
+        Args:
+            image: Path to the image file, or already decoded BGR image data
+            threshold_pairs: (min, max) threshold pairs to evaluate
+            path: Source path recorded on the image model when ``image`` is an array
+            is_cancelled: Optional callable checked between stages
+            max_dimension: Longest side of the working resolution, as in ``process_image``
+            scale: Working-resolution scale factor, as in ``process_image``
+            
+        Returns:
+            Object counts aligned with ``threshold_pairs``
             
-            if not self._current_transformation.is_valid():
-                raise ValueError("Invalid threshold values")
+        Raises:
+            ProcessingCancelledError: If ``is_cancelled`` returns True between stages
+            ValueError: If no pairs are given, a pair is invalid or the working
+                resolution is invalid
+        """
+        try:
+            if not threshold_pairs:
+                raise ValueError("No threshold pairs to sweep")
+            for min_threshold, max_threshold in threshold_pairs:
+                if min_threshold < 0 or max_threshold < 0 or min_threshold >= max_threshold:
+                    raise ValueError(f"Invalid threshold values: ({min_threshold}, {max_threshold})")
 
-            # Process the image
-            self._preprocess_image()
-            self._detect_edges()
-            self._detect_contours()
+            image_data, filepath = self._read_source(image, path)
+            transformation = self._begin_transformation(
+                image_data, filepath, *threshold_pairs[0], max_dimension, scale
+            )
+
+            if is_cancelled is not None and is_cancelled():
+                raise ProcessingCancelledError(f"Processing cancelled: {filepath}")
+            self._run_stage('grayscale', self._convert_to_grayscale)
+            self._run_stage('blur', self._blur_image)
+            result = transformation.result
+            result.grayscale = None
+
+            if is_cancelled is not None and is_cancelled():
+                raise ProcessingCancelledError(f"Processing cancelled: {filepath}")
+            start = time.perf_counter()
+            counts = ThresholdSweepService.count_pairs(
+                result.blurred, threshold_pairs, transformation.dilation_kernel_size
+            )
+            if self.metrics_callback is not None:
+                self._emit_stage_event('sweep', time.perf_counter() - start, result.blurred.nbytes, counts.nbytes)
+            result.blurred = None
+            result.object_count = int(counts[0])
+            return counts
+        except Exception as e:
+            raise
+
+    def process_image_tiled(self, image: Union[str, np.ndarray], min_threshold: int, max_threshold: int,
+                            path: Optional[str] = None, tile_size: int = TILE_SIZE,
+                            is_cancelled: Optional[Callable[[], bool]] = None,
+                            max_dimension: Optional[int] = None, scale: Optional[float] = None,
+                            auto_threshold: Optional[str] = None):
+        """Count objects in a large image by processing overlapping tiles.
+        
+        Only the grayscale image, one tile of intermediate buffers and small
+        per-tile connectivity summaries are held at a time, and the count matches
+        ``process_image``. The result keeps the grayscale image as its data and
+        only ``object_count`` is set; no intermediate stages or contour lists are
+        retained, and the count engine does not apply.
+        
+        Args:
+            image: Path to the image file, or already decoded BGR or grayscale image data
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+            path: Source path recorded on the image model when ``image`` is an array
+            tile_size: Edge length of the tiles
+            is_cancelled: Optional callable checked between tiles
+            max_dimension: Longest side of the working resolution, as in ``process_image``
+            scale: Working-resolution scale factor, as in ``process_image``
+            auto_threshold: Automatic threshold mode, as in ``process_image``; costs
+                an extra blur pass over the tiles to build the histogram
             
+        Raises:
+            ProcessingCancelledError: If ``is_cancelled`` returns True between tiles
+            ValueError: If the working resolution or threshold mode is invalid
+        """
+        try:
+            image_data, filepath = self._read_source(image, path)
+            if image_data.ndim == 3:
+                image_data = cv2.cvtColor(image_data, cv2.COLOR_BGR2GRAY)
+            transformation = self._begin_transformation(
+                image_data, filepath, min_threshold, max_threshold, max_dimension, scale, auto_threshold
+            )
+            if transformation.scale < 1:
+                image_data = self._downscale(image_data, transformation.scale)
+
+            tiler = TiledProcessingService(
+                tile_size=tile_size,
+                gaussian_kernel_size=transformation.gaussian_kernel_size,
+                gaussian_sigma=transformation.gaussian_sigma,
+                dilation_kernel_size=transformation.dilation_kernel_size
+            )
+
+            def before_tile():
+                if is_cancelled is not None and is_cancelled():
+                    raise ProcessingCancelledError(f"Processing cancelled: {filepath}")
+
+            start = time.perf_counter()
+            if transformation.threshold_mode is not None:
+                transformation.min_threshold, transformation.max_threshold = (
+                    ThresholdSelectionService.select_thresholds(
+                        tiler.blurred_histogram(image_data, before_tile=before_tile), transformation.threshold_mode
+                    )
+                )
+            object_count = tiler.count_objects(
+                image_data, transformation.min_threshold, transformation.max_threshold, before_tile=before_tile
+            )
+            if self.metrics_callback is not None:
+                self._emit_stage_event('tiled_count', time.perf_counter() - start, image_data.nbytes, 0)
+
+            original_image = transformation.original_image
+            transformation.result = ImageModel(
+                path=original_image.path,
+                data=original_image.data,
+                width=original_image.width,
+                height=original_image.height,
+                format=original_image.format,
+                object_count=object_count,
+                scale=transformation.scale,
+                thresholds=(transformation.min_threshold, transformation.max_threshold)
+            )
         except Exception as e:
             raise
 
-    def _preprocess_image(self):
-        """Convert image to grayscale and apply Gaussian blur."""
+    def _read_source(self, image: Union[str, np.ndarray], path: Optional[str]) -> tuple:
+        """Resolve the image argument of the processing methods into (image data, path)."""
+        if isinstance(image, np.ndarray):
+            self._source_path = None
+            return image, path or ''
+        self._source_path = image
+        return self._load_image(image), image
+
+    def _begin_transformation(self, image_data: np.ndarray, filepath: str, min_threshold: int, max_threshold: int,
+                              max_dimension: Optional[int] = None, scale: Optional[float] = None,
+                              auto_threshold: Optional[str] = None, min_area: Optional[int] = None,
+                              max_area: Optional[int] = None) -> ImageTransformation:
+        """Create and validate the transformation model for a new image."""
+        if auto_threshold is not None and auto_threshold not in AUTO_THRESHOLD_MODES:
+            raise ValueError(
+                f"Unsupported threshold mode: {auto_threshold}; expected one of {', '.join(AUTO_THRESHOLD_MODES)}"
+            )
+        if (min_area is not None or max_area is not None) and self.count_engine != 'components':
+            raise ValueError("Area filters require the 'components' count engine")
+        if (min_area is not None and min_area < 0) or (max_area is not None and max_area < 0):
+            raise ValueError("Area limits cannot be negative")
+        if min_area is not None and max_area is not None and min_area > max_area:
+            raise ValueError("Minimum area cannot exceed maximum area")
+        height, width = image_data.shape[:2]
+        working_scale = self.working_scale(width, height, max_dimension, scale)
+        original_image = ImageModel(
+            path=filepath,
+            data=image_data,
+            width=width,
+            height=height,
+            format=os.path.splitext(filepath)[1].lstrip('.').lower()
+        )
+        
+        self._current_transformation = ImageTransformation(
+            original_image=original_image,
+            min_threshold=min_threshold,
+            max_threshold=max_threshold,
+            gaussian_kernel_size=self.scale_kernel_size(GAUSSIAN_KERNEL_SIZE, working_scale),
+            gaussian_sigma=GAUSSIAN_SIGMA * working_scale,
+            dilation_kernel_size=self.scale_kernel_size(DILATION_KERNEL_SIZE, working_scale),
+            scale=working_scale,
+            threshold_mode=auto_threshold,
+            min_area=min_area,
+            max_area=max_area
+        )
+        
+        # Automatic thresholds are chosen, and valid by construction, once the image is blurred
+        if auto_threshold is None and not self._current_transformation.is_valid():
+            raise ValueError("Invalid threshold values")
+        return self._current_transformation
+
+    def _load_image(self, filepath: str) -> np.ndarray:
+        """Decode an image file, reusing the cached decode if the file is unchanged."""
+        key = self._stage_key('decoded')
+        image_data = self._stage_cache.get(key) if key else None
+        if image_data is None:
+            image_data = ImageConversionService.decode_image(filepath, metrics_callback=self.metrics_callback)
+            if key:
+                self._stage_cache.put(key, image_data)
+        return image_data
+
+    def _stage_key(self, stage: str, *params) -> Optional[tuple]:
+        """Build the stage cache key for the image being processed, if caching applies."""
+        if self._stage_cache is None or self._source_path is None:
+            return None
+        return StageCacheService.make_key(self._source_path, stage, *params)
+
+    def _run_stage(self, name: str, stage: Callable[[], None]):
+        """Run a pipeline stage, reporting its duration and data sizes if instrumented."""
+        if self.metrics_callback is None:
+            stage()
+            return
+        result = self._current_transformation.result
+        input_name, output_name = self.STAGE_IO[name]
+        input_source = result if result is not None else self._current_transformation.original_image
+        input_bytes = self._stage_bytes(getattr(input_source, input_name))
+        start = time.perf_counter()
+        stage()
+        seconds = time.perf_counter() - start
+        output_bytes = self._stage_bytes(getattr(self._current_transformation.result, output_name))
+        self._emit_stage_event(name, seconds, input_bytes, output_bytes)
+
+    def _emit_stage_event(self, name: str, seconds: float, input_bytes: int, output_bytes: int):
+        """Publish a stage event for the image being processed."""
+        original_image = self._current_transformation.original_image
+        self.metrics_callback(StageEvent(
+            stage=name,
+            path=original_image.path,
+            seconds=seconds,
+            width=original_image.width,
+            height=original_image.height,
+            input_bytes=input_bytes,
+            output_bytes=output_bytes
+        ))
+
+    @staticmethod
+    def _stage_bytes(value) -> int:
+        """Get the size in bytes of a stage value: an array, a list of arrays or None."""
+        if value is None:
+            return 0
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        return sum(item.nbytes for item in value)
+
+    def _scratch_buffer(self, name: str, shape: tuple, dtype=np.uint8) -> Optional[np.ndarray]:
+        """Get the reusable scratch array for a stage, or None when buffers are not reused.
+        
+        Args:
+            name: Stage the buffer holds
+            shape: Required array shape
+            dtype: Required array dtype
+            
+        Returns:
+            Scratch array of the requested shape, reallocated only when the shape changes
+        """
+        if not self._reuse_buffers:
+            return None
+        buffer = self._scratch.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._scratch[name] = buffer
+        return buffer
+
+    @staticmethod
+    def _downscale(image_data: np.ndarray, scale: float) -> np.ndarray:
+        """Shrink an image by pyramid halving, finishing with area interpolation.
+        
+        Args:
+            image_data: Image to shrink
+            scale: Target scale, below 1
+            
+        Returns:
+            The image at ``scale`` times its size, rounded to whole pixels
+        """
+        height, width = image_data.shape[:2]
+        target_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        while True:
+            current_height, current_width = image_data.shape[:2]
+            if (current_width, current_height) == target_size:
+                break
+            if (current_width + 1) // 2 < target_size[0] or (current_height + 1) // 2 < target_size[1]:
+                break
+            image_data = cv2.pyrDown(image_data)
+        if (image_data.shape[1], image_data.shape[0]) != target_size:
+            image_data = cv2.resize(image_data, target_size, interpolation=cv2.INTER_AREA)
+        return image_data
+
+    def _release_stages(self, retain_stages: Collection[str]):
+        """Drop the intermediate stages of the current result that were not asked for."""
+        result = self._current_transformation.result
+        for stage in self.PIPELINE_STAGES:
+            if stage not in retain_stages:
+                setattr(result, stage, None)
+
+    def _convert_to_grayscale(self):
+        """Convert the image to grayscale at the working resolution."""
         try:
-            # Create result model if not exists
+            # Create result model if not exists; the pipeline never writes to the
+            # input, so the result shares its pixel buffer with the original image
             if not self._current_transformation.result:
                 self._current_transformation.result = ImageModel(
                     path=self._current_transformation.original_image.path,
-                    data=self._current_transformation.original_image.data.copy(),
+                    data=self._current_transformation.original_image.data,
                     width=self._current_transformation.original_image.width,
                     height=self._current_transformation.original_image.height,
-                    format=self._current_transformation.original_image.format
+                    format=self._current_transformation.original_image.format,
+                    scale=self._current_transformation.scale
                 )
             
-            # Apply transformations
-            gray_image = cv2.cvtColor(self._current_transformation.result.data, cv2.COLOR_BGR2GRAY)
+            # Reuse the blurred image if only the thresholds changed; no grayscale is needed then
+            blurred_key = self._blurred_key()
+            if blurred_key:
+                cached_blurred = self._stage_cache.get(blurred_key)
+                if cached_blurred is not None:
+                    self._current_transformation.result.blurred = cached_blurred
+                    return
+
+            image_data = self._current_transformation.result.data
+            gray_image = cv2.cvtColor(
+                image_data, cv2.COLOR_BGR2GRAY, dst=self._scratch_buffer('grayscale', image_data.shape[:2])
+            )
+            if self._current_transformation.scale < 1:
+                gray_image = self._downscale(gray_image, self._current_transformation.scale)
             self._current_transformation.result.grayscale = gray_image
-            
-            self._current_transformation.result.blurred = cv2.GaussianBlur(
-                gray_image, 
+        except Exception as e:
+            raise
+
+    def _blur_image(self):
+        """Apply Gaussian blur to the grayscale image, unless a cached blur was found."""
+        try:
+            result = self._current_transformation.result
+            if result.blurred is not None:
+                return
+            blurred_key = self._blurred_key()
+            # Cached stages must outlive the scratch buffers
+            result.blurred = cv2.GaussianBlur(
+                result.grayscale,
                 self._current_transformation.gaussian_kernel_size, 
-                self._current_transformation.gaussian_sigma
+                self._current_transformation.gaussian_sigma,
+                dst=None if blurred_key else self._scratch_buffer('blurred', result.grayscale.shape)
             )
+            if blurred_key:
+                self._stage_cache.put(blurred_key, result.blurred)
         except Exception as e:
             raise
 
+    def _blurred_key(self) -> Optional[tuple]:
+        """Build the stage cache key of the blurred image, if caching applies."""
+        return self._stage_key(
+            'blurred',
+            self._current_transformation.gaussian_kernel_size,
+            self._current_transformation.gaussian_sigma,
+            self._current_transformation.scale
+        )
+
     def _detect_edges(self):
         """Apply Canny edge detection algorithm."""
         try:
-            self._current_transformation.result.edges = cv2.Canny(
+            if self._current_transformation.threshold_mode is not None:
+                self._select_thresholds()
+            self._current_transformation.result.thresholds = (
+                self._current_transformation.min_threshold,
+                self._current_transformation.max_threshold
+            )
+            shape = self._current_transformation.result.blurred.shape
+            self._current_transformation.result.edges = EdgeDetectionService.detect(
                 self._current_transformation.result.blurred,
                 self._current_transformation.min_threshold,
                 self._current_transformation.max_threshold,
-                L2gradient=True,
-                apertureSize=3
+                engine=self.edge_engine,
+                gradients=self._gradients() if self.edge_engine == 'opencv_sobel' else None,
+                edges=self._scratch_buffer('edges', shape)
             )
-            
+        except Exception as e:
+            raise
+
+    def _dilate_edges(self, in_place: bool = False):
+        """Dilate the edges with a box blur so that nearby edge fragments join.
+        
+        Args:
+            in_place: Overwrite the edge buffer instead of keeping the undilated edges
+        """
+        try:
+            edges = self._current_transformation.result.edges
             self._current_transformation.result.dilated_edges = cv2.blur(
-                self._current_transformation.result.edges, 
+                edges, 
                 self._current_transformation.dilation_kernel_size, 
-                0
+                dst=edges if in_place else self._scratch_buffer('dilated_edges', edges.shape)
             )
         except Exception as e:
             raise
 
+    def _gradients(self) -> np.ndarray:
+        """Get the Sobel derivatives of the blurred image, reusing cached ones if only the thresholds changed."""
+        gradients_key = self._stage_key(
+            'gradients',
+            self._current_transformation.gaussian_kernel_size,
+            self._current_transformation.gaussian_sigma,
+            self._current_transformation.scale
+        )
+        gradients = self._stage_cache.get(gradients_key) if gradients_key else None
+        if gradients is None:
+            blurred = self._current_transformation.result.blurred
+            # Cached stages must outlive the scratch buffers
+            gradients = EdgeDetectionService.sobel_gradients(
+                blurred,
+                out=None if gradients_key else self._scratch_buffer('gradients', (2,) + blurred.shape, np.int16)
+            )
+            if gradients_key:
+                self._stage_cache.put(gradients_key, gradients)
+        return gradients
+
+    def _select_thresholds(self):
+        """Replace the thresholds with ones derived from the blurred image's histogram."""
+        histogram = ThresholdSelectionService.histogram(self._current_transformation.result.blurred)
+        self._current_transformation.min_threshold, self._current_transformation.max_threshold = (
+            ThresholdSelectionService.select_thresholds(histogram, self._current_transformation.threshold_mode)
+        )
+
     def _detect_contours(self):
-        """Find external contours in the image."""
+        """Find external contours in the image, or measure its objects with the components engine."""
         try:
-            contours, _ = cv2.findContours(
-                self._current_transformation.result.dilated_edges.copy(),
-                cv2.RETR_EXTERNAL,
-                cv2.CHAIN_APPROX_SIMPLE
-            )
-            self._current_transformation.result.contours = contours
-            self._current_transformation.result.object_count = len(contours)
+            # Neither engine writes to its input, so no defensive copy is needed
+            result = self._current_transformation.result
+            if self.count_engine == 'components':
+                # Area limits are given at full resolution
+                area_scale = self._current_transformation.scale ** 2
+                min_area, max_area = self._current_transformation.min_area, self._current_transformation.max_area
+                result.object_stats = ObjectCountingService.component_stats(
+                    result.dilated_edges,
+                    min_area=None if min_area is None else min_area * area_scale,
+                    max_area=None if max_area is None else max_area * area_scale,
+                    with_perimeters=self.measure_perimeters
+                )
+                result.object_count = result.object_stats.count
+                return
+            contours = ObjectCountingService.find_contours(result.dilated_edges)
+            result.contours = contours
+            result.object_count = len(contours)
         except Exception as e:
             raise
 
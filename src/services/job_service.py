@@ -0,0 +1,134 @@
+"""Service for running UI work on background threads and reporting back to the window."""
+
+import queue
+import threading
+from itertools import count
+from typing import Callable, Dict, Optional
+from ..config.processing_config import JOB_WORKERS, JOB_QUEUE_SIZE
+from ..models.job import Job
+from .image_processing_service import ProcessingCancelledError
+
+class JobService:
+    """Bounded job queue served by background threads, with supersede-on-submit cancellation.
+    
+    A job is a function called as ``function(job, *args, **kwargs)``; it should
+    poll ``job.is_cancelled()`` and may call ``report_progress`` with partial
+    results. Submitting a job cancels the previous job of the same kind,
+    whether it is queued, running or finished with its events not yet
+    handled. Progress, completion and failures are posted to the window with
+    ``write_event_value`` as ``(job, value)`` tuples; the event loop should
+    ignore events whose job ``is_cancelled()``, since a superseded job may
+    still post events that were already in flight.
+    """
+
+    PROGRESS_EVENT = '-JOB PROGRESS-'
+    DONE_EVENT = '-JOB DONE-'
+    ERROR_EVENT = '-JOB ERROR-'
+
+    def __init__(self, window, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE):
+        """Initialize the job service.
+        
+        Args:
+            window: PySimpleGUI window receiving the job events
+            workers: Number of background threads
+            queue_size: Number of jobs that may wait for a thread
+        """
+        self.window = window
+        self.workers = max(1, workers)
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._current: Dict[str, Job] = {}
+        self._job_ids = count(1)
+        self._threads = []
+
+    def submit(self, kind: str, function: Callable, *args, **kwargs) -> Job:
+        """Queue a job, cancelling the current job of the same kind.
+        
+        Superseded jobs are skipped when they reach a thread, so the queue only
+        fills up while every thread is busy with live jobs; submitting then
+        blocks until one frees up.
+        
+        Args:
+            kind: Kind of the job, e.g. 'folder' or 'image'
+            function: Work to run in the background
+            *args: Positional arguments passed after the job
+            **kwargs: Keyword arguments passed to the function
+            
+        Returns:
+            The queued job
+        """
+        job = Job(job_id=next(self._job_ids), kind=kind, function=function, args=args, kwargs=kwargs)
+        with self._lock:
+            previous = self._current.get(kind)
+            if previous is not None:
+                previous.cancel()
+            self._current[kind] = job
+            self._ensure_threads()
+        self._queue.put(job)
+        return job
+
+    def cancel(self, kind: Optional[str] = None):
+        """Cancel the current job of a kind, or of every kind.
+        
+        Args:
+            kind: Kind of job to cancel, None for all
+        """
+        with self._lock:
+            for job_kind, job in list(self._current.items()):
+                if kind is None or job_kind == kind:
+                    job.cancel()
+                    del self._current[job_kind]
+
+    def report_progress(self, job: Job, value):
+        """Post a partial result of a job to the window.
+        
+        Args:
+            job: The job reporting progress
+            value: Partial result, e.g. one processed image
+        """
+        if not job.is_cancelled():
+            self.window.write_event_value(self.PROGRESS_EVENT, (job, value))
+
+    def shutdown(self):
+        """Cancel all jobs and stop the background threads."""
+        self.cancel()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        # Drop queued jobs so that the stop markers are not blocked behind them
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout=1.0)
+
+    def _ensure_threads(self):
+        """Start the background threads on first use."""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f"job-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        """Run queued jobs until a stop marker arrives."""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.is_cancelled():
+                continue
+
+            try:
+                value = job.function(job, *job.args, **job.kwargs)
+            except ProcessingCancelledError:
+                continue
+            except Exception as e:
+                if not job.is_cancelled():
+                    self.window.write_event_value(self.ERROR_EVENT, (job, e))
+                continue
+
+            if not job.is_cancelled():
+                self.window.write_event_value(self.DONE_EVENT, (job, value))
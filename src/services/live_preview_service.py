@@ -0,0 +1,123 @@
+"""Service for recomputing the selected image in the background while thresholds change."""
+
+import threading
+import time
+from typing import Optional
+from ..config.processing_config import PREVIEW_DEBOUNCE_SECONDS, STAGE_CACHE_EDGE_ENGINE
+from .image_processing_service import ImageProcessingService, ProcessingCancelledError
+from .stage_cache_service import StageCacheService
+
+class LivePreviewService:
+    """Debounced, cancellable background processing for live threshold previews.
+    
+    Only the most recent request is kept. A request is processed once no newer one
+    has arrived for the debounce period, and an in-flight run is abandoned between
+    pipeline stages as soon as a newer request supersedes it. Finished results are
+    posted to the window with ``write_event_value``.
+    """
+
+    DONE_EVENT = '-PREVIEW DONE-'
+    ERROR_EVENT = '-PREVIEW ERROR-'
+
+    def __init__(self, window, stage_cache: Optional[StageCacheService] = None,
+                 debounce_seconds: float = PREVIEW_DEBOUNCE_SECONDS, edge_engine: str = STAGE_CACHE_EDGE_ENGINE):
+        """Initialize the live preview service.
+        
+        Args:
+            window: PySimpleGUI window receiving the result events
+            stage_cache: Stage cache shared with the foreground pipeline
+            debounce_seconds: Quiet period required before a request is processed
+            edge_engine: Canny engine of the preview pipeline, see ``EdgeDetectionService``;
+                the default reuses cached Sobel derivatives while only the thresholds change
+        """
+        self.window = window
+        self.debounce_seconds = debounce_seconds
+        self._processor = ImageProcessingService(stage_cache=stage_cache, edge_engine=edge_engine)
+        self._condition = threading.Condition()
+        self._pending = None
+        self._requested_at = 0.0
+        self._generation = 0
+        self._stopping = False
+        self._thread = None
+
+    def request(self, file_path: str, min_threshold: int, max_threshold: int):
+        """Schedule a preview, superseding any pending or in-flight request.
+        
+        Args:
+            file_path: Path to the image to preview
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+        """
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, file_path, min_threshold, max_threshold)
+            self._requested_at = time.monotonic()
+            self._ensure_thread()
+            self._condition.notify()
+
+    def cancel(self):
+        """Drop the pending request and abandon any in-flight run."""
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+
+    def shutdown(self):
+        """Stop the background worker."""
+        with self._condition:
+            self._stopping = True
+            self._generation += 1
+            self._pending = None
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _ensure_thread(self):
+        """Start the background worker on first use."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="live-preview", daemon=True)
+            self._thread.start()
+
+    def _is_superseded(self, generation: int) -> bool:
+        """Check whether a newer request has arrived since ``generation``."""
+        return generation != self._generation or self._stopping
+
+    def _next_request(self) -> Optional[tuple]:
+        """Block until a request has been quiet for the debounce period."""
+        with self._condition:
+            while not self._stopping:
+                if self._pending is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._requested_at + self.debounce_seconds - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                request, self._pending = self._pending, None
+                return request
+            return None
+
+    def _run(self):
+        """Process debounced requests until shut down."""
+        while True:
+            request = self._next_request()
+            if request is None:
+                return
+
+            generation, file_path, min_threshold, max_threshold = request
+            try:
+                self._processor.process_image(
+                    file_path,
+                    min_threshold,
+                    max_threshold,
+                    is_cancelled=lambda: self._is_superseded(generation)
+                )
+            except ProcessingCancelledError:
+                continue
+            except Exception as e:
+                if not self._is_superseded(generation):
+                    self.window.write_event_value(self.ERROR_EVENT, e)
+                continue
+
+            if not self._is_superseded(generation):
+                self.window.write_event_value(self.DONE_EVENT, self._processor.result)
@@ -0,0 +1,165 @@
+"""Service for collecting and reporting pipeline stage metrics."""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable
+import numpy as np
+from ..models.stage_event import StageEvent, ProfileReport
+
+class MetricsService:
+    """Service for aggregating stage events into per-stage statistics.
+
+    ``record`` is meant to be passed as the ``metrics_callback`` of the
+    processing and conversion services. Only durations and byte totals are
+    kept, not the events themselves, so memory stays small on long batches.
+    """
+
+    def __init__(self):
+        """Initialize an empty collector."""
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._totals = {}
+
+    def record(self, event: StageEvent):
+        """Add a stage event to the statistics.
+
+        Args:
+            event: The measurements of one stage
+        """
+        with self._lock:
+            self._durations.setdefault(event.stage, []).append(event.seconds)
+            totals = self._totals.setdefault(
+                event.stage, {'input_bytes': 0, 'output_bytes': 0, 'megapixels': 0.0}
+            )
+            totals['input_bytes'] += event.input_bytes
+            totals['output_bytes'] += event.output_bytes
+            totals['megapixels'] += event.megapixels
+
+    @contextmanager
+    def measure(self, stage: str, path: str = '', width: int = 0, height: int = 0, input_bytes: int = 0):
+        """Time the enclosed block and record it as a stage event.
+
+        Args:
+            stage: Name of the stage
+            path: Path to the image file
+            width: Image width in pixels
+            height: Image height in pixels
+            input_bytes: Size of the data the block reads
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(StageEvent(
+                stage=stage,
+                path=path,
+                seconds=time.perf_counter() - start,
+                width=width,
+                height=height,
+                input_bytes=input_bytes
+            ))
+
+    def summary(self) -> dict:
+        """Get per-stage statistics in the order stages were first recorded.
+
+        Returns:
+            Mapping of stage names to count, total seconds, mean/p50/p95/max
+            milliseconds, byte totals and megapixels per second
+        """
+        with self._lock:
+            stages = {stage: (list(durations), dict(self._totals[stage]))
+                      for stage, durations in self._durations.items()}
+
+        summary = {}
+        for stage, (durations, totals) in stages.items():
+            durations_ms = np.asarray(durations) * 1000
+            total_seconds = float(durations_ms.sum()) / 1000
+            summary[stage] = {
+                'count': len(durations),
+                'total_seconds': total_seconds,
+                'mean_ms': float(durations_ms.mean()),
+                'p50_ms': float(np.percentile(durations_ms, 50)),
+                'p95_ms': float(np.percentile(durations_ms, 95)),
+                'max_ms': float(durations_ms.max()),
+                'input_bytes': totals['input_bytes'],
+                'output_bytes': totals['output_bytes'],
+                'megapixels_per_second': totals['megapixels'] / total_seconds if total_seconds else 0.0,
+            }
+        return summary
+
+    def format_summary(self) -> str:
+        """Format the per-stage statistics as a text table."""
+        lines = [
+            f"{'stage':<16} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} "
+            f"{'p95 ms':>9} {'max ms':>9} {'in MiB':>9} {'out MiB':>9} {'MP/s':>8}"
+        ]
+        for stage, stats in self.summary().items():
+            lines.append(
+                f"{stage:<16} {stats['count']:>7} {stats['total_seconds']:>9.3f} {stats['mean_ms']:>9.2f} "
+                f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['max_ms']:>9.2f} "
+                f"{stats['input_bytes'] / 2**20:>9.1f} {stats['output_bytes'] / 2**20:>9.1f} "
+                f"{stats['megapixels_per_second']:>8.1f}"
+            )
+        return "\n".join(lines)
+
+    def clear(self):
+        """Discard all recorded statistics."""
+        with self._lock:
+            self._durations.clear()
+            self._totals.clear()
+
+    @staticmethod
+    def profile(function: Callable, *args, limit: int = 25, trace_allocations: bool = True,
+                **kwargs) -> ProfileReport:
+        """Run a single call under cProfile and optionally tracemalloc.
+
+        Intended for one image at a time, e.g.
+        ``MetricsService.profile(processor.process_image, path, 0, 70)``.
+
+        Args:
+            function: The callable to profile
+            *args: Positional arguments for the callable
+            limit: Number of functions and allocation sites to report
+            trace_allocations: Also trace Python-visible allocations, which slows the call down
+            **kwargs: Keyword arguments for the callable
+
+        Returns:
+            The profile report, holding the call's return value
+        """
+        profiler = cProfile.Profile()
+        started_tracing = trace_allocations and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                profiler.disable()
+            seconds = time.perf_counter() - start
+
+            traced_peak_bytes = 0
+            top_allocations = []
+            if trace_allocations:
+                _, traced_peak_bytes = tracemalloc.get_traced_memory()
+                statistics = tracemalloc.take_snapshot().statistics('lineno')
+                top_allocations = [str(statistic) for statistic in statistics[:limit]]
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+        return ProfileReport(
+            result=result,
+            seconds=seconds,
+            stats=stream.getvalue(),
+            traced_peak_bytes=traced_peak_bytes,
+            top_allocations=top_allocations
+        )
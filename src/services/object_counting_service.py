@@ -0,0 +1,100 @@
+"""Service providing interchangeable object counting engines."""
+
+from typing import Optional
+import cv2
+import numpy as np
+from ..config.processing_config import COUNT_ENGINES
+from ..models.object_stats import ObjectStats
+
+class ObjectCountingService:
+    """Counting of objects in a binary mask of dilated edges, by engine.
+    
+    Both engines count the same objects, the shapes that ``cv2.findContours``
+    reports as external contours:
+    
+    - ``'contours'`` traces the outer border of each shape with
+      ``cv2.findContours``; it is the faster way to only count
+    - ``'components'`` fills the holes of the mask and labels its 8-connected
+      components with ``cv2.connectedComponentsWithStats``, which yields the
+      area, bounding box and centroid of every object as arrays, optionally
+      their perimeters, and allows filtering objects by area
+    """
+
+    ENGINES = COUNT_ENGINES
+
+    @staticmethod
+    def find_contours(mask: np.ndarray) -> list:
+        """Find the external contours of a binary mask.
+        
+        Args:
+            mask: 8-bit mask with objects as nonzero pixels; left untouched
+            
+        Returns:
+            One point array per object
+        """
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return contours
+
+    @staticmethod
+    def component_stats(mask: np.ndarray, min_area: Optional[int] = None,
+                        max_area: Optional[int] = None, with_perimeters: bool = False) -> ObjectStats:
+        """Measure the objects of a binary mask.
+        
+        Args:
+            mask: 8-bit mask with objects as nonzero pixels; left untouched
+            min_area: Drop objects with a smaller area in pixels, None to keep all
+            max_area: Drop objects with a larger area in pixels, None to keep all
+            with_perimeters: Also trace the external contours to measure perimeters;
+                otherwise they are left at zero and no contours are traced
+            
+        Returns:
+            The stats of the objects kept, ordered by their first pixel in raster order
+        """
+        filled = ObjectCountingService.fill_holes(mask)
+        # Grana's block-based labelling computes the stats much faster than the default algorithm
+        label_count, labels, stats, centroids = cv2.connectedComponentsWithStatsWithAlgorithm(
+            filled, 8, cv2.CV_32S, cv2.CCL_GRANA
+        )
+        stats, centroids = stats[1:], centroids[1:]
+        areas = stats[:, cv2.CC_STAT_AREA]
+
+        perimeters = np.zeros(label_count - 1, dtype=np.float32)
+        if with_perimeters:
+            # Each external contour traces one object; its first point tells which
+            for contour in ObjectCountingService.find_contours(mask):
+                x, y = contour[0, 0]
+                perimeters[labels[y, x] - 1] = cv2.arcLength(contour, True)
+
+        keep = np.ones(len(areas), dtype=bool)
+        if min_area is not None:
+            keep &= areas >= min_area
+        if max_area is not None:
+            keep &= areas <= max_area
+        return ObjectStats(
+            areas=np.ascontiguousarray(areas[keep], dtype=np.int32),
+            perimeters=perimeters[keep],
+            bboxes=np.ascontiguousarray(stats[keep, :cv2.CC_STAT_AREA], dtype=np.int32),
+            centroids=np.ascontiguousarray(centroids[keep])
+        )
+
+    @staticmethod
+    def fill_holes(mask: np.ndarray) -> np.ndarray:
+        """Fill the holes of a binary mask.
+        
+        Background pixels that are not 4-connected to the image border, the
+        holes ``cv2.findContours`` sees inside an outer border, become
+        foreground, so that shapes nested in a hole merge with their parent.
+        
+        Args:
+            mask: 8-bit mask with objects as nonzero pixels
+            
+        Returns:
+            New 8-bit mask with objects and their holes at 255
+        """
+        height, width = mask.shape
+        # A one-pixel frame joins all border background into one region to flood
+        padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        np.minimum(mask, 1, out=padded[1:-1, 1:-1])
+        cv2.floodFill(padded, None, (0, 0), 2, flags=4)
+        # cv2.compare with a scalar rejects 1x1 inputs, as it takes them for a second array
+        return (padded[1:-1, 1:-1] < 2).view(np.uint8) * np.uint8(255)
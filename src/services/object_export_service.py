@@ -0,0 +1,165 @@
+"""Service for exporting per-object measurements as a columnar table."""
+
+import csv
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Optional
+import numpy as np
+from ..config.processing_config import OBJECT_EXPORT_BATCH_ROWS
+from ..models.object_table import ObjectTable
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+class ObjectExportService:
+    """Writes object tables to a CSV, NPZ or Parquet file in batches.
+    
+    Tables passed to ``write`` are buffered until ``batch_rows`` rows are
+    pending and then written out, so memory stays flat however many objects a
+    run produces:
+    
+    - CSV gets one line per object under a header of the column names
+    - NPZ holds one array per column, as ``numpy.load`` returns them; columns
+      are spooled to temporary files and assembled when the file is closed
+    - Parquet gets one row group per batch; requires ``pyarrow``
+    
+    Example:
+        with ObjectExportService('objects.parquet') as exporter:
+            exporter.write(ObjectTable.from_stats(0, stats))
+    """
+
+    SUPPORTED_FORMATS = ('csv', 'npz', 'parquet')
+
+    def __init__(self, path: str, output_format: Optional[str] = None, batch_rows: int = OBJECT_EXPORT_BATCH_ROWS):
+        """Initialize the object export service and create the output file.
+        
+        Args:
+            path: File to write
+            output_format: One of ``SUPPORTED_FORMATS``, None to infer it from the file extension
+            batch_rows: Rows buffered before they are written out
+            
+        Raises:
+            ValueError: If the format is not supported
+            ImportError: If Parquet is requested and pyarrow is not installed
+        """
+        output_format = output_format or self.format_for_path(path)
+        if output_format not in self.SUPPORTED_FORMATS:
+            raise ValueError(
+                f"Unsupported object export format: {output_format}; expected one of {', '.join(self.SUPPORTED_FORMATS)}"
+            )
+        if output_format == 'parquet' and pyarrow is None:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+        self.path = path
+        self.output_format = output_format
+        self.batch_rows = max(1, batch_rows)
+        self.rows_written = 0
+        self._pending = []
+        self._pending_rows = 0
+        self._stream = None
+        self._writer = None
+        self._spool = None
+        self._dtypes = None
+        self._closed = False
+        if output_format == 'csv':
+            self._stream = open(path, 'w', newline='')
+            self._writer = csv.writer(self._stream)
+            self._writer.writerow(ObjectTable.columns())
+        elif output_format == 'npz':
+            self._spool = tempfile.TemporaryDirectory(prefix="object-export-")
+
+    @staticmethod
+    def format_for_path(path: str) -> str:
+        """Get the export format matching a file's extension, such as 'csv' for 'objects.csv'."""
+        return os.path.splitext(path)[1].lstrip('.').lower()
+
+    def write(self, table: ObjectTable):
+        """Queue the rows of a table, writing a batch once enough rows are pending.
+        
+        Args:
+            table: Rows to append, usually the objects of one image
+        """
+        if not len(table):
+            return
+        self._pending.append(table)
+        self._pending_rows += len(table)
+        if self._pending_rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the pending rows as one batch."""
+        if not self._pending:
+            return
+        batch = ObjectTable.concatenate(self._pending)
+        self._pending = []
+        self._pending_rows = 0
+        if self.output_format == 'csv':
+            self._write_csv(batch)
+        elif self.output_format == 'npz':
+            self._spool_npz(batch)
+        else:
+            self._write_parquet(batch)
+        self.rows_written += len(batch)
+
+    def close(self):
+        """Write the remaining rows and finish the file; later calls do nothing."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        if self.output_format == 'csv':
+            self._stream.close()
+        elif self.output_format == 'npz':
+            self._assemble_npz()
+            self._spool.cleanup()
+        else:
+            if self._writer is None:
+                # A run without objects still gets a file with the table's schema
+                self._write_parquet(ObjectTable.empty())
+            self._writer.close()
+
+    def __enter__(self) -> 'ObjectExportService':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_csv(self, batch: ObjectTable):
+        """Append a batch as CSV lines, with floats at single precision."""
+        columns = [getattr(batch, column) for column in ObjectTable.columns()]
+        columns = [np.char.mod('%.7g', values) if values.dtype.kind == 'f' else values for values in columns]
+        self._writer.writerows(zip(*(values.tolist() for values in columns)))
+
+    def _spool_npz(self, batch: ObjectTable):
+        """Append each column of a batch to its temporary file."""
+        if self._dtypes is None:
+            self._dtypes = {column: getattr(batch, column).dtype for column in ObjectTable.columns()}
+        for column in ObjectTable.columns():
+            with open(os.path.join(self._spool.name, column), 'ab') as spool_file:
+                getattr(batch, column).tofile(spool_file)
+
+    def _assemble_npz(self):
+        """Write the spooled columns into the NPZ archive, one ``.npy`` member per column."""
+        empty = ObjectTable.empty()
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for column in ObjectTable.columns():
+                dtype = self._dtypes[column] if self._dtypes else getattr(empty, column).dtype
+                header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                          'shape': (self.rows_written,)}
+                with archive.open(f"{column}.npy", 'w', force_zip64=True) as member:
+                    np.lib.format.write_array_header_1_0(member, header)
+                    spool_path = os.path.join(self._spool.name, column)
+                    if os.path.exists(spool_path):
+                        with open(spool_path, 'rb') as spool_file:
+                            shutil.copyfileobj(spool_file, member)
+
+    def _write_parquet(self, batch: ObjectTable):
+        """Append a batch as one Parquet row group."""
+        table = pyarrow.table({column: getattr(batch, column) for column in ObjectTable.columns()})
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
@@ -0,0 +1,173 @@
+"""Service for persisting object counts between runs."""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Iterable, Optional
+from ..config.base_config import RESULT_CACHE_FILE
+from ..models.batch_result import BatchResult
+from .configuration_service import ConfigurationService
+
+class ResultCacheService:
+    """SQLite-backed store of object counts keyed by file identity and pipeline parameters.
+    
+    A file is identified by its absolute path, size and modification time, so an
+    entry is only reused while the file is unchanged on disk. Parameters are stored
+    as canonical JSON, so any change to thresholds or kernel settings is a miss.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            path TEXT NOT NULL,
+            parameters TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            object_count INTEGER NOT NULL,
+            scale REAL,
+            min_threshold INTEGER,
+            max_threshold INTEGER,
+            PRIMARY KEY (path, parameters)
+        )
+    """
+    # Bumped whenever the results table changes; older tables are dropped on open
+    _SCHEMA_VERSION = 3
+
+    def __init__(self, db_path: str = RESULT_CACHE_FILE):
+        """Initialize the result cache, creating the database if needed.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        ConfigurationService.validate_directory(os.path.dirname(os.path.abspath(db_path)))
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self._connection:
+            if self._connection.execute("PRAGMA user_version").fetchone()[0] != self._SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS results")
+                self._connection.execute(f"PRAGMA user_version = {self._SCHEMA_VERSION}")
+            self._connection.execute(self._SCHEMA)
+
+    def get(self, file_path: str, parameters: dict, identity: Optional[tuple] = None) -> Optional[BatchResult]:
+        """Look up the cached result of an unchanged file.
+        
+        Args:
+            file_path: Path to the image file
+            parameters: Pipeline parameters the count was computed with
+            identity: The file's identity from ``file_identity``, read now if None
+            
+        Returns:
+            The cached object count, working-resolution scale and applied Canny
+            thresholds as a result for ``file_path``, or None on a miss
+        """
+        if identity is None:
+            identity = self.file_identity(file_path)
+        row = None
+        if identity is not None:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT object_count, scale, min_threshold, max_threshold FROM results "
+                    "WHERE path = ? AND parameters = ? AND size = ? AND mtime_ns = ?",
+                    (identity[0], self._encode(parameters), identity[1], identity[2])
+                ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return BatchResult(
+            path=file_path, object_count=row[0], scale=row[1], min_threshold=row[2], max_threshold=row[3]
+        )
+
+    def put(self, file_path: str, parameters: dict, result: BatchResult, identity: Optional[tuple] = None):
+        """Store the object count, working-resolution scale and applied thresholds of a file.
+        
+        Args:
+            file_path: Path to the image file
+            parameters: Pipeline parameters the count was computed with
+            result: The successful result of processing the file
+            identity: The file's identity when it was read for processing, read now if None
+        """
+        if identity is None:
+            identity = self.file_identity(file_path)
+        if identity is not None:
+            self.put_many([(identity, result)], parameters)
+
+    def put_many(self, entries: Iterable[tuple], parameters: dict):
+        """Store the results of several files in one transaction.
+        
+        Args:
+            entries: (identity, result) pairs, with identities from ``file_identity``
+                taken before the files were processed, so that a file changed in the
+                meantime is stored under its old identity and misses next time
+            parameters: Pipeline parameters the results were computed with
+        """
+        encoded = self._encode(parameters)
+        rows = [
+            (identity[0], encoded, identity[1], identity[2], result.object_count, result.scale,
+             result.min_threshold, result.max_threshold)
+            for identity, result in entries
+        ]
+        if not rows:
+            return
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO results "
+                "(path, parameters, size, mtime_ns, object_count, scale, min_threshold, max_threshold) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def invalidate(self, path_prefix: Optional[str] = None) -> int:
+        """Remove cached entries.
+        
+        Args:
+            path_prefix: Only remove entries for files under this path; all entries if None
+            
+        Returns:
+            Number of entries removed
+        """
+        with self._lock, self._connection:
+            if path_prefix is None:
+                cursor = self._connection.execute("DELETE FROM results")
+            else:
+                prefix = os.path.abspath(path_prefix)
+                escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                cursor = self._connection.execute(
+                    "DELETE FROM results WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                    (prefix, escaped.rstrip(os.sep) + os.sep + '%')
+                )
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        """Get hit/miss counts for this session and the number of stored entries."""
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+        }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def file_identity(file_path: str) -> Optional[tuple]:
+        """Get (absolute path, size, mtime) of a file, or None if it cannot be accessed."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _encode(parameters: dict) -> str:
+        """Serialize parameters canonically."""
+        return json.dumps(parameters, sort_keys=True, separators=(',', ':'))
@@ -0,0 +1,162 @@
+"""Service for exporting batch results to machine-readable formats."""
+
+import csv
+import json
+from typing import Iterable, TextIO
+from ..models.batch_result import BatchResult
+from ..models.frame import FrameResult
+from ..models.sweep_result import SweepResult
+
+class ResultsExportService:
+    """Service for writing batch results as JSON or CSV."""
+
+    SUPPORTED_FORMATS = ('json', 'csv')
+
+    @staticmethod
+    def write_results(results: Iterable[BatchResult], stream: TextIO, output_format: str = 'json',
+                      include_scale: bool = False, include_thresholds: bool = False, **metadata):
+        """Write batch results in the requested format.
+        
+        Args:
+            results: Per-image batch results
+            stream: Text stream to write to
+            output_format: Either 'json' or 'csv'
+            include_scale: Report the working resolution each image was counted at
+            include_thresholds: Report the thresholds applied to each image
+            **metadata: Extra run information included in JSON output
+            
+        Raises:
+            ValueError: If the output format is not supported
+        """
+        if output_format == 'json':
+            ResultsExportService.write_json(results, stream, include_scale, include_thresholds, **metadata)
+        elif output_format == 'csv':
+            ResultsExportService.write_csv(results, stream, include_scale, include_thresholds)
+        else:
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+    @staticmethod
+    def write_json(results: Iterable[BatchResult], stream: TextIO, include_scale: bool = False,
+                   include_thresholds: bool = False, **metadata):
+        """Write per-image counts and the folder total as a JSON document.
+        
+        Args:
+            results: Per-image batch results
+            stream: Text stream to write to
+            include_scale: Add each image's working-resolution scale
+            include_thresholds: Add each image's applied min and max thresholds
+            **metadata: Extra run information included at the top level
+        """
+        results = list(results)
+        document = dict(metadata)
+        document['images'] = []
+        for result in results:
+            image = {'path': result.path, 'object_count': result.object_count, 'error': result.error}
+            if include_scale:
+                image['scale'] = result.scale
+            if include_thresholds:
+                image['min_threshold'] = result.min_threshold
+                image['max_threshold'] = result.max_threshold
+            document['images'].append(image)
+        document['total_objects'] = sum(result.object_count for result in results)
+        json.dump(document, stream, indent=2)
+        stream.write('\n')
+
+    @staticmethod
+    def write_csv(results: Iterable[BatchResult], stream: TextIO, include_scale: bool = False,
+                  include_thresholds: bool = False):
+        """Write per-image counts as CSV rows followed by a folder total row.
+        
+        Rows are written as results arrive, so a generator of results streams.
+        
+        Args:
+            results: Per-image batch results
+            stream: Text stream to write to
+            include_scale: Add a column with each image's working-resolution scale
+            include_thresholds: Add columns with each image's applied min and max thresholds
+        """
+        writer = csv.writer(stream)
+        extra_columns = (['scale'] if include_scale else []) + (
+            ['min_threshold', 'max_threshold'] if include_thresholds else []
+        )
+        writer.writerow(['path', 'object_count', 'error'] + extra_columns)
+        total_objects = 0
+        for result in results:
+            row = [result.path, result.object_count, result.error or '']
+            if include_scale:
+                row.append('' if result.scale is None else f"{result.scale:.6g}")
+            if include_thresholds:
+                row.extend('' if value is None else value for value in (result.min_threshold, result.max_threshold))
+            writer.writerow(row)
+            total_objects += result.object_count
+        writer.writerow(['TOTAL', total_objects, ''] + [''] * len(extra_columns))
+
+    @staticmethod
+    def write_sweep(sweep: SweepResult, stream: TextIO, output_format: str = 'json', **metadata):
+        """Write the counts of a threshold sweep in the requested format.
+        
+        JSON holds the threshold pairs, the per-image counts and the folder
+        totals; CSV has one column per pair, one row per image and a total row.
+        
+        Args:
+            sweep: Result of the threshold sweep
+            stream: Text stream to write to
+            output_format: Either 'json' or 'csv'
+            **metadata: Extra run information included in JSON output
+            
+        Raises:
+            ValueError: If the output format is not supported
+        """
+        if output_format == 'json':
+            document = dict(metadata)
+            document['threshold_pairs'] = [list(pair) for pair in sweep.threshold_pairs]
+            document['images'] = [
+                {
+                    'path': path,
+                    'object_counts': None if path in sweep.errors else counts.tolist(),
+                    'error': sweep.errors.get(path)
+                }
+                for path, counts in zip(sweep.paths, sweep.counts)
+            ]
+            document['total_objects'] = sweep.totals.tolist()
+            json.dump(document, stream, indent=2)
+            stream.write('\n')
+        elif output_format == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow(
+                ['path'] + [f"{min_threshold}-{max_threshold}" for min_threshold, max_threshold in sweep.threshold_pairs]
+                + ['error']
+            )
+            for path, counts in zip(sweep.paths, sweep.counts):
+                if path in sweep.errors:
+                    writer.writerow([path] + [''] * len(sweep.threshold_pairs) + [sweep.errors[path]])
+                else:
+                    writer.writerow([path] + counts.tolist() + [''])
+            writer.writerow(['TOTAL'] + sweep.totals.tolist() + [''])
+        else:
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+    @staticmethod
+    def write_frame_counts(results: Iterable[FrameResult], stream: TextIO, flush: bool = False):
+        """Write per-frame counts of a video or image sequence as CSV rows.
+        
+        Rows are written as frames finish, so a generator of results streams.
+        Skipped frames have an empty count.
+        
+        Args:
+            results: Per-frame results in frame order
+            stream: Text stream to write to
+            flush: Flush the stream after every row, for consumers tailing the output
+        """
+        writer = csv.writer(stream)
+        writer.writerow(['frame', 'timestamp', 'object_count', 'skipped', 'error'])
+        for result in results:
+            writer.writerow([
+                result.index,
+                '' if result.timestamp is None else f"{result.timestamp:.3f}",
+                result.object_count if result.succeeded else '',
+                int(result.skipped),
+                result.error or ''
+            ])
+            if flush:
+                stream.flush()
@@ -0,0 +1,98 @@
+"""Service for caching intermediate image processing stages in memory."""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+import numpy as np
+from ..config.processing_config import STAGE_CACHE_MAX_BYTES
+
+class StageCacheService:
+    """Least-recently-used cache of pipeline stage outputs bounded by a byte budget.
+    
+    Entries are keyed by (file path, modification time, stage name, stage parameters),
+    so editing a file on disk or changing a stage parameter never returns stale data.
+    """
+
+    def __init__(self, max_bytes: int = STAGE_CACHE_MAX_BYTES):
+        """Initialize the stage cache.
+        
+        Args:
+            max_bytes: Maximum total size of cached arrays in bytes
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current_bytes(self) -> int:
+        """Get the total size of cached arrays in bytes."""
+        return self._current_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(file_path: str, stage: str, *params: Hashable) -> Optional[tuple]:
+        """Build a cache key for a stage computed from a file.
+        
+        Args:
+            file_path: Path to the source image file
+            stage: Name of the pipeline stage
+            *params: Parameters the stage output depends on
+            
+        Returns:
+            The cache key, or None if the file cannot be accessed
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, stage, params)
+
+    def get(self, key: Optional[tuple]) -> Optional[np.ndarray]:
+        """Look up a cached stage output and mark it as recently used.
+        
+        Args:
+            key: Cache key from ``make_key``
+            
+        Returns:
+            The cached array, or None on a miss
+        """
+        if key is None:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Optional[tuple], value: np.ndarray):
+        """Store a stage output, evicting least recently used entries to stay within budget.
+        
+        Cached arrays are marked read-only since they are shared between callers.
+        Arrays larger than the whole budget are not cached.
+        
+        Args:
+            key: Cache key from ``make_key``
+            value: Stage output to cache
+        """
+        if key is None or value.nbytes > self.max_bytes:
+            return
+        value.flags.writeable = False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._current_bytes -= previous.nbytes
+            self._entries[key] = value
+            self._current_bytes += value.nbytes
+            while self._current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_bytes -= evicted.nbytes
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
@@ -0,0 +1,73 @@
+"""Service for counting objects in every frame of a video or image sequence."""
+
+from typing import Callable, Iterator, Optional
+from ..config.processing_config import FRAME_QUEUE_SIZE
+from ..models.frame import FrameResult
+from .frame_source_service import FrameSourceService
+from .image_processing_service import ImageProcessingService
+from .incremental_processing_service import IncrementalProcessingService
+
+class StreamProcessingService:
+    """Service for running the count-only pipeline over a stream of frames."""
+
+    def __init__(self, processor: Optional[ImageProcessingService] = None,
+                 queue_size: int = FRAME_QUEUE_SIZE, target_fps: Optional[float] = None,
+                 incremental: Optional[IncrementalProcessingService] = None):
+        """Initialize the stream processing service.
+        
+        Args:
+            processor: Pipeline used for the frames, by default one reusing its
+                buffers across frames, which suits the constant frame size of a stream
+            queue_size: Decoded frames buffered ahead of processing
+            target_fps: Frame rate to keep up with by skipping late frames, None to count every frame
+            incremental: Service counting each frame by reprocessing only what changed
+                since the previous one, None to run the full pipeline on every frame
+        """
+        self.processor = processor or ImageProcessingService(reuse_buffers=True)
+        self.queue_size = queue_size
+        self.target_fps = target_fps
+        self.incremental = incremental
+
+    def iter_counts(self, source: str, min_threshold: int, max_threshold: int,
+                    is_cancelled: Optional[Callable[[], bool]] = None, **pipeline_options) -> Iterator[FrameResult]:
+        """Count objects frame by frame, decoding ahead on a background thread.
+        
+        Args:
+            source: Video file path or printf-style image sequence pattern
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+            is_cancelled: Optional callable polled between frames; counting stops once it returns True
+            **pipeline_options: Working resolution, threshold mode and area filters passed on to
+                ``ImageProcessingService.process_image_count_only``; not supported
+                in incremental mode
+            
+        Yields:
+            One result per frame of the source, in order, including skipped frames
+            
+        Raises:
+            ValueError: If the source is not a video file or sequence pattern, or
+                pipeline options are given in incremental mode
+            IOError: If a video file cannot be opened
+        """
+        if self.incremental is not None:
+            if any(value is not None for value in pipeline_options.values()):
+                raise ValueError("Incremental mode counts at full resolution with fixed thresholds")
+            self.incremental.reset()
+        frame_source = FrameSourceService(source, self.queue_size, self.target_fps)
+        for frame in frame_source.frames(is_cancelled):
+            result = FrameResult(index=frame.index, timestamp=frame.timestamp, error=frame.error)
+            if frame.skipped:
+                result.skipped = True
+            elif frame.error is None:
+                try:
+                    if self.incremental is not None:
+                        result.object_count = self.incremental.count_frame(frame.data, min_threshold, max_threshold)
+                    else:
+                        self.processor.process_image_count_only(
+                            frame.data, min_threshold, max_threshold,
+                            path=frame.path or f"{source}#{frame.index}", **pipeline_options
+                        )
+                        result.object_count = self.processor.current_objects
+                except Exception as e:
+                    result.error = f"{e.__class__.__name__}: {e}"
+            yield result
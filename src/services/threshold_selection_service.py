@@ -0,0 +1,86 @@
+"""Service for deriving Canny thresholds from the intensity histogram of an image."""
+
+import cv2
+import numpy as np
+from ..config.processing_config import (
+    AUTO_THRESHOLD_MODES,
+    OTSU_LOW_RATIO,
+    MEDIAN_THRESHOLD_SIGMA
+)
+
+class ThresholdSelectionService:
+    """Service for choosing Canny thresholds per image from a single histogram pass."""
+
+    @staticmethod
+    def histogram(image_data: np.ndarray) -> np.ndarray:
+        """Count the pixels of each intensity of a grayscale image.
+
+        Args:
+            image_data: 8-bit grayscale image, read in place without copying
+
+        Returns:
+            Array of 256 pixel counts
+        """
+        return cv2.calcHist([image_data], [0], None, [256], [0, 256]).ravel().astype(np.int64)
+
+    @staticmethod
+    def select_thresholds(histogram: np.ndarray, mode: str) -> tuple:
+        """Derive the Canny thresholds of an image from its histogram.
+
+        ``'otsu'`` uses the Otsu threshold as the max threshold and
+        ``OTSU_LOW_RATIO`` of it as the min threshold. ``'median'`` places the
+        thresholds ``MEDIAN_THRESHOLD_SIGMA`` below and above the median intensity.
+
+        Args:
+            histogram: 256 pixel counts of the blurred grayscale image
+            mode: One of ``AUTO_THRESHOLD_MODES``
+
+        Returns:
+            Tuple of (min threshold, max threshold) with min below max
+
+        Raises:
+            ValueError: If the mode is not supported
+        """
+        if mode == 'otsu':
+            max_threshold = ThresholdSelectionService.otsu_threshold(histogram)
+            min_threshold = int(OTSU_LOW_RATIO * max_threshold)
+        elif mode == 'median':
+            median = ThresholdSelectionService.median_intensity(histogram)
+            min_threshold = int(max(0, (1 - MEDIAN_THRESHOLD_SIGMA) * median))
+            max_threshold = int(min(255, (1 + MEDIAN_THRESHOLD_SIGMA) * median))
+        else:
+            raise ValueError(
+                f"Unsupported threshold mode: {mode}; expected one of {', '.join(AUTO_THRESHOLD_MODES)}"
+            )
+        if max_threshold <= min_threshold:
+            max_threshold = min_threshold + 1
+        return min_threshold, max_threshold
+
+    @staticmethod
+    def otsu_threshold(histogram: np.ndarray) -> int:
+        """Get the intensity that maximizes the between-class variance.
+
+        Pixels at or below the returned intensity form the dark class, matching
+        ``cv2.threshold`` with ``THRESH_OTSU``.
+        """
+        counts = histogram.astype(np.float64)
+        total = counts.sum()
+        if total == 0:
+            return 0
+        intensities = np.arange(len(counts), dtype=np.float64)
+        dark_weight = np.cumsum(counts) / total
+        dark_sum = np.cumsum(counts * intensities) / total
+        mean = dark_sum[-1]
+        light_weight = 1 - dark_weight
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (mean * dark_weight - dark_sum) ** 2 / (dark_weight * light_weight)
+        variance[~np.isfinite(variance)] = 0
+        return int(np.argmax(variance))
+
+    @staticmethod
+    def median_intensity(histogram: np.ndarray) -> int:
+        """Get the median intensity of the pixels counted in a histogram."""
+        cumulative = np.cumsum(histogram)
+        if cumulative[-1] == 0:
+            return 0
+        return int(np.searchsorted(cumulative, cumulative[-1] / 2))
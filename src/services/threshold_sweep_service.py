@@ -0,0 +1,96 @@
+"""Service for counting objects at many Canny threshold pairs with shared preprocessing."""
+
+from typing import Iterable, List, Sequence
+import cv2
+import numpy as np
+from .edge_detection_service import EdgeDetectionService
+
+class ThresholdSweepService:
+    """Service for evaluating many (min, max) threshold pairs per image.
+
+    Canny runs once per image, at the lowest threshold, on shared Sobel
+    derivatives. Hysteresis is then resolved once per distinct low threshold:
+    the candidates above ``low`` are labelled as 8-connected components and
+    each component records its largest squared gradient magnitude. The edges
+    at ``(low, high)`` are exactly the components whose maximum exceeds
+    ``high``, so only the dilation and contour count run per pair.
+    """
+
+    @staticmethod
+    def threshold_grid(min_values: Iterable[int], max_values: Iterable[int]) -> List[tuple]:
+        """Build every valid (min, max) pair of two threshold lists.
+
+        Args:
+            min_values: Candidate lower thresholds
+            max_values: Candidate upper thresholds
+
+        Returns:
+            Pairs with min below max, ordered by min then max
+        """
+        max_values = sorted(set(max_values))
+        return [
+            (min_threshold, max_threshold)
+            for min_threshold in sorted(set(min_values))
+            for max_threshold in max_values
+            if 0 <= min_threshold < max_threshold
+        ]
+
+    @staticmethod
+    def count_pairs(blurred: np.ndarray, threshold_pairs: Sequence[tuple],
+                    dilation_kernel_size: tuple) -> np.ndarray:
+        """Count external contours of the dilated Canny edges for each threshold pair.
+
+        Gives the same counts as running Canny (L2 gradient, aperture 3), the
+        dilation blur and ``findContours`` for every pair separately.
+
+        Args:
+            blurred: Blurred grayscale image
+            threshold_pairs: (min, max) threshold pairs
+            dilation_kernel_size: Kernel size of the dilation blur
+
+        Returns:
+            Object counts aligned with ``threshold_pairs``
+        """
+        gradients = EdgeDetectionService.sobel_gradients(blurred)
+        dx, dy = gradients
+        counts = np.zeros(len(threshold_pairs), dtype=np.int64)
+        low_thresholds = sorted({pair[0] for pair in threshold_pairs})
+
+        # Non-maximum suppression does not depend on the thresholds, so the
+        # candidates of every low threshold are a subset of the lowest one's
+        candidates = cv2.Canny(dx, dy, low_thresholds[0], low_thresholds[0], L2gradient=True)
+        all_positions = np.flatnonzero(candidates)
+        all_magnitudes = (np.square(dx.reshape(-1)[all_positions], dtype=np.int32)
+                          + np.square(dy.reshape(-1)[all_positions], dtype=np.int32))
+        del gradients, dx, dy
+        dilated = np.empty_like(candidates)
+        flat_candidates = candidates.reshape(-1)
+
+        for low_threshold in low_thresholds:
+            above_low = all_magnitudes > EdgeDetectionService.squared_threshold(low_threshold)
+            positions = all_positions[above_low]
+            magnitudes = all_magnitudes[above_low]
+            candidates.fill(0)
+            flat_candidates[positions] = 255
+            label_count, labels = cv2.connectedComponents(candidates, connectivity=8, ltype=cv2.CV_32S)
+            pixel_labels = labels.reshape(-1)[positions]
+            del labels
+            component_peaks = np.zeros(label_count, dtype=np.int64)
+            np.maximum.at(component_peaks, pixel_labels, magnitudes)
+
+            # Kept components shrink monotonically with the high threshold, so
+            # pairs keeping the same number of components have identical edges
+            counts_by_kept = {}
+            for index, (min_threshold, max_threshold) in enumerate(threshold_pairs):
+                if min_threshold != low_threshold:
+                    continue
+                kept_components = component_peaks > EdgeDetectionService.squared_threshold(max_threshold)
+                kept_count = int(np.count_nonzero(kept_components))
+                if kept_count not in counts_by_kept:
+                    candidates.fill(0)
+                    flat_candidates[positions[kept_components[pixel_labels]]] = 255
+                    cv2.blur(candidates, dilation_kernel_size, dst=dilated)
+                    contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                    counts_by_kept[kept_count] = len(contours)
+                counts[index] = counts_by_kept[kept_count]
+        return counts
@@ -0,0 +1,516 @@
+"""Service for running the edge detection pipeline over tiles of large images."""
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+from ..config.processing_config import (
+    GAUSSIAN_KERNEL_SIZE,
+    GAUSSIAN_SIGMA,
+    DILATION_KERNEL_SIZE,
+    TILE_SIZE
+)
+from ..models.tile_summary import EdgeCandidateTile, TileSummary
+
+TileKey = Tuple[int, int]
+
+class _DisjointSet:
+    """Union-find over the sparse set of global node ids that take part in connections."""
+
+    def __init__(self, nodes: np.ndarray):
+        self.nodes = nodes
+        self._parent = list(range(len(nodes)))
+
+    def index(self, ids: np.ndarray) -> List[int]:
+        """Map global node ids (all present in ``nodes``) to union-find indices."""
+        return np.searchsorted(self.nodes, ids).tolist()
+
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        """Check which global node ids take part in connections."""
+        positions = np.minimum(np.searchsorted(self.nodes, ids), max(len(self.nodes) - 1, 0))
+        return self.nodes[positions] == ids if len(self.nodes) else np.zeros(len(ids), dtype=bool)
+
+    def find(self, node: int) -> int:
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, first: int, second: int):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self._parent[second] = first
+
+class TiledProcessingService:
+    """Service for blurring, edge-detecting, dilating and counting an image one tile at a time.
+
+    Processing runs in two passes so that the result matches a full-image run
+    exactly while only one tile of intermediate buffers exists at a time:
+
+    1. Each tile (with a halo sized to the blur, Sobel and suppression kernels)
+       yields its Canny candidates and strong seeds. Candidate components are
+       linked across tile borders, which resolves hysteresis globally.
+    2. Each tile is re-run to get its final edges, extended by a ring from the
+       neighbouring tiles for the dilation kernel, dilated, and reduced to a
+       ``TileSummary``. The summaries are stitched into the object count.
+
+    Counting follows ``cv2.findContours`` with ``RETR_EXTERNAL``: foreground is
+    8-connected, background 4-connected, and components nested inside the hole
+    of another component are not counted.
+    """
+
+    def __init__(self, tile_size: int = TILE_SIZE,
+                 gaussian_kernel_size: Tuple[int, int] = GAUSSIAN_KERNEL_SIZE,
+                 gaussian_sigma: float = GAUSSIAN_SIGMA,
+                 dilation_kernel_size: Tuple[int, int] = DILATION_KERNEL_SIZE):
+        """Initialize the tiled processing service.
+
+        Args:
+            tile_size: Edge length of the tiles
+            gaussian_kernel_size: Gaussian blur kernel size
+            gaussian_sigma: Gaussian blur sigma
+            dilation_kernel_size: Kernel size of the edge dilation blur
+        """
+        self.gaussian_kernel_size = gaussian_kernel_size
+        self.gaussian_sigma = gaussian_sigma
+        self.dilation_kernel_size = dilation_kernel_size
+        if tile_size < self.ring:
+            raise ValueError(f"Tile size must be at least {self.ring} pixels")
+        self.tile_size = tile_size
+
+    @property
+    def halo(self) -> int:
+        """Get the context around a tile needed for exact Canny candidates."""
+        # Gaussian radius, then one pixel each for the Sobel and suppression neighbourhoods
+        return max(self.gaussian_kernel_size) // 2 + 2
+
+    @property
+    def ring(self) -> int:
+        """Get the width of neighbouring edges needed to dilate a tile exactly."""
+        return max(1, max(self.dilation_kernel_size) // 2)
+
+    def iter_tiles(self, height: int, width: int) -> Iterator[Tuple[int, int, int, int, int, int]]:
+        """Split an image into tiles.
+
+        A remainder narrower than the dilation ring is merged into the previous tile.
+
+        Args:
+            height: Image height in pixels
+            width: Image width in pixels
+
+        Yields:
+            Tuples of (tile row, tile column, y, x, tile height, tile width)
+        """
+        row_spans = self._spans(height)
+        col_spans = self._spans(width)
+        for row, (y, tile_height) in enumerate(row_spans):
+            for col, (x, tile_width) in enumerate(col_spans):
+                yield row, col, y, x, tile_height, tile_width
+
+    def count_objects(self, grayscale: np.ndarray, min_threshold: int, max_threshold: int,
+                      before_tile: Optional[Callable[[], None]] = None) -> int:
+        """Run the full tiled pipeline over a grayscale image and count its objects.
+
+        Args:
+            grayscale: Full grayscale image
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+            before_tile: Optional callback invoked before each tile, e.g. to cancel
+
+        Returns:
+            Number of external contours of the dilated edges
+        """
+        tiles = list(self.iter_tiles(*grayscale.shape[:2]))
+        candidates = {}
+        for row, col, y, x, height, width in tiles:
+            if before_tile is not None:
+                before_tile()
+            candidates[(row, col)] = self.detect_candidates(
+                grayscale, y, x, height, width, min_threshold, max_threshold
+            )
+
+        edge_flags = self.link_candidates(candidates)
+
+        summaries = {}
+        for row, col, y, x, _, _ in tiles:
+            if before_tile is not None:
+                before_tile()
+            dilated = self.dilate_tile(grayscale, candidates, edge_flags, (row, col), min_threshold)
+            summaries[(row, col)] = self.summarize_tile(dilated, y, x)
+        return self.count_external(summaries)
+
+    def blurred_histogram(self, grayscale: np.ndarray, before_tile: Optional[Callable[[], None]] = None) -> np.ndarray:
+        """Count the intensities of the blurred image without materializing it.
+
+        Args:
+            grayscale: Full grayscale image
+            before_tile: Optional callback invoked before each tile, e.g. to cancel
+
+        Returns:
+            Array of 256 pixel counts, equal to the histogram of the fully blurred image
+        """
+        histogram = np.zeros(256, dtype=np.int64)
+        for _, _, y, x, height, width in self.iter_tiles(*grayscale.shape[:2]):
+            if before_tile is not None:
+                before_tile()
+            blurred, core = self._blur_region(grayscale, y, x, height, width)
+            histogram += np.bincount(blurred[core].ravel(), minlength=256)
+        return histogram
+
+    def detect_candidates(self, grayscale: np.ndarray, y: int, x: int, height: int, width: int,
+                          min_threshold: int, max_threshold: int) -> EdgeCandidateTile:
+        """Find the Canny candidates and strong seeds of one tile.
+
+        ``cv2.Canny`` with both thresholds equal skips hysteresis, so running it
+        at the low and at the high threshold gives the suppressed candidates and
+        the strong pixels; the final edges are the candidate components that
+        contain a strong pixel.
+
+        Args:
+            grayscale: Full grayscale image
+            y: Top row of the tile
+            x: Left column of the tile
+            height: Tile height
+            width: Tile width
+            min_threshold: Lower hysteresis threshold for Canny
+            max_threshold: Upper hysteresis threshold for Canny
+
+        Returns:
+            The labelled candidates of the tile
+        """
+        blurred, core = self._blur_region(grayscale, y, x, height, width)
+        label_count, labels = self._label_candidates(blurred, core, min_threshold)
+        strong_pixels = cv2.Canny(blurred, max_threshold, max_threshold, L2gradient=True, apertureSize=3)[core]
+        strong = np.zeros(label_count, dtype=bool)
+        strong[labels[strong_pixels > 0]] = True
+        strong[0] = False
+
+        depth = self.ring
+        return EdgeCandidateTile(
+            y=y,
+            x=x,
+            height=height,
+            width=width,
+            label_count=label_count - 1,
+            strong=strong,
+            top=labels[:depth].copy(),
+            bottom=labels[-depth:].copy(),
+            left=labels[:, :depth].copy(),
+            right=labels[:, -depth:].copy()
+        )
+
+    def link_candidates(self, candidates: Dict[TileKey, EdgeCandidateTile]) -> Dict[TileKey, np.ndarray]:
+        """Resolve hysteresis across tiles.
+
+        Args:
+            candidates: Candidate tiles keyed by (tile row, tile column)
+
+        Returns:
+            Per tile, a boolean array indexed by candidate label telling whether
+            the component is part of the final edges
+        """
+        offsets, total = {}, 0
+        for key in sorted(candidates):
+            offsets[key] = total
+            total += candidates[key].label_count
+
+        def to_global(key, labels):
+            return np.where(labels > 0, offsets[key] + labels.astype(np.int64) - 1, -1)
+
+        pairs = []
+        for first_side, second_side in self._seams(candidates):
+            first = np.concatenate([to_global(key, self._inner_line(candidates[key], side)) for key, side in first_side])
+            second = np.concatenate([to_global(key, self._inner_line(candidates[key], side)) for key, side in second_side])
+            pairs.extend(self._eight_connected_pairs(first, second, first >= 0, second >= 0))
+
+        pairs = self._unique_pairs(pairs, total)
+        links = _DisjointSet(np.unique(pairs))
+        for first, second in links.index(pairs):
+            links.union(first, second)
+
+        # Roots of linked components that contain a strong seed in any tile
+        strong_roots = set()
+        for key, tile in candidates.items():
+            ids = offsets[key] + np.flatnonzero(tile.strong).astype(np.int64) - 1
+            strong_roots.update(links.find(node) for node in links.index(ids[links.contains(ids)]))
+
+        edge_flags = {}
+        for key, tile in candidates.items():
+            flags = tile.strong.copy()
+            ids = offsets[key] + np.arange(tile.label_count, dtype=np.int64)
+            linked = links.contains(ids)
+            for label, node in zip((np.flatnonzero(linked) + 1).tolist(), links.index(ids[linked])):
+                flags[label] = links.find(node) in strong_roots
+            edge_flags[key] = flags
+        return edge_flags
+
+    def dilate_tile(self, grayscale: np.ndarray, candidates: Dict[TileKey, EdgeCandidateTile],
+                    edge_flags: Dict[TileKey, np.ndarray], key: TileKey, min_threshold: int) -> np.ndarray:
+        """Compute the dilated edges of one tile once hysteresis is resolved.
+
+        Args:
+            grayscale: Full grayscale image
+            candidates: Candidate tiles keyed by (tile row, tile column)
+            edge_flags: Output of ``link_candidates``
+            key: (tile row, tile column) of the tile
+            min_threshold: Lower hysteresis threshold for Canny
+
+        Returns:
+            The dilated edges of the tile
+        """
+        tile = candidates[key]
+        row, col = key
+        blurred, core = self._blur_region(grayscale, tile.y, tile.x, tile.height, tile.width)
+        _, labels = self._label_candidates(blurred, core, min_threshold)
+
+        depth = self.ring
+        top = depth if (row - 1, col) in candidates else 0
+        bottom = depth if (row + 1, col) in candidates else 0
+        left = depth if (row, col - 1) in candidates else 0
+        right = depth if (row, col + 1) in candidates else 0
+        region = np.zeros((top + tile.height + bottom, left + tile.width + right), dtype=np.uint8)
+        center_rows = slice(top, top + tile.height)
+        center_cols = slice(left, left + tile.width)
+        region[center_rows, center_cols] = edge_flags[key][labels]
+
+        def neighbour(offset_row, offset_col, rows, cols):
+            neighbour_key = (row + offset_row, col + offset_col)
+            neighbour_tile = candidates[neighbour_key]
+            strip = {(-1, 0): neighbour_tile.bottom, (1, 0): neighbour_tile.top,
+                     (0, -1): neighbour_tile.right, (0, 1): neighbour_tile.left}.get((offset_row, offset_col))
+            if strip is None:
+                # Diagonal neighbours contribute a corner of their top or bottom strip
+                strip = neighbour_tile.bottom if offset_row < 0 else neighbour_tile.top
+                strip = strip[:, -depth:] if offset_col < 0 else strip[:, :depth]
+            return edge_flags[neighbour_key][strip[rows, cols]]
+
+        every = slice(None)
+        if top:
+            region[:top, center_cols] = neighbour(-1, 0, every, every)
+        if bottom:
+            region[-bottom:, center_cols] = neighbour(1, 0, every, every)
+        if left:
+            region[center_rows, :left] = neighbour(0, -1, every, every)
+        if right:
+            region[center_rows, -right:] = neighbour(0, 1, every, every)
+        if top and left:
+            region[:top, :left] = neighbour(-1, -1, every, every)
+        if top and right:
+            region[:top, -right:] = neighbour(-1, 1, every, every)
+        if bottom and left:
+            region[-bottom:, :left] = neighbour(1, -1, every, every)
+        if bottom and right:
+            region[-bottom:, -right:] = neighbour(1, 1, every, every)
+
+        region *= 255
+        dilated = cv2.blur(region, self.dilation_kernel_size)
+        return dilated[center_rows, center_cols]
+
+    @staticmethod
+    def summarize_tile(mask: np.ndarray, y: int, x: int) -> TileSummary:
+        """Reduce a tile of the dilated edge mask to its connectivity summary.
+
+        Args:
+            mask: Tile of the dilated edges; nonzero pixels are foreground
+            y: Top row of the tile in the full image
+            x: Left column of the tile in the full image
+
+        Returns:
+            The tile summary
+        """
+        foreground = (mask > 0).view(np.uint8)
+        foreground_count, foreground_labels = cv2.connectedComponents(foreground, connectivity=8, ltype=cv2.CV_32S)
+        background_count, background_labels = cv2.connectedComponents(1 - foreground, connectivity=4, ltype=cv2.CV_32S)
+        labels = foreground_labels
+        labels -= background_labels
+        del background_labels
+
+        # Foreground/background pairs that touch through a shared pixel edge
+        pairs = []
+        for first, second in ((labels[:, :-1], labels[:, 1:]), (labels[:-1, :], labels[1:, :])):
+            mixed = (first > 0) != (second > 0)
+            first, second = first[mixed], second[mixed]
+            first_is_foreground = first > 0
+            pairs.append(np.where(first_is_foreground, first, second).astype(np.int64) * background_count
+                         - np.where(first_is_foreground, second, first))
+        keys = np.unique(np.concatenate(pairs))
+        adjacency = np.stack([keys // background_count, keys % background_count], axis=1).astype(np.int32)
+
+        return TileSummary(
+            y=y,
+            x=x,
+            height=mask.shape[0],
+            width=mask.shape[1],
+            foreground_count=foreground_count - 1,
+            background_count=background_count - 1,
+            top=labels[0].copy(),
+            bottom=labels[-1].copy(),
+            left=labels[:, 0].copy(),
+            right=labels[:, -1].copy(),
+            adjacency=adjacency
+        )
+
+    @staticmethod
+    def count_external(summaries: Dict[TileKey, TileSummary]) -> int:
+        """Count external contours of the full mask from its tile summaries.
+
+        Components are merged across tile seams, then every foreground component
+        is merged with the holes it touches; each resulting group is one external
+        contour.
+
+        Args:
+            summaries: Tile summaries keyed by (tile row, tile column)
+
+        Returns:
+            Number of external contours
+        """
+        keys = sorted(summaries)
+
+        # Global node ids: all foreground components first, then all background components
+        foreground_offsets, background_offsets = {}, {}
+        total_foreground = 0
+        for key in keys:
+            foreground_offsets[key] = total_foreground
+            total_foreground += summaries[key].foreground_count
+        total_nodes = total_foreground
+        for key in keys:
+            background_offsets[key] = total_nodes
+            total_nodes += summaries[key].background_count
+
+        def to_global(key, strip):
+            return np.where(
+                strip > 0,
+                foreground_offsets[key] + strip.astype(np.int64) - 1,
+                background_offsets[key] - strip.astype(np.int64) - 1
+            )
+
+        def line(sides):
+            return np.concatenate([
+                to_global(key, TiledProcessingService._inner_line(summaries[key], side)) for key, side in sides
+            ])
+
+        same_pairs, mixed_pairs = [], []
+        for first_side, second_side in TiledProcessingService._seams(summaries):
+            first, second = line(first_side), line(second_side)
+            first_foreground, second_foreground = first < total_foreground, second < total_foreground
+            # Foreground is 8-connected, background only through shared pixel edges
+            same_pairs.extend(TiledProcessingService._eight_connected_pairs(
+                first, second, first_foreground, second_foreground
+            ))
+            both_background = ~first_foreground & ~second_foreground
+            same_pairs.append(np.stack([first[both_background], second[both_background]], axis=1))
+            mixed = first_foreground != second_foreground
+            mixed_pairs.append(np.stack([
+                np.where(first_foreground, first, second)[mixed],
+                np.where(first_foreground, second, first)[mixed]
+            ], axis=1))
+
+        for key in keys:
+            adjacency = summaries[key].adjacency.astype(np.int64)
+            mixed_pairs.append(np.stack([
+                foreground_offsets[key] + adjacency[:, 0] - 1,
+                background_offsets[key] + adjacency[:, 1] - 1
+            ], axis=1))
+
+        # Background components touching the image border are outside every object
+        border = np.unique(np.concatenate([
+            line(sides) for sides in TiledProcessingService._image_border(summaries)
+        ]))
+        border_background = border[border >= total_foreground]
+
+        same = TiledProcessingService._unique_pairs(same_pairs, total_nodes)
+        mixed = TiledProcessingService._unique_pairs(mixed_pairs, total_nodes)
+
+        groups = _DisjointSet(np.unique(np.concatenate([same.ravel(), mixed.ravel(), border_background])))
+        for first, second in groups.index(same):
+            groups.union(first, second)
+
+        outer_roots = {groups.find(node) for node in groups.index(border_background)}
+        mixed_local = groups.index(mixed)
+        holes = [groups.find(background) not in outer_roots for _, background in mixed_local]
+        for (foreground, background), is_hole in zip(mixed_local, holes):
+            if is_hole:
+                groups.union(foreground, background)
+
+        linked_foreground = groups.index(groups.nodes[groups.nodes < total_foreground])
+        roots = {groups.find(node) for node in linked_foreground}
+        return total_foreground - len(linked_foreground) + len(roots)
+
+    def _spans(self, length: int) -> List[Tuple[int, int]]:
+        """Split one image dimension into (start, size) tile spans."""
+        starts = list(range(0, length, self.tile_size))
+        if len(starts) > 1 and length - starts[-1] < self.ring:
+            starts.pop()
+        return [(start, end - start) for start, end in zip(starts, starts[1:] + [length])]
+
+    def _blur_region(self, grayscale: np.ndarray, y: int, x: int, height: int, width: int) -> tuple:
+        """Blur a tile together with its halo.
+
+        Returns:
+            The blurred region and the slices selecting the tile within it
+        """
+        halo = self.halo
+        top, left = max(0, y - halo), max(0, x - halo)
+        bottom = min(grayscale.shape[0], y + height + halo)
+        right = min(grayscale.shape[1], x + width + halo)
+        blurred = cv2.GaussianBlur(grayscale[top:bottom, left:right], self.gaussian_kernel_size, self.gaussian_sigma)
+        return blurred, (slice(y - top, y - top + height), slice(x - left, x - left + width))
+
+    @staticmethod
+    def _label_candidates(blurred: np.ndarray, core: tuple, min_threshold: int) -> tuple:
+        """Label the 8-connected Canny candidates of a tile."""
+        candidates = cv2.Canny(blurred, min_threshold, min_threshold, L2gradient=True, apertureSize=3)[core]
+        return cv2.connectedComponents(np.ascontiguousarray(candidates), connectivity=8, ltype=cv2.CV_32S)
+
+    @staticmethod
+    def _seams(tiles: Dict[TileKey, object]) -> Iterator[tuple]:
+        """Yield, for every seam between tile columns and rows, the facing sides of both halves."""
+        rows = max(row for row, _ in tiles) + 1
+        cols = max(col for _, col in tiles) + 1
+        for col in range(cols - 1):
+            yield ([((row, col), 'right') for row in range(rows)],
+                   [((row, col + 1), 'left') for row in range(rows)])
+        for row in range(rows - 1):
+            yield ([((row, col), 'bottom') for col in range(cols)],
+                   [((row + 1, col), 'top') for col in range(cols)])
+
+    @staticmethod
+    def _image_border(tiles: Dict[TileKey, object]) -> List[list]:
+        """Get the tile sides lying on the image border."""
+        rows = max(row for row, _ in tiles) + 1
+        cols = max(col for _, col in tiles) + 1
+        return [
+            [((0, col), 'top') for col in range(cols)],
+            [((rows - 1, col), 'bottom') for col in range(cols)],
+            [((row, 0), 'left') for row in range(rows)],
+            [((row, cols - 1), 'right') for row in range(rows)],
+        ]
+
+    @staticmethod
+    def _inner_line(tile, side: str) -> np.ndarray:
+        """Get the labels of the outermost row or column of a tile on one side."""
+        strip = getattr(tile, side)
+        if strip.ndim == 1:
+            return strip
+        return {'top': strip[0], 'bottom': strip[-1], 'left': strip[:, 0], 'right': strip[:, -1]}[side]
+
+    @staticmethod
+    def _eight_connected_pairs(first: np.ndarray, second: np.ndarray,
+                               first_mask: np.ndarray, second_mask: np.ndarray) -> List[np.ndarray]:
+        """Pair up masked pixels of two facing lines that are straight or diagonal neighbours."""
+        pairs = []
+        for a, b, a_mask, b_mask in (
+            (first, second, first_mask, second_mask),
+            (first[:-1], second[1:], first_mask[:-1], second_mask[1:]),
+            (first[1:], second[:-1], first_mask[1:], second_mask[:-1]),
+        ):
+            both = a_mask & b_mask
+            pairs.append(np.stack([a[both], b[both]], axis=1))
+        return pairs
+
+    @staticmethod
+    def _unique_pairs(pairs: List[np.ndarray], total_nodes: int) -> np.ndarray:
+        """Concatenate and deduplicate (N, 2) node pairs."""
+        pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+        keys = np.unique(pairs[:, 0].astype(np.int64) * total_nodes + pairs[:, 1])
+        return np.stack([keys // max(total_nodes, 1), keys % max(total_nodes, 1)], axis=1)
@@ -1,19 +1,27 @@
 """Module for handling UI events in the Canny Edge Detection application."""
 
 import os
-import io
+import time
+from contextlib import closing, nullcontext
 import cv2
 import numpy as np
 import PySimpleGUI as sg
-from PIL import Image, ImageTk
 
+from src.config.processing_config import STAGE_CACHE_EDGE_ENGINE
 from src.services.image_processing_service import ImageProcessingService
 from src.services.image_conversion_service import ImageConversionService
+from src.services.batch_processing_service import BatchProcessingService
+from src.services.stage_cache_service import StageCacheService
+from src.services.result_cache_service import ResultCacheService
+from src.services.live_preview_service import LivePreviewService
+from src.services.job_service import JobService
+from src.services.metrics_service import MetricsService
 from src.services.file_management_service import FileManagementService
 from src.services.validation_service import ValidationService
-from src.config.base_config import TEMP_IMAGE_FILE, TRANSFORM_IMAGE_FILE
 from .ui_variables import UIVariables
-from .ui_config import UI_FONT, EMPTY_IMAGE_PATH
+from .ui_config import (
+    UI_FONT, EMPTY_IMAGE_PATH, UI_REFRESH_SECONDS, COLLECT_METRICS, METRICS_FONT, THUMBNAIL_SIZE
+)
 
 class EventController:
     """Handles all UI events and their associated logic."""
@@ -22,11 +30,19 @@ class EventController:
         """Initialize controller with window and required components."""
         self.window = window
         self.ui_vars = UIVariables()
-        self.image_processor = ImageProcessingService()
+        self.stage_cache = StageCacheService()
+        self.metrics = MetricsService() if COLLECT_METRICS else None
+        self.jobs = JobService(window)
+        self.live_preview = LivePreviewService(window, stage_cache=self.stage_cache)
         self.image_converter = ImageConversionService()
+        self.result_cache = ResultCacheService()
+        self.batch_processor = BatchProcessingService(result_cache=self.result_cache)
         self.file_manager = FileManagementService()
         self.validator = ValidationService()
         self.folder = None
+        self.selected_file = None
+        self.auto_threshold = None
+        self.file_names = []
         self.total_objects = 0
 
     def handle_event(self, event, values):
@@ -37,7 +53,14 @@ class EventController:
         handlers = {
             "Browse": self._handle_browse,
             "Load Images\n and Detect Objects": self._handle_load_images,
-            "-FILE LIST-": self._handle_file_selection
+            "-FILE LIST-": self._handle_file_selection,
+            "-cannyMinValue-": self._handle_threshold_change,
+            "-cannyMaxValue-": self._handle_threshold_change,
+            LivePreviewService.DONE_EVENT: self._handle_preview_done,
+            LivePreviewService.ERROR_EVENT: self._handle_preview_error,
+            JobService.PROGRESS_EVENT: self._handle_job_progress,
+            JobService.DONE_EVENT: self._handle_job_done,
+            JobService.ERROR_EVENT: self._handle_job_error
         }
 
         if event in handlers:
@@ -47,8 +70,15 @@ class EventController:
 
     def cleanup(self):
         """Perform cleanup operations before exit."""
-        self._cleanup_temp_files()
+        self.jobs.shutdown()
+        self.live_preview.shutdown()
+        self.batch_processor.shutdown()
+        self.result_cache.close()
         self.window.close()
+        if self.metrics:
+            sg.popup_scrolled(
+                self.metrics.format_summary(), title="Stage metrics", font=METRICS_FONT, size=(110, 12)
+            )
 
     def _handle_browse(self, values):
         """Handle Browse button click."""
@@ -68,124 +98,228 @@ class EventController:
 
         min_val = int(values['-cannyMinValue-'])
         max_val = int(values['-cannyMaxValue-'])
+        auto_threshold = self._threshold_mode(values)
 
-        if not self.validator.validate_threshold_values(min_val, max_val):
+        if auto_threshold is None and not self.validator.validate_threshold_values(min_val, max_val):
             return
 
+        # Submitting supersedes a folder load that is still running
         self._reset_state()
-        file_names = self.file_manager.list_image_files(self.folder)
-
-        if not self.validator.validate_image_files(len(file_names)):
-            return
+        self.batch_processor.options['auto_threshold'] = auto_threshold
+        self.jobs.submit('folder', self._load_folder, self.folder, min_val, max_val)
 
-        self.window["-FILE LIST-"].update(file_names)
+    def _load_folder(self, job, folder, min_val, max_val):
+        """Count the objects of every image in a folder; runs on a job thread.
+        
+        Results are reported in batches at most every ``UI_REFRESH_SECONDS``,
+        and the batch left over at the end is returned.
+        """
+        file_paths = (
+            os.path.join(folder, file_name)
+            for file_name in self.file_manager.iter_image_files(folder)
+        )
+        pending = []
+        last_refresh = time.monotonic()
+        # Closing the results stops dispatching and drops queued chunks on cancellation
+        with closing(self.batch_processor.iter_results(file_paths, min_val, max_val)) as results:
+            for result in results:
+                if job.is_cancelled():
+                    return pending
+                pending.append(result)
+                if time.monotonic() - last_refresh >= UI_REFRESH_SECONDS:
+                    self.jobs.report_progress(job, pending)
+                    pending = []
+                    last_refresh = time.monotonic()
+        return pending
 
-        for file_name in file_names:
-            file_path = os.path.join(self.folder, file_name)
-            self._process_image(file_path, min_val, max_val)
-            self._clear_image_viewer()
-            self.total_objects += self.image_processor.current_objects
+    def _add_folder_results(self, results):
+        """Add a batch of folder results to the file list and the running total."""
+        for result in results:
+            self.file_names.append(os.path.relpath(result.path, self.folder))
+            self.total_objects += result.object_count
+        self._update_folder_results()
 
+    def _update_folder_results(self):
+        """Show the files listed so far and the running object total."""
+        self.window["-FILE LIST-"].update(self.file_names)
         self.window["-OBJECTS-"].update(
             f"Total Number of Objects Detected from Images in Folder: {self.total_objects}"
         )
+        self.window.refresh()
 
     def _handle_file_selection(self, values):
         """Handle file selection from the list."""
         if not values["-FILE LIST-"]:
             return
             
-        try:
-            self._clear_transformations()
-            file_path = os.path.join(self.folder, values["-FILE LIST-"][0])
-            min_val = int(values['-cannyMinValue-'])
-            max_val = int(values['-cannyMaxValue-'])
-            
-            self._process_image(file_path, min_val, max_val)
-            self._show_main_image(TEMP_IMAGE_FILE)
-            self._display_transformations()
-            
-            self.window["-num_of_objects-"].update(
-                f"Total number of objects detected in selected image: {self.image_processor.current_objects}"
-            )
-        except Exception:
-            pass
+        self.live_preview.cancel()
+        self._clear_transformations()
+        file_path = os.path.join(self.folder, values["-FILE LIST-"][0])
+        self.selected_file = file_path
+        min_val = int(values['-cannyMinValue-'])
+        max_val = int(values['-cannyMaxValue-'])
+
+        self.auto_threshold = self._threshold_mode(values)
+        self.jobs.submit('image', self._process_image, file_path, min_val, max_val, self.auto_threshold)
+
+    def _handle_threshold_change(self, values):
+        """Handle threshold slider movement by scheduling a live preview."""
+        if not values.get("-LIVE PREVIEW-") or not self.selected_file:
+            return
+        # Automatic thresholds do not depend on the sliders
+        if self._threshold_mode(values) is not None:
+            return
+
+        min_val = int(values['-cannyMinValue-'])
+        max_val = int(values['-cannyMaxValue-'])
+        if min_val >= max_val:
+            return
 
-    def _process_image(self, filepath, min_val, max_val):
-        """Process a single image through the edge detection pipeline."""
-        self.image_converter.convert_to_png(filepath, TEMP_IMAGE_FILE)
-        self.image_processor.process_image(TEMP_IMAGE_FILE, min_val, max_val)
+        # The preview supersedes a selection that is still being processed
+        self.jobs.cancel('image')
+        self.live_preview.request(self.selected_file, min_val, max_val)
 
-    def _display_transformations(self):
+    def _handle_preview_done(self, values):
+        """Display a finished live preview result."""
+        result = values[LivePreviewService.DONE_EVENT]
+        if result is None or result.path != self.selected_file:
+            return
+        self._display_result(result)
+
+    def _handle_preview_error(self, values):
+        """Ignore failed previews; the file list selection reports errors on click."""
+        pass
+
+    def _handle_job_progress(self, values):
+        """Show a batch of results from the running folder load."""
+        job, results = values[JobService.PROGRESS_EVENT]
+        if job.is_cancelled():
+            return
+        self._add_folder_results(results)
+
+    def _handle_job_done(self, values):
+        """Show the outcome of a finished folder load or image selection."""
+        job, outcome = values[JobService.DONE_EVENT]
+        if job.is_cancelled():
+            return
+
+        if job.kind == 'folder':
+            self._add_folder_results(outcome)
+            if not self.validator.validate_image_files(len(self.file_names)):
+                return
+            self._clear_image_viewer()
+        elif outcome.path == self.selected_file:
+            self._show_main_image(outcome.data)
+            self._display_result(outcome)
+
+    def _handle_job_error(self, values):
+        """Report a failed folder load; failed selections are ignored as before."""
+        job, error = values[JobService.ERROR_EVENT]
+        if job.is_cancelled() or job.kind != 'folder':
+            return
+        self.validator.show_error(f"Could not read folder: {error}")
+
+    def _display_result(self, result):
+        """Display the transformations and object count of a processed image."""
+        measure = nullcontext() if self.metrics is None else self.metrics.measure(
+            'display', result.path, result.width, result.height, result.data.nbytes
+        )
+        with measure:
+            self._display_transformations(result)
+        thresholds = ""
+        if self.auto_threshold is not None and result.thresholds:
+            thresholds = f" (thresholds {result.thresholds[0]}-{result.thresholds[1]})"
+        self.window["-num_of_objects-"].update(
+            f"Total number of objects detected in selected image: {result.object_count}{thresholds}"
+        )
+
+    def _process_image(self, job, filepath, min_val, max_val, auto_threshold=None):
+        """Process a single image through the edge detection pipeline; runs on a job thread.
+        
+        Each job gets its own pipeline so that a superseded selection still
+        finishing its current stage cannot race the next one.
+        """
+        image_processor = ImageProcessingService(
+            stage_cache=self.stage_cache,
+            metrics_callback=self.metrics.record if self.metrics else None,
+            edge_engine=STAGE_CACHE_EDGE_ENGINE
+        )
+        image_processor.process_image(
+            filepath, min_val, max_val, is_cancelled=job.is_cancelled, auto_threshold=auto_threshold
+        )
+        return image_processor.result
+
+    @staticmethod
+    def _threshold_mode(values):
+        """Get the automatic threshold mode selected in the UI, None for manual thresholds."""
+        mode = values.get("-THRESHOLD MODE-", "Manual")
+        return None if mode in (None, "", "Manual") else mode.lower()
+
+    def _display_transformations(self, result):
         """Display all image transformations in the UI."""
         # Show blurred image
-        cv2.imwrite(TRANSFORM_IMAGE_FILE, self.image_processor.blurred_image)
         self._show_transformation(
             self.ui_vars.first_transformation,
             self.ui_vars.blur_image,
+            result.blurred,
             ""
         )
 
         # Show edge detection
-        cv2.imwrite(TRANSFORM_IMAGE_FILE, self.image_processor.edges)
         self._show_transformation(
             self.ui_vars.first_transformation,
             self.ui_vars.edges_image,
+            result.edges,
             "Gaussian Blurred, Grayscaled Image, \n and Edges Detected through Canny Algorithm (left to right):"
         )
 
         # Show dilated edges
-        cv2.imwrite(TRANSFORM_IMAGE_FILE, self.image_processor.dilated_edges)
         self._show_transformation(
             self.ui_vars.second_transformation,
             self.ui_vars.dilated_edges_image,
+            result.dilated_edges,
             ""
         )
 
-        # Show contours
-        result = np.zeros_like(self.image_processor.image)
-        cv2.drawContours(
-            result,
-            self.image_processor.contours,
-            -1,
-            (0, 255, 0),
-            thickness=-1
+        # Show contours, filled into a single channel and tinted green after downscaling
+        contour_mask = np.zeros_like(result.dilated_edges)
+        cv2.drawContours(contour_mask, result.contours, -1, 255, thickness=-1)
+        mask_height, mask_width = contour_mask.shape
+        width, height = THUMBNAIL_SIZE
+        scale = min(1.0, width / mask_width, height / mask_height)
+        contour_mask = cv2.resize(
+            contour_mask,
+            (max(1, round(mask_width * scale)), max(1, round(mask_height * scale))),
+            interpolation=cv2.INTER_AREA
         )
-        cv2.imwrite(TRANSFORM_IMAGE_FILE, result)
+        contour_image = cv2.merge([np.zeros_like(contour_mask), contour_mask, np.zeros_like(contour_mask)])
         self._show_transformation(
             self.ui_vars.second_transformation,
             self.ui_vars.contours_image,
+            contour_image,
             "Dilated Edges, \n and External Contours Filled (left to right):"
         )
 
-    def _show_transformation(self, transform_name, transform_image, description):
+    def _show_transformation(self, transform_name, transform_image, image_data, description):
         """Display a transformation step in the UI."""
         try:
-            self.image_converter.resize_image(TRANSFORM_IMAGE_FILE, TRANSFORM_IMAGE_FILE, 320, 240)
-            image = Image.open(TRANSFORM_IMAGE_FILE)
             self.window[transform_name].update(description)
-            self.window[transform_image].update(data=ImageTk.PhotoImage(image))
+            self.window[transform_image].update(
+                data=self.image_converter.render_thumbnail(image_data, *THUMBNAIL_SIZE)
+            )
         except Exception:
             pass
 
-    def _show_main_image(self, file_path):
+    def _show_main_image(self, image_data):
         """Display the main image in the UI."""
         try:
-            self.image_converter.resize_image(file_path, file_path, 320, 240)
-            image = Image.open(file_path)
-            bio = io.BytesIO()
-            image.save(bio, "PNG")
-            self.window["-IMAGE-"].update(data=bio.getvalue())
+            self.window["-IMAGE-"].update(data=self.image_converter.render_thumbnail(image_data, *THUMBNAIL_SIZE))
         except Exception:
             pass
 
     def _clear_image_viewer(self):
         """Clear the image displayed in the viewer."""
-        try:
-            self.image_converter.resize_image(EMPTY_IMAGE_PATH, TEMP_IMAGE_FILE, 320, 240)
-            self._show_main_image(TEMP_IMAGE_FILE)
-        except Exception:
-            pass
+        self._show_main_image(cv2.imread(EMPTY_IMAGE_PATH, cv2.IMREAD_UNCHANGED))
 
     def _clear_transformations(self):
         """Clear all transformation displays."""
@@ -202,10 +336,11 @@ class EventController:
 
     def _reset_state(self):
         """Reset the controller state."""
+        self.jobs.cancel('image')
+        self.live_preview.cancel()
         self._clear_transformations()
         self.window["-FILE LIST-"].update('')
+        self.selected_file = None
+        self.auto_threshold = None
+        self.file_names = []
         self.total_objects = 0
-
-    def _cleanup_temp_files(self):
-        """Remove temporary image files."""
-        self.file_manager.cleanup_files([TEMP_IMAGE_FILE, TRANSFORM_IMAGE_FILE])
\ No newline at end of file
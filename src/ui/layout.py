@@ -73,7 +73,8 @@ def create_folder_column(ui_vars):
                 default_value=DEFAULT_MIN_THRESHOLD,
                 orientation='h',
                 size=(30, 20),
-                key="-cannyMinValue-"
+                key="-cannyMinValue-",
+                enable_events=True
             )
         ],
         [
@@ -91,7 +92,25 @@ def create_folder_column(ui_vars):
                 default_value=DEFAULT_MAX_THRESHOLD,
                 orientation='h',
                 size=(30, 20),
-                key="-cannyMaxValue-"
+                key="-cannyMaxValue-",
+                enable_events=True
+            )
+        ],
+        [
+            sg.Text("Threshold Mode: ", text_color="yellow"),
+            sg.Combo(
+                ['Manual', 'Otsu', 'Median'],
+                default_value='Manual',
+                key="-THRESHOLD MODE-",
+                readonly=True
+            )
+        ],
+        [
+            sg.Checkbox(
+                "Live preview of selected image",
+                default=True,
+                key="-LIVE PREVIEW-",
+                text_color="yellow"
             )
         ]
     ]
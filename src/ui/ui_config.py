@@ -7,6 +7,10 @@ from src.config.base_config import ASSETS_DIRECTORY
 UI_THEME = 'DarkGrey8'
 UI_FONT = ("Arial", 12)
 WINDOW_SIZE = (1750, 800)
+THUMBNAIL_SIZE = (320, 240)  # Canvas size of the main image and transformation previews
+UI_REFRESH_SECONDS = 0.1  # Minimum interval between incremental UI updates during batch runs
+COLLECT_METRICS = False  # Show a per-stage timing summary of the viewed images on exit
+METRICS_FONT = ("Courier", 10)  # Fixed-width font keeping the metrics table aligned
 
 # UI Paths
 EMPTY_IMAGE_PATH = os.path.join(ASSETS_DIRECTORY, 'empty.png')
\ No newline at end of file
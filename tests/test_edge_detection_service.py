@@ -0,0 +1,65 @@
+"""Parity tests of the edge detection engines against OpenCV's Canny."""
+
+import os
+import cv2
+import numpy as np
+import pytest
+from src.config.processing_config import GAUSSIAN_KERNEL_SIZE, GAUSSIAN_SIGMA
+from src.services.edge_detection_service import EdgeDetectionService
+from src.services.image_conversion_service import ImageConversionService
+
+IMAGES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'images')
+THRESHOLD_PAIRS = [(0, 70), (10, 50), (30, 120), (50, 200), (100, 101)]
+
+def _blur(gray: np.ndarray) -> np.ndarray:
+    """Blur a grayscale image the way the pipeline does before Canny."""
+    return cv2.GaussianBlur(gray, GAUSSIAN_KERNEL_SIZE, GAUSSIAN_SIGMA)
+
+def _sample_images() -> dict:
+    """Blurred grayscale versions of the bundled sample images and a few synthetic ones."""
+    images = {}
+    for file_name in sorted(os.listdir(IMAGES_DIRECTORY)):
+        bgr = ImageConversionService.decode_image(os.path.join(IMAGES_DIRECTORY, file_name))
+        images[file_name] = _blur(cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY))
+    rng = np.random.default_rng(0)
+    images['noise'] = _blur(rng.integers(0, 256, (97, 131), dtype=np.uint8))
+    shapes = np.zeros((120, 160), dtype=np.uint8)
+    cv2.circle(shapes, (50, 60), 30, 200, -1)
+    cv2.rectangle(shapes, (90, 10), (159, 119), 120, -1)
+    images['shapes'] = _blur(shapes)
+    images['flat'] = np.full((16, 16), 77, dtype=np.uint8)
+    images['tiny'] = _blur(rng.integers(0, 256, (3, 5), dtype=np.uint8))
+    return images
+
+SAMPLE_IMAGES = _sample_images()
+
+@pytest.mark.parametrize('engine', EdgeDetectionService.ENGINES)
+@pytest.mark.parametrize('image_name', sorted(SAMPLE_IMAGES))
+@pytest.mark.parametrize('thresholds', THRESHOLD_PAIRS)
+def test_engine_matches_opencv_canny(engine, image_name, thresholds):
+    blurred = SAMPLE_IMAGES[image_name]
+    expected = cv2.Canny(blurred, *thresholds, L2gradient=True, apertureSize=3)
+    edges = EdgeDetectionService.detect(blurred, *thresholds, engine=engine)
+    assert edges.dtype == np.uint8
+    np.testing.assert_array_equal(edges, expected)
+
+@pytest.mark.parametrize('engine', EdgeDetectionService.ENGINES)
+def test_engine_writes_into_edges_buffer(engine):
+    blurred = SAMPLE_IMAGES['shapes']
+    buffer = np.empty_like(blurred)
+    edges = EdgeDetectionService.detect(blurred, 10, 50, engine=engine, edges=buffer)
+    np.testing.assert_array_equal(buffer, cv2.Canny(blurred, 10, 50, L2gradient=True, apertureSize=3))
+    np.testing.assert_array_equal(edges, buffer)
+
+def test_reused_gradients_match_fresh_detection():
+    blurred = SAMPLE_IMAGES['noise']
+    gradients = EdgeDetectionService.sobel_gradients(blurred)
+    for thresholds in THRESHOLD_PAIRS:
+        np.testing.assert_array_equal(
+            EdgeDetectionService.detect(blurred, *thresholds, engine='opencv_sobel', gradients=gradients),
+            cv2.Canny(blurred, *thresholds, L2gradient=True, apertureSize=3)
+        )
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        EdgeDetectionService.detect(SAMPLE_IMAGES['flat'], 0, 70, engine='sobel')
@@ -0,0 +1,106 @@
+"""Parity tests of the components counting engine against contour counting."""
+
+import cv2
+import numpy as np
+import pytest
+from src.services.object_counting_service import ObjectCountingService
+
+def _random_mask(seed: int, shape=(64, 80), density=0.3) -> np.ndarray:
+    """A random binary mask dilated like the pipeline's edges, so shapes nest and touch."""
+    rng = np.random.default_rng(seed)
+    mask = (rng.random(shape) < density).astype(np.uint8) * 255
+    return cv2.blur(mask, (3, 3))
+
+def _nested_mask() -> np.ndarray:
+    """Rings inside rings, a filled shape inside a hole and a ring with a dot."""
+    mask = np.zeros((120, 120), dtype=np.uint8)
+    cv2.rectangle(mask, (5, 5), (70, 70), 255, 2)
+    cv2.rectangle(mask, (15, 15), (60, 60), 255, 2)
+    cv2.circle(mask, (37, 37), 8, 255, -1)
+    cv2.circle(mask, (95, 95), 15, 255, 1)
+    mask[95, 95] = 255
+    cv2.circle(mask, (95, 25), 10, 255, -1)
+    return mask
+
+def _border_mask() -> np.ndarray:
+    """Objects touching each edge and corner of the image, one of them open towards the border."""
+    mask = np.zeros((50, 60), dtype=np.uint8)
+    mask[0, :10] = 255
+    mask[10:20, 0] = 255
+    mask[-1, -1] = 255
+    mask[20:30, -3:] = 255
+    cv2.rectangle(mask, (25, -5), (40, 15), 255, 1)
+    mask[-5:, 25:35] = 255
+    return mask
+
+MASKS = {
+    'empty': np.zeros((10, 12), dtype=np.uint8),
+    'full': np.full((10, 12), 255, dtype=np.uint8),
+    'single_pixel': np.full((1, 1), 255, dtype=np.uint8),
+    'single_background_pixel': np.zeros((1, 1), dtype=np.uint8),
+    'row': np.array([[255, 0, 255, 255, 0, 0, 255]], dtype=np.uint8),
+    'column': np.array([[255], [0], [255], [255]], dtype=np.uint8),
+    'diagonal': np.eye(8, dtype=np.uint8) * 255,
+    'nested': _nested_mask(),
+    'border': _border_mask(),
+}
+MASKS.update({f'random_{seed}': _random_mask(seed, density=0.05 + 0.03 * seed) for seed in range(10)})
+
+@pytest.mark.parametrize('name', sorted(MASKS))
+def test_component_count_matches_contours(name):
+    mask = MASKS[name]
+    stats = ObjectCountingService.component_stats(mask)
+    assert stats.count == len(ObjectCountingService.find_contours(mask))
+
+@pytest.mark.parametrize('name', sorted(MASKS))
+def test_component_stats_leave_mask_untouched(name):
+    mask = MASKS[name]
+    original = mask.copy()
+    ObjectCountingService.component_stats(mask)
+    np.testing.assert_array_equal(mask, original)
+
+def test_nested_shapes_count_once():
+    stats = ObjectCountingService.component_stats(_nested_mask())
+    # The outer square with everything inside it, the ring with its dot and the disc
+    assert stats.count == 3
+
+@pytest.mark.parametrize('name', sorted(MASKS))
+def test_area_filters_keep_objects_within_range(name):
+    mask = MASKS[name]
+    contours = ObjectCountingService.find_contours(mask)
+    areas = ObjectCountingService.component_stats(mask).areas
+    assert len(areas) == len(contours)
+    for min_area, max_area in [(None, None), (2, None), (None, 10), (5, 40), (int(areas.max(initial=0)), None)]:
+        filtered = ObjectCountingService.component_stats(mask, min_area=min_area, max_area=max_area)
+        expected = np.ones(len(areas), dtype=bool)
+        if min_area is not None:
+            expected &= areas >= min_area
+        if max_area is not None:
+            expected &= areas <= max_area
+        assert filtered.count == int(expected.sum())
+        np.testing.assert_array_equal(filtered.areas, areas[expected])
+        assert len(filtered.perimeters) == len(filtered.bboxes) == len(filtered.centroids) == filtered.count
+
+def test_areas_include_filled_holes():
+    mask = np.zeros((20, 20), dtype=np.uint8)
+    cv2.rectangle(mask, (2, 2), (11, 11), 255, 1)
+    stats = ObjectCountingService.component_stats(mask)
+    assert stats.areas.tolist() == [100]
+    assert stats.bboxes.tolist() == [[2, 2, 10, 10]]
+
+def test_fill_holes_fills_only_enclosed_background():
+    mask = np.zeros((7, 7), dtype=np.uint8)
+    mask[1:6, 1:6] = 255
+    mask[3, 3] = 0
+    mask[0, 3] = 0
+    filled = ObjectCountingService.fill_holes(mask)
+    assert filled[3, 3] == 255
+    assert filled[0, 3] == 0
+    assert filled.dtype == np.uint8 and filled.shape == mask.shape
+
+def test_perimeters_are_only_measured_on_request():
+    mask = _nested_mask()
+    assert not ObjectCountingService.component_stats(mask).perimeters.any()
+    stats = ObjectCountingService.component_stats(mask, with_perimeters=True)
+    expected = sorted(cv2.arcLength(contour, True) for contour in ObjectCountingService.find_contours(mask))
+    np.testing.assert_allclose(sorted(stats.perimeters), expected, rtol=1e-6)